@@ -33,6 +33,10 @@ def init_database():
         from app.services.filter_intelligence import FilterIntelligenceCache
         from app.services.contact_intelligence import ContactIntelligenceCache
         from app.services.decision_transparency import AimiDecision
+        from app.services.gmail_sync import GmailMessageStore, GmailSyncState
+        from app.services.llm_cache import LLMCompletionCache
+        from app.services.message_analysis_cache import MessageAnalysisCache
+        from app.services.llm_usage_ledger import LLMUsageRecord
         
         # Check what tables currently exist
         inspector = inspect(engine)
@@ -11,6 +11,8 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from contextlib import asynccontextmanager
 
+from app.services.llm_usage_ledger import LLMUsageContextMiddleware
+
 
 logger = logging.getLogger("uvicorn.error")
 logging.basicConfig(level=logging.INFO)
@@ -40,6 +42,18 @@ async def lifespan(app: FastAPI):
     yield
     
     logger.info("👋 Shutting down Hey Aimi API...")
+    
+    # Release pooled Google API connections
+    from app.services.google_api_client import close_http_client
+    await close_http_client()
+    
+    # Release pooled LLM provider connections
+    from app.services.llm_router import close_llm_router
+    await close_llm_router()
+    
+    # Write out any transparency decisions still buffered
+    from app.services.decision_transparency import flush_all_decision_buffers
+    flush_all_decision_buffers()
 
 
 class RequestLoggingMiddleware(BaseHTTPMiddleware):
@@ -77,6 +91,9 @@ app.add_middleware(
 # Add request/response logging middleware (helps debug runtime 502s on Railway)
 app.add_middleware(RequestLoggingMiddleware)
 
+# Tag LLM calls with the route that made them (for the usage ledger)
+app.add_middleware(LLMUsageContextMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(gmail.router, prefix="/api/gmail", tags=["gmail"])
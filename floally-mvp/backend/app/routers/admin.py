@@ -5,6 +5,12 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import inspect, text
 from app.database import get_db, engine
+from app.services.llm_router import get_llm_router
+from app.services.llm_usage_ledger import usage_summary
+from app.services.scoring_cascade import get_scoring_cascade
+from datetime import datetime, timedelta
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
 import logging
 
 router = APIRouter()
@@ -93,3 +99,36 @@ async def create_trusted_senders_table():
     except Exception as e:
         logger.error(f"Failed to create trusted_senders table: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/admin/llm-usage")
+async def llm_usage(days: int = 7, user_id: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    LLM cost, token and latency aggregates from the usage ledger
+    
+    Grouped per user, per endpoint, per day and per model over the last
+    `days` days, optionally for a single user. Rows still buffered in this
+    worker are flushed first.
+    """
+    try:
+        ledger = get_llm_router().ledger
+        if ledger is not None:
+            await run_in_threadpool(ledger.flush)
+        
+        since = datetime.utcnow() - timedelta(days=days)
+        return usage_summary(db, since, user_id)
+    except Exception as e:
+        logger.error(f"Failed to aggregate LLM usage: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/admin/scoring-cascade")
+async def scoring_cascade_stats():
+    """
+    Per-stage traffic and hit rates of the message scoring cascade
+    
+    For the rules, fast-model and reasoning-model stages: messages reached,
+    messages settled there, hit rate and share of all scored messages, since
+    this worker started.
+    """
+    return get_scoring_cascade().get_stats()
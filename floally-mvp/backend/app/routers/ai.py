@@ -1,11 +1,13 @@
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from typing import List, Optional
-import anthropic
-import os
-import json
 from datetime import datetime, timedelta
 
+from app.services.llm_router import get_llm_router
+from app.services.llm_prompts import PromptSegments
+from app.services.llm_structured import IncrementalJSONParser, StructuredOutputError, parse_items, parse_model
+from app.utils.sse import sse_event, sse_response
+
 router = APIRouter()
 
 class StandupRequest(BaseModel):
@@ -26,16 +28,35 @@ class SaveMyDayRequest(BaseModel):
     events: list
     userContext: dict
 
+class EmailImportance(BaseModel):
+    """One element of the email analysis prompt's JSON array"""
+    emailId: str = ""
+    emailIndex: int
+    important: bool = False
+    priority: str = "Low"
+    requiresAction: bool = False
+    actionType: str = "Review"
+    reason: str = ""
+    urgency: str = "When Possible"
+
+class TriagePriority(BaseModel):
+    title: str
+    reason: str = ""
+
+class SaveMyDayResponse(BaseModel):
+    """Save-my-day triage"""
+    top_priorities: List[TriagePriority]
+    can_wait: List[str] = []
+    reassurance: str
+
 @router.post("/standup")
 async def generate_standup(request: StandupRequest):
     """Generate daily stand-up using Claude (Aimi)"""
     try:
-        # Check for API key
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="ANTHROPIC_API_KEY not configured")
-        
-        client = anthropic.Anthropic(api_key=api_key)
+        # Check for a configured LLM provider
+        llm = get_llm_router()
+        if not llm.is_configured():
+            raise HTTPException(status_code=500, detail="No LLM provider configured")
         
         # Optional: Process autonomous actions FIRST if enabled
         autonomous_actions_summary = None
@@ -65,16 +86,11 @@ User Profile:
 {f"Autonomous Actions Taken:\n{autonomous_summary}\n" if autonomous_summary else ""}
 """
         
-        # Build context from messages and events
-        context = f"""
-You are Aimi, the user's calm and competent AI teammate, helping them plan their day as a member of their operations team.
-{user_context_text}
-
-Today's Gmail messages ({len(request.messages)} total):
-{format_messages_with_context(request.messages)}
-
-Today's Calendar events ({len(request.events)} scheduled):
-{format_events(request.events)}
+        has_autonomous_actions = bool(request.userContext and request.userContext.get('autonomousActionsSummary'))
+        
+        # Fixed instructions first, then the user's profile, then today's data,
+        # so repeat calls reuse the provider's prompt cache
+        instructions = f"""You are Aimi, the user's calm and competent AI teammate, helping them plan their day as a member of their operations team.
 
 Generate a concise daily stand-up with clear AGENCY LABELS to build trust:
 
@@ -83,7 +99,7 @@ Generate a concise daily stand-up with clear AGENCY LABELS to build trust:
    - Focus on what matters MOST to this specific user
    
 2. 3-5 key items WITH HONEST AGENCY LABELS:
-   {"- ✅ HANDLED: What you've already done (ONLY if autonomous actions were taken above)" if request.userContext and request.userContext.get('autonomousActionsSummary') else ""}
+   {"- ✅ HANDLED: What you've already done (ONLY if autonomous actions were taken, see the user profile)" if has_autonomous_actions else ""}
    - 🟡 SUGGESTED: "I recommend..." (Aimi's suggestions based on sender relationships & message importance)
    - 🔵 YOUR CALL: "You'll want to decide..." (Needs user decision - important contacts or complex situations)
    - 👀 WATCHING: "I'm monitoring..." (Aimi is tracking this)
@@ -100,37 +116,50 @@ CRITICAL CONTEXT AWARENESS:
 - Don't just look at keywords - understand the RELATIONSHIP
 
 CRITICAL HONESTY:
-{"- You MAY use ✅ HANDLED label since autonomous actions were taken (see above)" if request.userContext and request.userContext.get('autonomousActionsSummary') else "- DO NOT use ✅ HANDLED label - you haven't taken any autonomous actions yet"}
-- DO NOT claim you've done things that aren't in the "Autonomous Actions Taken" section above
+{"- You MAY use ✅ HANDLED label since autonomous actions were taken (see the user profile)" if has_autonomous_actions else "- DO NOT use ✅ HANDLED label - you haven't taken any autonomous actions yet"}
+- DO NOT claim you've done things that aren't in the "Autonomous Actions Taken" section of the user profile
 - BE HONEST: Only report what actually happened
 - Focus on: What you've NOTICED, what you RECOMMEND, what they should DECIDE
 
 Use these exact prefixes:
-{"- ✅ HANDLED: Actions already completed automatically" if request.userContext and request.userContext.get('autonomousActionsSummary') else ""}
+{"- ✅ HANDLED: Actions already completed automatically" if has_autonomous_actions else ""}
 - 🟡 SUGGESTED: Your intelligent recommendations based on message analysis
 - 🔵 YOUR CALL: Important items that need their personal attention
 - 👀 WATCHING: Items you're actively monitoring for changes
 
 Be warm, competent, and protective of their creative flow. You're their teammate providing insights, not making claims about actions you haven't taken.
-{f"Match your tone to their preference: {format_comm_style(request.userContext.get('communicationStyle', ''))}." if request.userContext and request.userContext.get('communicationStyle') else ""}
-Keep the response concise and actionable. ALWAYS use the agency label prefixes.
-"""
+Keep the response concise and actionable. ALWAYS use the agency label prefixes."""
+        
+        tone_text = f"Match your tone to their preference: {format_comm_style(request.userContext.get('communicationStyle', ''))}." if request.userContext and request.userContext.get('communicationStyle') else ""
+        
+        data = f"""Today's Gmail messages ({len(request.messages)} total):
+{format_messages_with_context(request.messages)}
+
+Today's Calendar events ({len(request.events)} scheduled):
+{format_events(request.events)}"""
+        
+        context = PromptSegments(
+            instructions=instructions,
+            user_context=f"{user_context_text.strip()}\n\n{tone_text}".strip(),
+            data=data
+        )
         
-        message = client.messages.create(
-            model="claude-sonnet-4-20250514",  # Latest Sonnet 4 for context-aware reasoning
+        completion = await llm.complete(
+            prompt=context,
+            task_type="reasoning",  # Sonnet 4 for context-aware reasoning
+            prefer_provider="anthropic",
             max_tokens=2000,
-            temperature=0.3,
-            messages=[{"role": "user", "content": context}]
+            temperature=0.3
         )
         
         # Extract text from response
-        standup_text = message.content[0].text if message.content else "No response generated"
+        standup_text = completion["text"] or "No response generated"
         
         return {
             "standup": standup_text,
             "usage": {
-                "input_tokens": message.usage.input_tokens,
-                "output_tokens": message.usage.output_tokens
+                "input_tokens": completion["input_tokens"],
+                "output_tokens": completion["output_tokens"]
             }
         }
     
@@ -146,11 +175,9 @@ Keep the response concise and actionable. ALWAYS use the agency label prefixes.
 async def analyze_emails(request: EmailAnalysisRequest):
     """Analyze emails to identify important ones requiring action/response"""
     try:
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="ANTHROPIC_API_KEY not configured")
-        
-        client = anthropic.Anthropic(api_key=api_key)
+        llm = get_llm_router()
+        if not llm.is_configured():
+            raise HTTPException(status_code=500, detail="No LLM provider configured")
         
         # Build context for email analysis
         emails_list = "\n\n".join([
@@ -201,23 +228,16 @@ Return your analysis as a JSON array with this structure:
 IMPORTANT: Include the emailId field with the exact ID shown in parentheses for each email.
 """
         
-        message = client.messages.create(
-            model="claude-sonnet-4-20250514",  # Latest Sonnet 4 for nuanced importance detection
+        completion = await llm.complete(
+            prompt=context,
+            task_type="reasoning",  # Sonnet 4 for nuanced importance detection
+            prefer_provider="anthropic",
             max_tokens=3000,
-            temperature=0.3,
-            messages=[{"role": "user", "content": context}]
+            temperature=0.3
         )
         
-        analysis_text = message.content[0].text if message.content else "[]"
-        
-        # Extract JSON from response (handle code blocks)
-        import json
-        import re
-        json_match = re.search(r'\[.*\]', analysis_text, re.DOTALL)
-        if json_match:
-            analysis = json.loads(json_match.group())
-        else:
-            analysis = []
+        # Keep every valid element, even if others are malformed or cut off
+        analysis = [a.dict() for a in parse_items(completion["text"] or "[]", EmailImportance)]
         
         return {
             "analysis": analysis,
@@ -235,11 +255,9 @@ IMPORTANT: Include the emailId field with the exact ID shown in parentheses for
 async def generate_email_response(request: EmailResponseRequest):
     """Generate a draft response for an important email"""
     try:
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="ANTHROPIC_API_KEY not configured")
-        
-        client = anthropic.Anthropic(api_key=api_key)
+        llm = get_llm_router()
+        if not llm.is_configured():
+            raise HTTPException(status_code=500, detail="No LLM provider configured")
         
         email = request.email
         context = f"""
@@ -261,13 +279,14 @@ Draft a professional, concise response that:
 Keep it brief and actionable. Write from a first-person perspective.
 """
         
-        message = client.messages.create(
-            model="claude-3-haiku-20240307",
-            max_tokens=1000,
-            messages=[{"role": "user", "content": context}]
+        completion = await llm.complete(
+            prompt=context,
+            task_type="light",
+            prefer_provider="anthropic",
+            max_tokens=1000
         )
         
-        response_text = message.content[0].text if message.content else ""
+        response_text = completion["text"] or ""
         
         return {
             "draftResponse": response_text,
@@ -370,34 +389,18 @@ class ProjectPlanResponse(BaseModel):
     success_metrics: str
     recommended_priority: str
 
-@router.post("/generate-project-plan", response_model=ProjectPlanResponse)
-async def generate_project_plan(request: ProjectPlanRequest):
-    """
-    Use Claude to generate a comprehensive project plan based on a brief description.
-    
-    This endpoint:
-    1. Takes a minimal project description
-    2. Enhances it with AI insights
-    3. Suggests timeline and milestones
-    4. Generates specific, actionable goals
-    5. Defines success metrics
-    6. Recommends priority level
-    """
-    try:
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="ANTHROPIC_API_KEY not configured")
-            
-        client = anthropic.Anthropic(api_key=api_key)
-        
-        prompt = f"""You are Aimi, an AI strategic partner helping someone plan their project.
+PROJECT_PLAN_COMPLETION = {
+    "task_type": "strategic",  # Sonnet 4 for strategic planning
+    "prefer_provider": "anthropic",
+    "max_tokens": 2000,
+    "temperature": 0.4
+}
 
-TODAY'S DATE: {datetime.now().strftime('%Y-%m-%d')}
 
-Project Description (provided by user):
-"{request.description}"
+def _project_plan_prompt(description: str) -> PromptSegments:
+    instructions = """You are Aimi, an AI strategic partner helping someone plan their project.
 
-Based on this description, help plan the project by providing:
+Based on the project description given after these instructions, help plan the project by providing:
 
 1. **Enhanced Description**: Expand and refine the description (2-3 sentences)
 2. **Timeline**: Suggest a realistic timeframe (e.g., "2-3 weeks", "1-2 months")
@@ -407,30 +410,30 @@ Based on this description, help plan the project by providing:
 6. **Priority**: Recommend priority level (low/medium/high/critical)
 
 Provide your response in this EXACT JSON format:
-{{
+{
     "enhanced_description": "Clear, comprehensive 2-3 sentence description",
     "timeline": "Suggested timeframe",
     "goals": [
-        {{
+        {
             "goal": "Specific, actionable goal",
             "deadline": "YYYY-MM-DD (actual date, not relative like 'Week 1')",
             "status": "not_started",
             "sub_tasks": [
-                {{
+                {
                     "task": "Specific action item that contributes to the goal",
                     "estimated_hours": 2.0,
                     "status": "not_started"
-                }}
+                }
             ]
-        }}
+        }
     ],
     "success_metrics": "How to measure success",
     "recommended_priority": "low|medium|high|critical"
-}}
+}
 
 IMPORTANT for deadlines:
 - Use ACTUAL dates in YYYY-MM-DD format (e.g., "2025-11-01", "2025-11-15")
-- Calculate dates from today: {datetime.now().strftime('%Y-%m-%d')}
+- Calculate dates from TODAY'S DATE, given with the project description
 - Space goals realistically (1-2 weeks apart for most tasks)
 - Consider realistic timelines for creative/professional work
 
@@ -448,82 +451,138 @@ Guidelines:
 - Be encouraging and supportive in tone
 - Prioritize based on urgency keywords and project scope
 - Help creative professionals stay organized without overwhelming them"""
+    return PromptSegments(
+        instructions=instructions,
+        data=f"""TODAY'S DATE: {datetime.now().strftime('%Y-%m-%d')}
 
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",  # Latest Sonnet 4 for strategic planning
-            max_tokens=2000,
-            temperature=0.4,
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }]
-        )
-        
-        # Parse Claude's response
-        response_text = response.content[0].text
-        
-        # Extract JSON from response (Claude might wrap it in markdown)
-        if '```json' in response_text:
-            response_text = response_text.split('```json')[1].split('```')[0]
-        elif '```' in response_text:
-            response_text = response_text.split('```')[1].split('```')[0]
+Project Description (provided by user):
+"{description}\""""
+    )
+
+
+def _parse_project_plan(response_text: str) -> ProjectPlanResponse:
+    """Parse the model's JSON plan (a malformed goal is dropped, not the whole plan)"""
+    return parse_model(response_text, ProjectPlanResponse, items={"goals": Goal})
+
+
+def _fallback_project_plan(description: str) -> ProjectPlanResponse:
+    """Generic plan returned when generation or parsing fails"""
+    today = datetime.now()
+    return ProjectPlanResponse(
+        enhanced_description=description,
+        timeline="2-4 weeks",
+        goals=[
+            Goal(
+                goal="Define project scope and requirements", 
+                deadline=(today + timedelta(days=7)).strftime('%Y-%m-%d'), 
+                status="not_started",
+                sub_tasks=[
+                    SubTask(task="Identify key stakeholders", estimated_hours=1.0, status="not_started"),
+                    SubTask(task="List project requirements", estimated_hours=2.0, status="not_started"),
+                    SubTask(task="Define success criteria", estimated_hours=1.0, status="not_started")
+                ]
+            ),
+            Goal(
+                goal="Create initial plan and timeline", 
+                deadline=(today + timedelta(days=10)).strftime('%Y-%m-%d'), 
+                status="not_started",
+                sub_tasks=[
+                    SubTask(task="Break down into milestones", estimated_hours=2.0, status="not_started"),
+                    SubTask(task="Estimate time for each phase", estimated_hours=1.5, status="not_started"),
+                    SubTask(task="Identify potential risks", estimated_hours=1.0, status="not_started")
+                ]
+            ),
+            Goal(
+                goal="Execute main project work", 
+                deadline=(today + timedelta(days=21)).strftime('%Y-%m-%d'), 
+                status="not_started",
+                sub_tasks=[
+                    SubTask(task="Complete core deliverables", estimated_hours=20.0, status="not_started"),
+                    SubTask(task="Regular progress check-ins", estimated_hours=3.0, status="not_started"),
+                    SubTask(task="Address blockers as they arise", estimated_hours=5.0, status="not_started")
+                ]
+            ),
+            Goal(
+                goal="Review, refine, and finalize", 
+                deadline=(today + timedelta(days=28)).strftime('%Y-%m-%d'), 
+                status="not_started",
+                sub_tasks=[
+                    SubTask(task="Conduct final review", estimated_hours=3.0, status="not_started"),
+                    SubTask(task="Implement feedback and polish", estimated_hours=4.0, status="not_started"),
+                    SubTask(task="Prepare final deliverable", estimated_hours=2.0, status="not_started")
+                ]
+            )
+        ],
+        success_metrics="Project completed on time with all requirements met",
+        recommended_priority="medium"
+    )
+
+
+@router.post("/generate-project-plan", response_model=ProjectPlanResponse)
+async def generate_project_plan(request: ProjectPlanRequest):
+    """
+    Use Claude to generate a comprehensive project plan based on a brief description.
+    
+    This endpoint:
+    1. Takes a minimal project description
+    2. Enhances it with AI insights
+    3. Suggests timeline and milestones
+    4. Generates specific, actionable goals
+    5. Defines success metrics
+    6. Recommends priority level
+    """
+    try:
+        llm = get_llm_router()
+        if not llm.is_configured():
+            raise HTTPException(status_code=500, detail="No LLM provider configured")
         
-        plan_data = json.loads(response_text.strip())
+        completion = await llm.complete(
+            prompt=_project_plan_prompt(request.description),
+            **PROJECT_PLAN_COMPLETION
+        )
         
-        return ProjectPlanResponse(**plan_data)
+        return _parse_project_plan(completion["text"])
         
     except Exception as e:
         print(f"Error generating project plan: {e}")
         # Return a helpful fallback with sub-tasks
-        today = datetime.now()
-        return ProjectPlanResponse(
-            enhanced_description=request.description,
-            timeline="2-4 weeks",
-            goals=[
-                Goal(
-                    goal="Define project scope and requirements", 
-                    deadline=(today + timedelta(days=7)).strftime('%Y-%m-%d'), 
-                    status="not_started",
-                    sub_tasks=[
-                        SubTask(task="Identify key stakeholders", estimated_hours=1.0, status="not_started"),
-                        SubTask(task="List project requirements", estimated_hours=2.0, status="not_started"),
-                        SubTask(task="Define success criteria", estimated_hours=1.0, status="not_started")
-                    ]
-                ),
-                Goal(
-                    goal="Create initial plan and timeline", 
-                    deadline=(today + timedelta(days=10)).strftime('%Y-%m-%d'), 
-                    status="not_started",
-                    sub_tasks=[
-                        SubTask(task="Break down into milestones", estimated_hours=2.0, status="not_started"),
-                        SubTask(task="Estimate time for each phase", estimated_hours=1.5, status="not_started"),
-                        SubTask(task="Identify potential risks", estimated_hours=1.0, status="not_started")
-                    ]
-                ),
-                Goal(
-                    goal="Execute main project work", 
-                    deadline=(today + timedelta(days=21)).strftime('%Y-%m-%d'), 
-                    status="not_started",
-                    sub_tasks=[
-                        SubTask(task="Complete core deliverables", estimated_hours=20.0, status="not_started"),
-                        SubTask(task="Regular progress check-ins", estimated_hours=3.0, status="not_started"),
-                        SubTask(task="Address blockers as they arise", estimated_hours=5.0, status="not_started")
-                    ]
-                ),
-                Goal(
-                    goal="Review, refine, and finalize", 
-                    deadline=(today + timedelta(days=28)).strftime('%Y-%m-%d'), 
-                    status="not_started",
-                    sub_tasks=[
-                        SubTask(task="Conduct final review", estimated_hours=3.0, status="not_started"),
-                        SubTask(task="Implement feedback and polish", estimated_hours=4.0, status="not_started"),
-                        SubTask(task="Prepare final deliverable", estimated_hours=2.0, status="not_started")
-                    ]
-                )
-            ],
-            success_metrics="Project completed on time with all requirements met",
-            recommended_priority="medium"
-        )
+        return _fallback_project_plan(request.description)
+
+
+@router.post("/generate-project-plan/stream")
+async def stream_project_plan(request: ProjectPlanRequest):
+    """
+    Server-sent events variant of /generate-project-plan.
+    
+    `chunk` events carry the plan JSON as it is generated (enough to show
+    progress right away), a `goal` event carries each goal as soon as it
+    is complete, and the `done` event carries the parsed plan, or the same
+    fallback plan as the JSON endpoint if generation fails.
+    """
+    llm = get_llm_router()
+    if not llm.is_configured():
+        raise HTTPException(status_code=500, detail="No LLM provider configured")
+    
+    async def events():
+        goals = IncrementalJSONParser(key="goals")
+        try:
+            async for text in llm.stream(
+                prompt=_project_plan_prompt(request.description),
+                **PROJECT_PLAN_COMPLETION
+            ):
+                yield sse_event("chunk", {"text": text})
+                for goal in goals.feed(text):
+                    try:
+                        yield sse_event("goal", Goal.model_validate(goal).dict())
+                    except ValidationError:
+                        continue  # Dropped from the final plan too
+            plan = _parse_project_plan(goals.text)
+        except Exception as e:
+            print(f"Error generating project plan: {e}")
+            plan = _fallback_project_plan(request.description)
+        yield sse_event("done", plan.dict())
+    
+    return sse_response(events())
 
 
 # New endpoint for generating dates for existing goals
@@ -545,7 +604,7 @@ async def generate_goal_dates(request: GoalDatesRequest):
     Use AI to suggest realistic deadlines for existing project goals
     """
     try:
-        client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        llm = get_llm_router()
         
         current_date = datetime.now().strftime('%Y-%m-%d')
         
@@ -580,29 +639,24 @@ IMPORTANT:
 - Consider realistic timelines for the work involved
 - Return goals in the same order as provided"""
 
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",  # Latest Sonnet 4 for strategic planning
+        completion = await llm.complete(
+            prompt=prompt,
+            task_type="strategic",  # Sonnet 4 for strategic planning
+            prefer_provider="anthropic",
             max_tokens=2000,
-            temperature=0.4,
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }]
+            temperature=0.4
         )
         
-        response_text = response.content[0].text
-        
-        # Clean up response if it's wrapped in code blocks
-        if "```json" in response_text:
-            response_text = response_text.split('```json')[1].split('```')[0]
-        elif "```" in response_text:
-            response_text = response_text.split('```')[1].split('```')[0]
+        suggested = parse_items(completion["text"], GoalWithDate, key="goals")
+        if not suggested:
+            raise StructuredOutputError("No goal dates in response")
         
-        dates_data = json.loads(response_text.strip())
-        
-        return GoalDatesResponse(goals=[
-            GoalWithDate(goal=g["goal"], deadline=g["deadline"])
-            for g in dates_data["goals"]
+        # Goals the response didn't get to keep the fallback weekly spacing
+        current = datetime.now()
+        return GoalDatesResponse(goals=suggested + [
+            GoalWithDate(goal=goal, deadline=(current + timedelta(weeks=i+1)).strftime('%Y-%m-%d'))
+            for i, goal in enumerate(request.goals)
+            if i >= len(suggested)
         ])
         
     except Exception as e:
@@ -625,8 +679,8 @@ async def save_my_day(request: SaveMyDayRequest):
     Uses behavior data + calendar + messages to intelligently defer low-priority items.
     """
     try:
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not api_key:
+        llm = get_llm_router()
+        if not llm.is_configured():
             # Fallback to simple triage without AI
             unread_count = sum(1 for m in request.messages if m.get('unread', False))
             return {
@@ -648,26 +702,13 @@ async def save_my_day(request: SaveMyDayRequest):
                 "reassurance": "I'm here to help. Let's tackle these one by one. Everything else can wait."
             }
         
-        client = anthropic.Anthropic(api_key=api_key)
-        
-        # Build triage context
-        context = f"""
-You are Aimi, the user's trusted AI teammate. They just hit "Save My Day" - they're feeling overwhelmed.
+        # Build triage context (fixed instructions first, so repeat calls hit the prompt cache)
+        context = PromptSegments(
+            instructions="""You are Aimi, the user's trusted AI teammate. They just hit "Save My Day" - they're feeling overwhelmed.
 
 Your job: Be their calm, competent ally and simplify their day to what ACTUALLY matters.
 
-Today's situation:
-- {len(request.messages)} messages in inbox
-- {len(request.events)} calendar events
-- User: {request.userContext.get('displayName', 'User')}
-
-Messages overview:
-{format_messages(request.messages[:10])}
-
-Calendar events:
-{format_events(request.events)}
-
-TASK: Triage everything into:
+TASK: Triage everything in today's situation (given after these instructions) into:
 
 1. **TOP 3 PRIORITIES** - What absolutely must be done today:
    - Be specific (reference actual emails/meetings)
@@ -684,38 +725,42 @@ TASK: Triage everything into:
    - Confident, warm tone
 
 Return JSON:
-{{
+{
   "top_priorities": [
-    {{"title": "Specific action", "reason": "Why it matters"}},
+    {"title": "Specific action", "reason": "Why it matters"},
     ...3 items total
   ],
   "can_wait": ["Item 1", "Item 2", ...],
   "reassurance": "Warm message with specific commitments"
-}}
+}
 
-Remember: You're their teammate saving their day. Be specific, warm, and protective of their focus.
-"""
+Remember: You're their teammate saving their day. Be specific, warm, and protective of their focus.""",
+            user_context=f"User: {request.userContext.get('displayName', 'User')}",
+            data=f"""Today's situation:
+- {len(request.messages)} messages in inbox
+- {len(request.events)} calendar events
+
+Messages overview:
+{format_messages(request.messages[:10])}
+
+Calendar events:
+{format_events(request.events)}"""
+        )
         
-        message = client.messages.create(
-            model="claude-sonnet-4-20250514",  # Latest Sonnet 4 - critical moment
+        completion = await llm.complete(
+            prompt=context,
+            task_type="reasoning",  # Sonnet 4 - critical moment
+            prefer_provider="anthropic",
             max_tokens=1500,
             temperature=0.3,
-            messages=[{"role": "user", "content": context}]
+            hedge=True  # User is waiting on this one
         )
         
-        response_text = message.content[0].text
-        
-        # Clean JSON from response
-        if "```json" in response_text:
-            response_text = response_text.split('```json')[1].split('```')[0]
-        elif "```" in response_text:
-            response_text = response_text.split('```')[1].split('```')[0]
-        
-        triage_data = json.loads(response_text.strip())
+        triage = parse_model(completion["text"], SaveMyDayResponse, items={"top_priorities": TriagePriority})
         
-        return triage_data
+        return triage.dict()
         
-    except json.JSONDecodeError as e:
+    except StructuredOutputError as e:
         print(f"JSON decode error in save-my-day: {e}")
         # Fallback
         return {
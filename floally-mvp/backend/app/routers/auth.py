@@ -5,6 +5,7 @@ from google.oauth2.credentials import Credentials
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import User, ConnectedAccount
+from app.utils.google_auth import invalidate_google_services
 import os
 import json
 import uuid
@@ -140,6 +141,8 @@ async def callback(code: str, state: str, db: Session = Depends(get_db)):
             connected_account.scopes = credentials.scopes
         
         db.commit()
+        # Drop any cached Gmail/Calendar services built from the old tokens
+        invalidate_google_services(email)
         print(f"✅ Connected account saved for {email}")
         
         # Redirect to frontend root with user info
@@ -13,7 +13,7 @@ import os
 import httpx
 
 from ..database import get_db
-from ..models.user import SenderStats, ConnectedAccount, User
+from ..models.user import ConnectedAccount, User
 from ..services.contextual_scoring import ContextualScorer
 
 router = APIRouter()
@@ -52,20 +52,24 @@ async def process_inbox_autonomously(request: AutonomousActionsRequest, db: Sess
         actions_taken = []
         user_prefs = request.user_preferences or {}
         
-        # Get user's behavioral patterns from database
-
-        sender_stats_query = db.query(SenderStats).filter(
-            SenderStats.user_email == request.user_email
-        ).all()
-        sender_stats = {stat.sender_email: stat for stat in sender_stats_query}
+        # Score the whole batch up front: sender stats, trust rows and profile
+        # are loaded with one query each instead of per message
+        user = db.query(User).filter(User.email == request.user_email).first()
+        score_results = []
+        if user:
+            scorer = ContextualScorer(db)
+            score_results = scorer.score_batch(
+                str(user.id),
+                [_scoring_input(message) for message in request.messages]
+            )
         
         # Get email management preferences
         auto_archive_promo = user_prefs.get('email_management', {}).get('auto_archive_promotional', False)
         
-        for message in request.messages:
+        for index, message in enumerate(request.messages):
             action_result = await _evaluate_message_for_action(
                 message=message,
-                sender_stats=sender_stats,
+                score_result=score_results[index] if user else None,
                 auto_archive_promo=auto_archive_promo,
                 user_email=request.user_email,
                 db=db
@@ -91,9 +95,32 @@ async def process_inbox_autonomously(request: AutonomousActionsRequest, db: Sess
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _extract_sender_email(from_addr: str) -> str:
+    if '<' in from_addr and '>' in from_addr:
+        return from_addr.split('<')[1].split('>')[0]
+    return from_addr
+
+
+def _scoring_input(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a frontend message dict to a ContextualScorer.score_batch entry"""
+    from_addr = message.get('from', '')
+    return {
+        'sender_email': _extract_sender_email(from_addr),
+        'sender_name': from_addr,
+        'subject': message.get('subject', 'No subject'),
+        'snippet': message.get('snippet', ''),
+        'gmail_signals': {
+            'is_starred': message.get('isStarred', False),
+            'is_important': message.get('isImportant', False),
+            'category': 'promotional' if message.get('isPromotional') else 'primary',
+            'has_unsubscribe_link': message.get('hasUnsubscribeLink', False)
+        }
+    }
+
+
 async def _evaluate_message_for_action(
     message: Dict[str, Any],
-    sender_stats: Dict[str, Any],
+    score_result: Optional[Dict[str, Any]],
     auto_archive_promo: bool,
     user_email: str,
     db: Session
@@ -104,17 +131,9 @@ async def _evaluate_message_for_action(
     """
     email_id = message.get('id')
     subject = message.get('subject', 'No subject')
-    from_addr = message.get('from', '')
     
-    # Extract sender email
-    if '<' in from_addr and '>' in from_addr:
-        sender_email = from_addr.split('<')[1].split('>')[0]
-    else:
-        sender_email = from_addr
-    
-    # Get user for contextual scoring
-    user = db.query(User).filter(User.email == user_email).first()
-    if not user:
+    # Contextual score comes from the batch scored by the caller
+    if score_result is None:
         return ActionResult(
             email_id=email_id or 'unknown',
             subject=subject,
@@ -123,24 +142,6 @@ async def _evaluate_message_for_action(
             confidence=0.0
         )
     
-    # Use contextual scorer to understand importance
-    scorer = ContextualScorer(db)
-    gmail_signals = {
-        'is_starred': message.get('isStarred', False),
-        'is_important': message.get('isImportant', False),
-        'category': 'promotional' if message.get('isPromotional') else 'primary',
-        'has_unsubscribe_link': message.get('hasUnsubscribeLink', False)
-    }
-    
-    score_result = scorer.calculate_contextual_importance(
-        user_id=str(user.id),
-        sender_email=sender_email,
-        sender_name=from_addr,
-        subject=subject,
-        snippet=message.get('snippet', ''),
-        gmail_signals=gmail_signals
-    )
-    
     # Extract relationship and score
     relationship = score_result['sender_relationship']
     importance_score = score_result['importance_score']
@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 
 from app.database import get_db
-from app.utils.google_auth import get_calendar_service
+from app.services.google_api_client import AsyncGoogleClient
 
 router = APIRouter()
 
@@ -11,20 +11,20 @@ router = APIRouter()
 async def list_events(user_email: str, days: int = 1, db: Session = Depends(get_db)):
     """Get upcoming calendar events"""
     try:
-        service = get_calendar_service(user_email, db)
+        client = await AsyncGoogleClient.for_user(user_email, db)
         
         # Get events for the next N days
         now = datetime.utcnow()
         time_min = now.isoformat() + 'Z'
         time_max = (now + timedelta(days=days)).isoformat() + 'Z'
         
-        events_result = service.events().list(
-            calendarId='primary',
+        events_result = await client.list_events(
+            calendar_id='primary',
             timeMin=time_min,
             timeMax=time_max,
             singleEvents=True,
             orderBy='startTime'
-        ).execute()
+        )
         
         events = events_result.get('items', [])
         
@@ -55,8 +55,8 @@ async def list_events(user_email: str, days: int = 1, db: Session = Depends(get_
 async def list_calendars(user_email: str, db: Session = Depends(get_db)):
     """Get user's calendars"""
     try:
-        service = get_calendar_service(user_email, db)
-        calendars = service.calendarList().list().execute()
+        client = await AsyncGoogleClient.for_user(user_email, db)
+        calendars = await client.list_calendars()
         
         return {
             "calendars": [
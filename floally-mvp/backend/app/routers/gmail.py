@@ -3,7 +3,8 @@ from sqlalchemy.orm import Session
 import base64
 
 from app.database import get_db
-from app.utils.google_auth import get_gmail_service
+from app.services.google_api_client import AsyncGoogleClient
+from app.services.gmail_sync import GmailSyncEngine
 
 router = APIRouter()
 
@@ -22,7 +23,7 @@ async def list_messages(
         category: Filter by category - 'primary', 'all', 'starred', 'important' (default: 'primary')
     """
     try:
-        service = get_gmail_service(user_email, db)
+        client = await AsyncGoogleClient.for_user(user_email, db)
         
         # Build query based on category filter
         # Leverage Gmail's native categorization system
@@ -39,23 +40,14 @@ async def list_messages(
         
         query = query_map.get(category.lower(), 'category:primary')
         
-        results = service.users().messages().list(
-            userId='me',
-            maxResults=max_results,
-            q=query  # Use Gmail's native query system
-        ).execute()
+        # Label-based queries are served from the synced local store;
+        # anything else is listed and hydrated live
+        messages = await GmailSyncEngine(db).get_messages(
+            client, user_email, query, max_results=max_results, profile='metadata'
+        )
         
-        messages = results.get('messages', [])
-        
-        # Fetch full message details
         detailed_messages = []
-        for msg in messages[:max_results]:
-            message = service.users().messages().get(
-                userId='me',
-                id=msg['id'],
-                format='full'
-            ).execute()
-            
+        for message in messages:
             # Extract relevant fields
             headers = {h['name']: h['value'] for h in message['payload']['headers']}
             label_ids = message.get('labelIds', [])
@@ -123,8 +115,8 @@ async def list_messages(
 async def get_profile(user_email: str, db: Session = Depends(get_db)):
     """Get user's Gmail profile"""
     try:
-        service = get_gmail_service(user_email, db)
-        profile = service.users().getProfile(userId='me').execute()
+        client = await AsyncGoogleClient.for_user(user_email, db)
+        profile = await client.get_profile()
         return {
             "email": profile.get('emailAddress'),
             "messagesTotal": profile.get('messagesTotal'),
@@ -137,14 +129,8 @@ async def get_profile(user_email: str, db: Session = Depends(get_db)):
 async def mark_important(email_id: str, user_email: str, db: Session = Depends(get_db)):
     """Mark email as important (add IMPORTANT and STARRED labels)"""
     try:
-        service = get_gmail_service(user_email, db)
-        service.users().messages().modify(
-            userId='me',
-            id=email_id,
-            body={
-                'addLabelIds': ['IMPORTANT', 'STARRED']
-            }
-        ).execute()
+        client = await AsyncGoogleClient.for_user(user_email, db)
+        await client.modify_message(email_id, add_label_ids=['IMPORTANT', 'STARRED'])
         
         return {
             "success": True,
@@ -158,16 +144,10 @@ async def mark_important(email_id: str, user_email: str, db: Session = Depends(g
 async def mark_unimportant(email_id: str, user_email: str, db: Session = Depends(get_db)):
     """Mark email as unimportant (remove IMPORTANT label, add custom NOT_INTERESTED label)"""
     try:
-        service = get_gmail_service(user_email, db)
+        client = await AsyncGoogleClient.for_user(user_email, db)
         
         # Remove IMPORTANT label if present
-        service.users().messages().modify(
-            userId='me',
-            id=email_id,
-            body={
-                'removeLabelIds': ['IMPORTANT']
-            }
-        ).execute()
+        await client.modify_message(email_id, remove_label_ids=['IMPORTANT'])
         
         return {
             "success": True,
@@ -181,14 +161,8 @@ async def mark_unimportant(email_id: str, user_email: str, db: Session = Depends
 async def archive_email(email_id: str, user_email: str, db: Session = Depends(get_db)):
     """Archive email (remove INBOX label)"""
     try:
-        service = get_gmail_service(user_email, db)
-        service.users().messages().modify(
-            userId='me',
-            id=email_id,
-            body={
-                'removeLabelIds': ['INBOX']
-            }
-        ).execute()
+        client = await AsyncGoogleClient.for_user(user_email, db)
+        await client.modify_message(email_id, remove_label_ids=['INBOX'])
         
         return {
             "success": True,
@@ -202,11 +176,8 @@ async def archive_email(email_id: str, user_email: str, db: Session = Depends(ge
 async def trash_email(email_id: str, user_email: str, db: Session = Depends(get_db)):
     """Move email to trash"""
     try:
-        service = get_gmail_service(user_email, db)
-        service.users().messages().trash(
-            userId='me',
-            id=email_id
-        ).execute()
+        client = await AsyncGoogleClient.for_user(user_email, db)
+        await client.trash_message(email_id)
         
         return {
             "success": True,
@@ -220,12 +191,8 @@ async def trash_email(email_id: str, user_email: str, db: Session = Depends(get_
 async def get_unsubscribe_link(email_id: str, user_email: str, db: Session = Depends(get_db)):
     """Extract unsubscribe link from email headers"""
     try:
-        service = get_gmail_service(user_email, db)
-        message = service.users().messages().get(
-            userId='me',
-            id=email_id,
-            format='full'
-        ).execute()
+        client = await AsyncGoogleClient.for_user(user_email, db)
+        message = await client.get_message(email_id, format='full')
         
         headers = {h['name']: h['value'] for h in message['payload']['headers']}
         
@@ -4,37 +4,49 @@ Smart Messages API - AI-powered message curation and management
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func, desc
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
-from pydantic import BaseModel
-import anthropic
+from pydantic import BaseModel, Field
 import os
 import base64
 import traceback
 
 from app.database import get_db
 from app.models.user import User, BehaviorAction, SenderStats
-from app.utils.google_auth import get_gmail_service
+from app.utils.sse import sse_event, sse_response
+from app.services.google_api_client import AsyncGoogleClient
 from app.services.contextual_scoring import ContextualScorer
+from app.services.scoring_kernel import composite_blend
+from app.services.scoring_cascade import CascadeThresholds, get_scoring_cascade, stage_counts
+from app.services.llm_router import get_llm_router, TaskType
+from app.services.llm_structured import parse_items
+from app.services.message_analysis_cache import (
+    MessageAnalysisStore,
+    message_fingerprint,
+    merge_analyses,
+    strip_index
+)
 from app.services.gmail_intelligence import (
     GmailIntelligenceExtractor,
     format_gmail_signals_for_context
 )
-from app.services.filter_intelligence import UserFilterIntelligence
+from app.services.filter_intelligence import UserFilterIntelligence, FilterMatcher
+from app.services.gmail_sync import GmailSyncEngine
 from app.services.decision_transparency import (
-    DecisionTransparencyService,
+    DecisionBuffer,
     DecisionType
 )
 
 router = APIRouter()
 
-# Initialize Anthropic client with validation
-anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
-if not anthropic_api_key:
-    print("⚠️ WARNING: ANTHROPIC_API_KEY not set - draft generation will fail")
-    anthropic_client = None
-else:
-    anthropic_client = anthropic.Anthropic(api_key=anthropic_api_key)
+
+class MessageAnalysis(BaseModel):
+    """One element of the inbox analysis prompt's "analyses" array"""
+    index: int
+    importance_score: int = Field(ge=0, le=100)
+    reason: str = ""
+    suggested_action: str = "read_later"
+    confidence: float = Field(default=0.7, ge=0.0, le=1.0)
 
 
 class DraftResponseRequest(BaseModel):
@@ -47,19 +59,68 @@ class DraftResponseRequest(BaseModel):
 def calculate_sender_importance(user_id: str, sender_email: str, sender_domain: str, db: Session) -> float:
     """DEPRECATED: Use ContextualScorer for new code. Kept for backward compatibility."""
     scorer = ContextualScorer(db)
-    result = scorer.calculate_contextual_importance(
-        user_id=user_id,
-        sender_email=sender_email,
-        sender_name=None,
-        subject="",
-        snippet="",
-        gmail_signals={}
-    )
+    result = scorer.score_batch(user_id, [{"sender_email": sender_email}])[0]
     return result["importance_score"] / 100.0  # Convert to 0-1 range
 
 
-async def ai_analyze_messages(messages: List[Dict], user_context: Dict) -> List[Dict]:
-    """Use Claude to analyze and score message importance/relevance"""
+# Contextual scoring actions -> the curated inbox's read_now | read_later | archive | unsubscribe
+CURATED_ACTIONS = {
+    'reply_now': 'read_now',
+    'review_today': 'read_now',
+    'read': 'read_now',
+    'user_decides': 'read_later',
+    'archive_if_not_urgent': 'archive',
+    'auto_archive': 'archive',
+}
+
+
+def curated_action(action: Optional[str]) -> str:
+    """Map any scoring stage's suggested action onto the curated inbox's set"""
+    if action in ('read_now', 'read_later', 'archive', 'unsubscribe'):
+        return action
+    return CURATED_ACTIONS.get(action, 'read_later')
+
+
+def parse_sender(from_header: str) -> Tuple[str, str]:
+    """Split a From header into (sender_email, sender_domain)"""
+    sender_email = ''
+    sender_domain = ''
+    
+    if '<' in from_header and '>' in from_header:
+        sender_email = from_header.split('<')[1].split('>')[0]
+    elif '@' in from_header:
+        sender_email = from_header.split()[0] if ' ' in from_header else from_header
+    
+    if '@' in sender_email:
+        sender_domain = sender_email.split('@')[1]
+    
+    return sender_email, sender_domain
+
+
+def _header_value(message: Dict, name: str, default: str = '') -> str:
+    for header in message.get('payload', {}).get('headers', []):
+        if header.get('name') == name:
+            return header.get('value', default)
+    return default
+
+
+async def ai_analyze_messages(
+    messages: List[Dict],
+    user_context: Dict,
+    user_email: Optional[str] = None,
+    db: Optional[Session] = None,
+    task_type: TaskType = "light",
+    prefer_provider: Optional[str] = "anthropic"
+) -> List[Dict]:
+    """
+    Use Claude to analyze and score message importance/relevance
+    
+    With user_email and db, analyses are memoized per message: only messages
+    without a valid cached analysis are sent to the model, and cached results
+    are merged back in by index.
+    
+    The scoring cascade runs this as its cheap stage with task_type="fast".
+    """
     
     if not messages:
         return []
@@ -78,6 +139,40 @@ async def ai_analyze_messages(messages: List[Dict], user_context: Dict) -> List[
             'has_unsubscribe': msg.get('hasUnsubscribeLink', False)
         })
     
+    # Reuse analyses from earlier refreshes
+    analysis_store = None
+    fingerprints = {}
+    cached = {}
+    if user_email and db is not None:
+        try:
+            analysis_store = MessageAnalysisStore(db, user_email, user_context, task_type)
+            fingerprints = {
+                msg['id']: message_fingerprint(summary)
+                for msg, summary in zip(messages, message_summaries)
+                if msg.get('id')
+            }
+            hits = analysis_store.lookup(fingerprints)
+            cached = {
+                summary['index']: hits[msg['id']]
+                for msg, summary in zip(messages, message_summaries)
+                if msg.get('id') in hits
+            }
+        except Exception as e:
+            print(f"⚠️ Analysis cache unavailable: {e}")
+            db.rollback()
+            analysis_store = None
+            cached = {}
+    
+    pending = [summary for summary in message_summaries if summary['index'] not in cached]
+    if not pending:
+        print(f"♻️ All {len(cached)} message analyses served from cache")
+        return merge_analyses(cached, [])
+    if cached:
+        print(f"♻️ {len(cached)} message analyses cached, analyzing {len(pending)} new")
+    
+    # Number the batch 0..n-1 for the prompt and map results back afterwards
+    batch = [{**summary, 'index': i} for i, summary in enumerate(pending)]
+    
     prompt = f"""You are Aimi, the user's AI teammate helping them prioritize their inbox. Analyze these messages and score their importance/relevance.
 
 User Context:
@@ -86,17 +181,18 @@ User Context:
 - Active Projects: {', '.join(user_context.get('projects', ['General Work']))}
 
 Messages to analyze:
-{message_summaries}
+{batch}
 
 For each message, provide:
 1. importance_score (0-100): How important/relevant is this message?
 2. reason (brief): Why this score?
 3. suggested_action: one of [read_now, read_later, archive, unsubscribe]
+4. confidence (0-1): How sure you are of the score
 
 Respond in JSON format:
 {{
   "analyses": [
-    {{"index": 0, "importance_score": 85, "reason": "Direct request from colleague", "suggested_action": "read_now"}},
+    {{"index": 0, "importance_score": 85, "reason": "Direct request from colleague", "suggested_action": "read_now", "confidence": 0.9}},
     ...
   ]
 }}
@@ -110,32 +206,38 @@ Consider:
 """
 
     try:
-        response = anthropic_client.messages.create(
-            model="claude-3-haiku-20240307",
-            max_tokens=4000,
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }]
+        completion = await get_llm_router().complete(
+            prompt=prompt,
+            task_type=task_type,
+            prefer_provider=prefer_provider,
+            max_tokens=min(4000, 300 + 90 * len(pending)),
+            hedge=True,  # Curated inbox load waits on this call
+            user_id=user_email,
+            batch=True  # Small refreshes share a call with other users' refreshes
         )
         
-        # Extract JSON from response
-        import json
-        content = response.content[0].text
-        
-        # Find JSON in response
-        start_idx = content.find('{')
-        end_idx = content.rfind('}') + 1
-        if start_idx != -1 and end_idx > start_idx:
-            json_str = content[start_idx:end_idx]
-            analyses = json.loads(json_str)
-            return analyses.get('analyses', [])
-        
-        return []
+        # Keep every valid analysis, even if others are malformed or cut off
+        fresh = []
+        for analysis in parse_items(completion["text"], MessageAnalysis, key="analyses"):
+            if 0 <= analysis.index < len(pending):
+                fresh.append({**analysis.model_dump(), 'index': pending[analysis.index]['index']})
+        
+        if analysis_store is not None and fresh:
+            try:
+                analysis_store.save(
+                    (messages[a['index']]['id'], fingerprints[messages[a['index']]['id']], strip_index(a))
+                    for a in fresh
+                    if messages[a['index']].get('id') in fingerprints
+                )
+            except Exception as e:
+                print(f"⚠️ Could not cache message analyses: {e}")
+                db.rollback()
+        
+        return merge_analyses(cached, fresh)
         
     except Exception as e:
         print(f"❌ AI analysis error: {e}")
-        return []
+        return merge_analyses(cached, [])
 
 
 @router.get("/messages/curated")
@@ -154,6 +256,9 @@ async def get_curated_messages(
     3. Uses AI to score importance/relevance
     4. Returns prioritized list with actionable insights
     """
+    # Per-message transparency decisions are written in one batch at request end
+    decision_buffer = DecisionBuffer(db)
+    
     try:
         # Get user and their context
         user = db.query(User).filter(User.email == user_email).first()
@@ -168,11 +273,18 @@ async def get_curated_messages(
         }
         
         # Fetch messages from Gmail
-        service = get_gmail_service(user_email, db)
+        google_client = await AsyncGoogleClient.for_user(user_email, db)
         
         # Get messages from multiple categories if no specific category
         categories_to_fetch = [category] if category else ['primary', 'social', 'promotions', 'updates']
         all_messages = []
+        inbox_messages = []
+        
+        # Served from the local message store (only mailbox changes hit Gmail).
+        # One message per thread across all categories, decided before any
+        # hydration, scoring or decision recording happens
+        sync_engine = GmailSyncEngine(db)
+        seen_threads = set()
         
         for cat in categories_to_fetch:
             query_map = {
@@ -187,223 +299,254 @@ async def get_curated_messages(
             
             query = query_map.get(cat, 'category:primary')
             
-            results = service.users().messages().list(
-                userId='me',
-                maxResults=15 if not category else max_results,
-                q=query
-            ).execute()
-            
-            messages = results.get('messages', [])
-            
-            # Fetch full details
-            for msg in messages:
-                try:
-                    message = service.users().messages().get(
-                        userId='me',
-                        id=msg['id'],
-                        format='full'
-                    ).execute()
+            inbox_messages.extend(await sync_engine.get_messages(
+                google_client,
+                user_email,
+                query,
+                max_results=15 if not category else max_results,
+                seen_threads=seen_threads,
+                profile='metadata'  # Headers, labels and snippet only
+            ))
+        
+        # Resolve the user's filter rules once per request (not per message)
+        filter_intel = await UserFilterIntelligence(db).get_filter_intelligence_async(google_client, user.email)
+        filter_matcher = FilterMatcher(filter_intel)
+        
+        # Load sender stats, trust rows and profile for the whole inbox in bulk
+        scorer = ContextualScorer(db)
+        scorer.preload(str(user.id), [
+            parse_sender(_header_value(message, 'From'))[0] for message in inbox_messages
+        ])
+        
+        for message in inbox_messages:
+            try:
+                headers = {h['name']: h['value'] for h in message['payload']['headers']}
+                label_ids = message.get('labelIds', [])
+                
+                # Extract sender info
+                from_header = headers.get('From', 'Unknown')
+                sender_email, sender_domain = parse_sender(from_header)
+                
+                # Extract Gmail's built-in intelligence (Phase 1: Free AI signals!)
+                gmail_extractor = GmailIntelligenceExtractor()
+                gmail_signals = gmail_extractor.analyze_message(message)
+                
+                # Phase 2: Check user's explicit filter rules
+                filter_check = filter_matcher.check(sender_email, sender_domain)
+                
+                # If user has EXPLICIT filter rule, respect it immediately
+                if filter_check.get('skip_llm') and filter_check.get('explicit_priority'):
+                    baseline_score = filter_check['importance_score']
+                    score_result = {
+                        'importance_score': int(baseline_score * 100),
+                        'reasoning': filter_check['reasoning'],
+                        'sender_relationship': filter_check['explicit_priority'],
+                        'confidence': 1.0,  # User's explicit rule = 100% confidence
+                        'suggested_action': 'archive' if filter_check['explicit_priority'] == 'low' else 'read'
+                    }
+                    print(f"🎯 User filter rule matched: {filter_check['reasoning']}")
+                    print(f"💰 Saved LLM cost: Using explicit user preference (score: {baseline_score:.2f})")
                     
-                    headers = {h['name']: h['value'] for h in message['payload']['headers']}
-                    label_ids = message.get('labelIds', [])
+                    # Record decision for transparency (only if database configured)
+                    if os.getenv('DATABASE_URL'):
+                        try:
+                            decision_buffer.record_decision(
+                                user_email=user.email,
+                                message_id=message['id'],
+                                decision_type=DecisionType.IMPORTANCE_SCORING,
+                                decision_data={'importance_score': score_result['importance_score']},
+                                reasoning=score_result['reasoning'],
+                                confidence=score_result['confidence'],
+                                context_snapshot={'source': 'user_filter', 'filter_check': filter_check}
+                            )
+                        except Exception as decision_error:
+                            print(f"⚠️ Failed to record decision: {decision_error}")
+                else:
+                    # Legacy category extraction (for backward compatibility)
+                    is_primary = 'INBOX' in label_ids and not any(label.startswith('CATEGORY_') for label in label_ids if label != 'CATEGORY_PERSONAL')
+                    is_promotional = 'CATEGORY_PROMOTIONS' in label_ids
+                    is_social = 'CATEGORY_SOCIAL' in label_ids
+                    is_updates = 'CATEGORY_UPDATES' in label_ids
+                    is_forums = 'CATEGORY_FORUMS' in label_ids
+                    is_important = 'IMPORTANT' in label_ids
+                    is_starred = 'STARRED' in label_ids
+                    has_unsubscribe = 'List-Unsubscribe' in headers
                     
-                    # Extract sender info
-                    from_header = headers.get('From', 'Unknown')
-                    sender_email = ''
-                    sender_domain = ''
+                    subject = headers.get('Subject', 'No Subject')
+                    snippet = message.get('snippet', '')
+                    cat = gmail_signals.get('gmail_category') or ('promotional' if is_promotional else 'social' if is_social else 'updates' if is_updates else 'forums' if is_forums else 'primary')
                     
-                    if '<' in from_header and '>' in from_header:
-                        sender_email = from_header.split('<')[1].split('>')[0]
-                    elif '@' in from_header:
-                        sender_email = from_header.split()[0] if ' ' in from_header else from_header
+                    # Check if Gmail signals are strong enough to skip expensive LLM analysis
+                    skip_llm = gmail_extractor.should_skip_llm_analysis(gmail_signals)
                     
-                    if '@' in sender_email:
-                        sender_domain = sender_email.split('@')[1]
-                    
-                    # Extract Gmail's built-in intelligence (Phase 1: Free AI signals!)
-                    gmail_extractor = GmailIntelligenceExtractor()
-                    gmail_signals = gmail_extractor.analyze_message(message)
-                    
-                    # Phase 2: Check user's explicit filter rules
-                    filter_intel_service = UserFilterIntelligence(db)
-                    filter_intel = filter_intel_service.get_filter_intelligence(service, user.email)
-                    filter_check = filter_intel_service.check_sender_priority(
-                        filter_intel, sender_email, sender_domain
-                    )
-                    
-                    # If user has EXPLICIT filter rule, respect it immediately
-                    if filter_check.get('skip_llm') and filter_check.get('explicit_priority'):
-                        baseline_score = filter_check['importance_score']
+                    if skip_llm:
+                        # Use fast Gmail-only scoring (no LLM cost!)
+                        baseline_score = gmail_extractor.get_baseline_importance_score(gmail_signals)
                         score_result = {
                             'importance_score': int(baseline_score * 100),
-                            'reasoning': filter_check['reasoning'],
-                            'sender_relationship': filter_check['explicit_priority'],
-                            'confidence': 1.0,  # User's explicit rule = 100% confidence
-                            'suggested_action': 'archive' if filter_check['explicit_priority'] == 'low' else 'read'
+                            'reasoning': f"Gmail intelligence: {cat}, confidence: {gmail_signals['confidence']:.0%}",
+                            'sender_relationship': gmail_signals['sender_reputation'],
+                            'confidence': gmail_signals['confidence'],
+                            'suggested_action': 'archive' if gmail_signals['is_spam'] else 'read_later'
                         }
-                        print(f"🎯 User filter rule matched: {filter_check['reasoning']}")
-                        print(f"💰 Saved LLM cost: Using explicit user preference (score: {baseline_score:.2f})")
+                        print(f"💰 Saved LLM cost: Using Gmail signals only (score: {baseline_score:.2f})")
                         
                         # Record decision for transparency (only if database configured)
                         if os.getenv('DATABASE_URL'):
                             try:
-                                decision_service = DecisionTransparencyService(db)
-                                decision_service.record_decision(
+                                decision_buffer.record_decision(
                                     user_email=user.email,
                                     message_id=message['id'],
                                     decision_type=DecisionType.IMPORTANCE_SCORING,
                                     decision_data={'importance_score': score_result['importance_score']},
                                     reasoning=score_result['reasoning'],
                                     confidence=score_result['confidence'],
-                                    context_snapshot={'source': 'user_filter', 'filter_check': filter_check}
+                                    context_snapshot={'source': 'gmail_intelligence', 'signals': gmail_signals}
                                 )
                             except Exception as decision_error:
                                 print(f"⚠️ Failed to record decision: {decision_error}")
                     else:
-                        # Legacy category extraction (for backward compatibility)
-                        is_primary = 'INBOX' in label_ids and not any(label.startswith('CATEGORY_') for label in label_ids if label != 'CATEGORY_PERSONAL')
-                        is_promotional = 'CATEGORY_PROMOTIONS' in label_ids
-                        is_social = 'CATEGORY_SOCIAL' in label_ids
-                        is_updates = 'CATEGORY_UPDATES' in label_ids
-                        is_forums = 'CATEGORY_FORUMS' in label_ids
-                        is_important = 'IMPORTANT' in label_ids
-                        is_starred = 'STARRED' in label_ids
-                        has_unsubscribe = 'List-Unsubscribe' in headers
-                        
-                        subject = headers.get('Subject', 'No Subject')
-                        snippet = message.get('snippet', '')
-                        cat = gmail_signals.get('gmail_category') or ('promotional' if is_promotional else 'social' if is_social else 'updates' if is_updates else 'forums' if is_forums else 'primary')
-                        
-                        # Check if Gmail signals are strong enough to skip expensive LLM analysis
-                        skip_llm = gmail_extractor.should_skip_llm_analysis(gmail_signals)
-                        
-                        if skip_llm:
-                            # Use fast Gmail-only scoring (no LLM cost!)
-                            baseline_score = gmail_extractor.get_baseline_importance_score(gmail_signals)
-                            score_result = {
-                                'importance_score': int(baseline_score * 100),
-                                'reasoning': f"Gmail intelligence: {cat}, confidence: {gmail_signals['confidence']:.0%}",
-                                'sender_relationship': gmail_signals['sender_reputation'],
-                                'confidence': gmail_signals['confidence'],
-                                'suggested_action': 'archive' if gmail_signals['is_spam'] else 'read_later'
-                            }
-                            print(f"💰 Saved LLM cost: Using Gmail signals only (score: {baseline_score:.2f})")
-                            
-                            # Record decision for transparency (only if database configured)
-                            if os.getenv('DATABASE_URL'):
-                                try:
-                                    decision_service = DecisionTransparencyService(db)
-                                    decision_service.record_decision(
-                                        user_email=user.email,
-                                        message_id=message['id'],
-                                        decision_type=DecisionType.IMPORTANCE_SCORING,
-                                        decision_data={'importance_score': score_result['importance_score']},
-                                        reasoning=score_result['reasoning'],
-                                        confidence=score_result['confidence'],
-                                        context_snapshot={'source': 'gmail_intelligence', 'signals': gmail_signals}
-                                    )
-                                except Exception as decision_error:
-                                    print(f"⚠️ Failed to record decision: {decision_error}")
-                        else:
-                            # Use contextual scoring with LLM for nuanced cases
-                            scorer = ContextualScorer(db)
-                            legacy_signals = {
-                                'is_starred': is_starred,
-                                'is_important': is_important,
-                                'category': cat,
-                                'has_unsubscribe_link': has_unsubscribe
-                            }
-                            
-                            score_result = scorer.calculate_contextual_importance(
-                            user_id=str(user.id),
-                            sender_email=sender_email,
-                            sender_name=from_header,
-                            subject=subject,
-                            snippet=snippet,
-                            gmail_signals=legacy_signals
-                        )
-                        print(f"🤖 Using LLM analysis for nuanced scoring")
+                        # Use contextual scoring with LLM for nuanced cases
+                        legacy_signals = {
+                            'is_starred': is_starred,
+                            'is_important': is_important,
+                            'category': cat,
+                            'has_unsubscribe_link': has_unsubscribe
+                        }
                         
-                        # Record decision for transparency (only if database configured)
-                        if os.getenv('DATABASE_URL'):
-                            try:
-                                decision_service = DecisionTransparencyService(db)
-                                decision_service.record_decision(
-                                    user_email=user.email,
-                                    message_id=message['id'],
-                                    decision_type=DecisionType.IMPORTANCE_SCORING,
-                                    decision_data={'importance_score': score_result['importance_score']},
-                                    reasoning=score_result['reasoning'],
-                                    confidence=score_result.get('confidence', 0.7),
-                                    context_snapshot={'source': 'llm_contextual', 'subject': subject[:100]},
-                                    ai_model='claude-sonnet-4'
-                                )
-                            except Exception as decision_error:
-                                print(f"⚠️ Failed to record decision: {decision_error}")
+                        score_result = scorer.calculate_contextual_importance(
+                        user_id=str(user.id),
+                        sender_email=sender_email,
+                        sender_name=from_header,
+                        subject=subject,
+                        snippet=snippet,
+                        gmail_signals=legacy_signals
+                    )
+                    print(f"🤖 Using LLM analysis for nuanced scoring")
                     
-                    all_messages.append({
-                        'id': message['id'],
-                        'threadId': message['threadId'],
-                        'from': from_header,
-                        'senderEmail': sender_email,
-                        'senderDomain': sender_domain,
-                        'subject': subject,
-                        'date': headers.get('Date', ''),
-                        'snippet': snippet,
-                        'unread': 'UNREAD' in label_ids,
-                        'isPrimary': is_primary,
-                        'isPromotional': is_promotional,
-                        'isSocial': is_social,
-                        'isUpdates': is_updates,
-                        'isForums': is_forums,
-                        'isImportant': is_important,
-                        'isStarred': is_starred,
-                        'hasUnsubscribeLink': has_unsubscribe,
-                        'senderImportanceScore': score_result['importance_score'] / 100.0,
-                        'importanceReasoning': score_result['reasoning'],
-                        'senderRelationship': score_result['sender_relationship'],
-                        'confidence': score_result['confidence'],
-                        'suggestedAction': score_result['suggested_action'],
-                        'category': cat,
-                        'labels': label_ids
-                    })
-                except Exception as msg_error:
-                    print(f"⚠️ Error fetching message {msg['id']}: {msg_error}")
-                    continue
-        
-        # Remove duplicates (same threadId)
-        seen_threads = set()
-        unique_messages = []
-        for msg in all_messages:
-            if msg['threadId'] not in seen_threads:
-                seen_threads.add(msg['threadId'])
-                unique_messages.append(msg)
-        
-        # Get AI analysis
-        ai_analyses = await ai_analyze_messages(unique_messages, user_context)
-        
-        # Merge AI analysis with messages
-        for analysis in ai_analyses:
-            idx = analysis.get('index')
-            if idx < len(unique_messages):
-                unique_messages[idx]['aiImportanceScore'] = analysis.get('importance_score', 50)
-                unique_messages[idx]['aiReason'] = analysis.get('reason', '')
-                unique_messages[idx]['suggestedAction'] = analysis.get('suggested_action', 'read_later')
-        
-        # Calculate composite score and sort
-        for msg in unique_messages:
-            ai_score = msg.get('aiImportanceScore', 50) / 100.0
-            sender_score = msg.get('senderImportanceScore', 0.5)
-            gmail_boost = 0.2 if msg.get('isImportant') or msg.get('isStarred') else 0
-            primary_boost = 0.1 if msg.get('isPrimary') else 0
-            
-            # Weighted composite score
-            msg['compositeScore'] = (
-                ai_score * 0.5 +           # AI analysis: 50%
-                sender_score * 0.3 +        # Sender history: 30%
-                gmail_boost +                # Gmail markers: 20%
-                primary_boost                # Category boost: 10%
+                    # Record decision for transparency (only if database configured)
+                    if os.getenv('DATABASE_URL'):
+                        try:
+                            decision_buffer.record_decision(
+                                user_email=user.email,
+                                message_id=message['id'],
+                                decision_type=DecisionType.IMPORTANCE_SCORING,
+                                decision_data={'importance_score': score_result['importance_score']},
+                                reasoning=score_result['reasoning'],
+                                confidence=score_result.get('confidence', 0.7),
+                                context_snapshot={'source': 'llm_contextual', 'subject': subject[:100]},
+                                ai_model='claude-sonnet-4'
+                            )
+                        except Exception as decision_error:
+                            print(f"⚠️ Failed to record decision: {decision_error}")
+                
+                all_messages.append({
+                    'id': message['id'],
+                    'threadId': message['threadId'],
+                    'from': from_header,
+                    'senderEmail': sender_email,
+                    'senderDomain': sender_domain,
+                    'subject': subject,
+                    'date': headers.get('Date', ''),
+                    'snippet': snippet,
+                    'unread': 'UNREAD' in label_ids,
+                    'isPrimary': is_primary,
+                    'isPromotional': is_promotional,
+                    'isSocial': is_social,
+                    'isUpdates': is_updates,
+                    'isForums': is_forums,
+                    'isImportant': is_important,
+                    'isStarred': is_starred,
+                    'hasUnsubscribeLink': has_unsubscribe,
+                    'senderImportanceScore': score_result['importance_score'] / 100.0,
+                    'importanceReasoning': score_result['reasoning'],
+                    'senderRelationship': score_result['sender_relationship'],
+                    'confidence': score_result['confidence'],
+                    'suggestedAction': score_result['suggested_action'],
+                    'category': cat,
+                    'labels': label_ids
+                })
+            except Exception as msg_error:
+                print(f"⚠️ Error processing message {message.get('id')}: {msg_error}")
+                continue
+        
+        # Threads were already deduplicated when listing
+        unique_messages = all_messages
+        
+        # Model cascade: the rule-based score stands unless its confidence is
+        # below the user's threshold; then the fast model, then (still
+        # ambiguous) the reasoning model
+        async def fast_stage(indices, results):
+            analyses = await ai_analyze_messages(
+                [unique_messages[i] for i in indices],
+                user_context,
+                user_email=user_email,
+                db=db,
+                task_type="fast",
+                prefer_provider=None
+            )
+            return {
+                indices[a['index']]: a for a in analyses
+                if 0 <= a.get('index', -1) < len(indices) and 'importance_score' in a
+            }
+        
+        async def reasoning_stage(indices, results):
+            scores = await scorer.deep_contextual_analysis(
+                str(user.id),
+                [{
+                    'from': unique_messages[i]['from'],
+                    'subject': unique_messages[i]['subject'],
+                    'snippet': unique_messages[i]['snippet'],
+                    'sender_relationship': unique_messages[i]['senderRelationship'],
+                    'importance_score': results[i]['importance_score'],
+                    'confidence': results[i]['confidence']
+                } for i in indices],
+                preselected=True
             )
+            return {
+                indices[score['index']]: {
+                    'importance_score': score['adjusted_score'],
+                    'confidence': score['confidence'],
+                    'reason': score['reasoning'],
+                    'suggested_action': curated_action(score['suggested_action'])
+                }
+                for score in scores if 0 <= score['index'] < len(indices)
+            }
+        
+        cascade_results = await get_scoring_cascade().run(
+            [{
+                'importance_score': round(msg['senderImportanceScore'] * 100),
+                'confidence': msg['confidence'],
+                'reason': msg['importanceReasoning'],
+                'suggested_action': curated_action(msg['suggestedAction'])
+            } for msg in unique_messages],
+            CascadeThresholds.for_user(user.settings.ai_preferences if user.settings else None),
+            fast=fast_stage,
+            reasoning=reasoning_stage
+        )
+        for msg, result in zip(unique_messages, cascade_results):
+            msg['aiImportanceScore'] = result['importance_score']
+            msg['aiReason'] = result['reason']
+            msg['suggestedAction'] = result['suggested_action']
+            msg['scoringStage'] = result['stage']
+            msg['scoringConfidence'] = result['confidence']
+        scoring_stages = stage_counts(cascade_results)
+        print(f"🪜 Scoring cascade: {scoring_stages['rules']} rules, {scoring_stages['fast']} fast, {scoring_stages['reasoning']} reasoning")
+        
+        # Calculate composite score (AI 50%, sender 30%, Gmail markers, primary boost) and sort.
+        # A rules-settled score already is the sender term, so those messages
+        # get a neutral AI term (50) instead of counting the same number twice
+        composite_scores = composite_blend(
+            [
+                50 if msg.get('scoringStage') == 'rules' else msg.get('aiImportanceScore', 50)
+                for msg in unique_messages
+            ],
+            [msg.get('senderImportanceScore', 0.5) for msg in unique_messages],
+            [bool(msg.get('isImportant') or msg.get('isStarred')) for msg in unique_messages],
+            [bool(msg.get('isPrimary')) for msg in unique_messages]
+        )
+        for msg, composite_score in zip(unique_messages, composite_scores):
+            msg['compositeScore'] = float(composite_score)
         
         # Sort by composite score
         unique_messages.sort(key=lambda x: x.get('compositeScore', 0), reverse=True)
@@ -413,12 +556,17 @@ async def get_curated_messages(
             "messages": unique_messages[:max_results],
             "total": len(unique_messages),
             "categories_analyzed": categories_to_fetch,
-            "ai_analysis_enabled": len(ai_analyses) > 0
+            "ai_analysis_enabled": scoring_stages['fast'] + scoring_stages['reasoning'] > 0,
+            "scoring_stages": scoring_stages,
+            "duplicate_threads_skipped": sync_engine.duplicate_threads_skipped
         }
         
     except Exception as e:
         print(f"❌ Error in curated messages: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    
+    finally:
+        decision_buffer.flush()
 
 
 @router.post("/messages/feedback")
@@ -528,13 +676,9 @@ async def get_full_message(
 ):
     """Get full message content for preview/reply"""
     try:
-        service = get_gmail_service(user_email, db)
+        google_client = await AsyncGoogleClient.for_user(user_email, db)
         
-        message = service.users().messages().get(
-            userId='me',
-            id=message_id,
-            format='full'
-        ).execute()
+        message = await google_client.get_message(message_id, format='full')
         
         headers = {h['name']: h['value'] for h in message['payload']['headers']}
         
@@ -573,174 +717,162 @@ async def get_full_message(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/messages/draft-response")
-async def draft_email_response(
-    request: DraftResponseRequest,
-    db: Session = Depends(get_db)
-):
+DRAFT_COMPLETION = {"task_type": "light", "prefer_provider": "anthropic", "max_tokens": 2000}
+
+
+async def _prepare_draft(request: DraftResponseRequest, db: Session) -> Dict:
     """
-    Generate AI-powered email response draft
+    Load the user and original message and build the draft prompt.
     
-    Uses user profile (communication style, tone, priorities) to craft personalized responses.
-    Learns from approved drafts to improve future suggestions.
-    
-    Signature styles:
-    - as_aimy: Clearly from Aimi on behalf of user (max transparency + promotion)
-    - ai_assisted: From user with subtle Hey Aimi attribution (default, balanced)
-    - no_attribution: Just from user, no mention of AI
+    Shared by the JSON and streaming draft endpoints; everything that needs
+    the DB happens here, before any response is sent.
     """
-    try:
-        print(f"🔍 Draft request - User: {request.user_email}, Message: {request.message_id}, Style: {request.signature_style}")
-        
-        # Check if Anthropic is configured
-        if not anthropic_client:
-            raise HTTPException(
-                status_code=500, 
-                detail="AI service not configured. Please contact support."
-            )
-        
-        # Get user with relationships eagerly loaded
-        user = db.query(User).options(
-            joinedload(User.profile),
-            joinedload(User.settings),
-            joinedload(User.projects)
-        ).filter(User.email == request.user_email).first()
-        
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        print(f"✅ User found: {user.email}")
-        
-        # Get full message
-        try:
-            service = get_gmail_service(request.user_email, db)
-            message = service.users().messages().get(
-                userId='me',
-                id=request.message_id,
-                format='full'
-            ).execute()
-            print(f"✅ Gmail message retrieved successfully")
-        except Exception as e:
-            print(f"❌ Failed to get Gmail message: {e}")
-            raise HTTPException(status_code=500, detail=f"Failed to retrieve email: {str(e)}")
-        
-        headers = {h['name']: h['value'] for h in message['payload']['headers']}
-        
-        # Check for attachments
-        from app.services.attachment_service import (
-            extract_attachments_from_message,
-            is_attachment_safe,
-            check_sender_trust
+    # Check if an LLM provider is configured
+    if not get_llm_router().is_configured():
+        raise HTTPException(
+            status_code=500, 
+            detail="AI service not configured. Please contact support."
         )
+    
+    # Get user with relationships eagerly loaded
+    user = db.query(User).options(
+        joinedload(User.profile),
+        joinedload(User.settings),
+        joinedload(User.projects)
+    ).filter(User.email == request.user_email).first()
+    
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    print(f"✅ User found: {user.email}")
+    
+    # Get full message
+    try:
+        google_client = await AsyncGoogleClient.for_user(request.user_email, db)
+        message = await google_client.get_message(request.message_id, format='full')
+        print(f"✅ Gmail message retrieved successfully")
+    except Exception as e:
+        print(f"❌ Failed to get Gmail message: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve email: {str(e)}")
+    
+    headers = {h['name']: h['value'] for h in message['payload']['headers']}
+    
+    # Check for attachments
+    from app.services.attachment_service import (
+        extract_attachments_from_message,
+        is_attachment_safe,
+        check_sender_trust
+    )
+    
+    attachments = extract_attachments_from_message(message)
+    attachment_context = ""
+    has_unprocessed_attachments = False
+    trust_level = None
+    sender_from = headers.get('From', '')
+    sender_email = ''
+    if '<' in sender_from:
+        sender_email = sender_from.split('<')[1].split('>')[0]
+    elif '@' in sender_from:
+        sender_email = sender_from.strip()
+    
+    if attachments:
+        print(f"📎 Found {len(attachments)} attachment(s)")
+        trust_info = check_sender_trust(db, user.email, sender_email)
+        trust_level = trust_info['trust_level']
+        should_process = trust_info['should_process']
+        
+        if trust_level == 'trusted':
+            print(f"✅ Sender is TRUSTED - auto-processing attachments")
+            # Auto-process attachments without prompting
+            attachment_names = [att['filename'] for att in attachments]
+            attachment_context = f"\n\nATTACHMENTS: {', '.join(attachment_names)} (auto-approved from trusted sender)"
+            # Note: Actual attachment processing will happen when user opens the message
+        elif trust_level == 'blocked':
+            print(f"🚫 Sender is BLOCKED - skipping attachments")
+            has_unprocessed_attachments = True
+            attachment_names = [att['filename'] for att in attachments]
+            attachment_context = f"\n\nNOTE: Email includes attachments ({', '.join(attachment_names)}) - sender is blocked, attachments will not be processed"
+        else:  # unknown
+            print(f"⚠️ Sender is UNKNOWN - requiring user consent for attachments")
+            has_unprocessed_attachments = True
+            attachment_names = [att['filename'] for att in attachments]
+            attachment_context = f"\n\nNOTE: Email includes attachments ({', '.join(attachment_names)}) - user consent required for processing"
+    
+    # Extract body
+    body = ""
+    try:
+        if 'parts' in message['payload']:
+            for part in message['payload']['parts']:
+                if part['mimeType'] == 'text/plain':
+                    if 'data' in part['body']:
+                        body = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
+                        print(f"✅ Extracted body from parts (length: {len(body)})")
+                        break
+        elif 'body' in message['payload'] and 'data' in message['payload']['body']:
+            body = base64.urlsafe_b64decode(message['payload']['body']['data']).decode('utf-8')
+            print(f"✅ Extracted body from payload (length: {len(body)})")
         
-        attachments = extract_attachments_from_message(message)
-        attachment_context = ""
-        has_unprocessed_attachments = False
-        sender_from = headers.get('From', '')
-        sender_email = ''
-        if '<' in sender_from:
-            sender_email = sender_from.split('<')[1].split('>')[0]
-        elif '@' in sender_from:
-            sender_email = sender_from.strip()
-        
-        if attachments:
-            print(f"📎 Found {len(attachments)} attachment(s)")
-            trust_info = check_sender_trust(db, user.email, sender_email)
-            trust_level = trust_info['trust_level']
-            should_process = trust_info['should_process']
-            
-            if trust_level == 'trusted':
-                print(f"✅ Sender is TRUSTED - auto-processing attachments")
-                # Auto-process attachments without prompting
-                attachment_names = [att['filename'] for att in attachments]
-                attachment_context = f"\n\nATTACHMENTS: {', '.join(attachment_names)} (auto-approved from trusted sender)"
-                # Note: Actual attachment processing will happen when user opens the message
-            elif trust_level == 'blocked':
-                print(f"🚫 Sender is BLOCKED - skipping attachments")
-                has_unprocessed_attachments = True
-                attachment_names = [att['filename'] for att in attachments]
-                attachment_context = f"\n\nNOTE: Email includes attachments ({', '.join(attachment_names)}) - sender is blocked, attachments will not be processed"
-            else:  # unknown
-                print(f"⚠️ Sender is UNKNOWN - requiring user consent for attachments")
-                has_unprocessed_attachments = True
-                attachment_names = [att['filename'] for att in attachments]
-                attachment_context = f"\n\nNOTE: Email includes attachments ({', '.join(attachment_names)}) - user consent required for processing"
-        
-        # Extract body
-        body = ""
-        try:
-            if 'parts' in message['payload']:
-                for part in message['payload']['parts']:
-                    if part['mimeType'] == 'text/plain':
-                        if 'data' in part['body']:
-                            body = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
-                            print(f"✅ Extracted body from parts (length: {len(body)})")
-                            break
-            elif 'body' in message['payload'] and 'data' in message['payload']['body']:
-                body = base64.urlsafe_b64decode(message['payload']['body']['data']).decode('utf-8')
-                print(f"✅ Extracted body from payload (length: {len(body)})")
-            
-            # Fallback to snippet if no body found
-            if not body and 'snippet' in message:
-                body = message['snippet']
-                print(f"⚠️ Using snippet as body (length: {len(body)})")
-        except Exception as e:
-            print(f"⚠️ Error extracting body: {e}, using snippet")
-            body = message.get('snippet', 'No content available')
-        
-        print(f"📧 Message body: {body[:200]}..." if len(body) > 200 else f"📧 Message body: {body}")
-        
-        print(f"👤 Building user context...")
-        # Build user context for AI - with safe attribute access
-        try:
-            active_projects = []
-            if hasattr(user, 'projects') and user.projects:
-                active_projects = [p.name for p in user.projects if hasattr(p, 'status') and p.status in ['active', 'planning']][:3]
-        except Exception as e:
-            print(f"Warning: Could not load active projects: {e}")
-            active_projects = []
-        
-        user_context = {
-            'name': user.display_name or user.email.split('@')[0],
-            'email': user.email,
-            'role': getattr(user.profile, 'role', 'Professional') if user.profile else 'Professional',
-            'communication_style': getattr(user.profile, 'communication_style', 'professional') if user.profile else 'professional',
-            'tone_preference': user.settings.ai_preferences.get('tone', 'warm_friendly') if (user.settings and hasattr(user.settings, 'ai_preferences') and user.settings.ai_preferences) else 'warm_friendly',
-            'priorities': getattr(user.profile, 'priorities', []) if (user.profile and hasattr(user.profile, 'priorities') and user.profile.priorities) else [],
-            'active_projects': active_projects
-        }
-        print(f"✅ User context built: {user_context['name']}, {user_context['role']}")
-        
-        # Craft AI prompt based on user preferences
-        tone_map = {
-            'warm_friendly': 'warm, friendly, and approachable',
-            'professional': 'professional and formal',
-            'casual': 'casual and conversational',
-            'concise': 'brief and to-the-point'
-        }
-        
-        tone_description = tone_map.get(user_context['tone_preference'], 'professional and friendly')
-        
-        # Check for previous approved drafts from this sender to learn style
-        sender_from = headers.get('From', '')
-        sender_email = ''
-        if '<' in sender_from:
-            sender_email = sender_from.split('<')[1].split('>')[0]
-        elif '@' in sender_from:
-            sender_email = sender_from.strip()
-        
-        # Get past approved responses for style reference (if any)
-        past_approvals = db.query(BehaviorAction).filter(
-            BehaviorAction.user_id == user.id,
-            BehaviorAction.action_type == 'draft_approved',
-            BehaviorAction.sender_email == sender_email
-        ).order_by(desc(BehaviorAction.created_at)).limit(2).all()
-        
-        style_learning = ""
-        if past_approvals:
-            style_learning = f"\n\nUser has previously approved {len(past_approvals)} response(s) to this sender. Maintain similar tone and style."
-        
-        prompt = f"""You are Aimi, {user_context['name']}'s AI teammate on their operations team, helping draft an email response.
+        # Fallback to snippet if no body found
+        if not body and 'snippet' in message:
+            body = message['snippet']
+            print(f"⚠️ Using snippet as body (length: {len(body)})")
+    except Exception as e:
+        print(f"⚠️ Error extracting body: {e}, using snippet")
+        body = message.get('snippet', 'No content available')
+    
+    print(f"📧 Message body: {body[:200]}..." if len(body) > 200 else f"📧 Message body: {body}")
+    
+    print(f"👤 Building user context...")
+    # Build user context for AI - with safe attribute access
+    try:
+        active_projects = []
+        if hasattr(user, 'projects') and user.projects:
+            active_projects = [p.name for p in user.projects if hasattr(p, 'status') and p.status in ['active', 'planning']][:3]
+    except Exception as e:
+        print(f"Warning: Could not load active projects: {e}")
+        active_projects = []
+    
+    user_context = {
+        'name': user.display_name or user.email.split('@')[0],
+        'email': user.email,
+        'role': getattr(user.profile, 'role', 'Professional') if user.profile else 'Professional',
+        'communication_style': getattr(user.profile, 'communication_style', 'professional') if user.profile else 'professional',
+        'tone_preference': user.settings.ai_preferences.get('tone', 'warm_friendly') if (user.settings and hasattr(user.settings, 'ai_preferences') and user.settings.ai_preferences) else 'warm_friendly',
+        'priorities': getattr(user.profile, 'priorities', []) if (user.profile and hasattr(user.profile, 'priorities') and user.profile.priorities) else [],
+        'active_projects': active_projects
+    }
+    print(f"✅ User context built: {user_context['name']}, {user_context['role']}")
+    
+    # Craft AI prompt based on user preferences
+    tone_map = {
+        'warm_friendly': 'warm, friendly, and approachable',
+        'professional': 'professional and formal',
+        'casual': 'casual and conversational',
+        'concise': 'brief and to-the-point'
+    }
+    
+    tone_description = tone_map.get(user_context['tone_preference'], 'professional and friendly')
+    
+    # Check for previous approved drafts from this sender to learn style
+    sender_from = headers.get('From', '')
+    sender_email = ''
+    if '<' in sender_from:
+        sender_email = sender_from.split('<')[1].split('>')[0]
+    elif '@' in sender_from:
+        sender_email = sender_from.strip()
+    
+    # Get past approved responses for style reference (if any)
+    past_approvals = db.query(BehaviorAction).filter(
+        BehaviorAction.user_id == user.id,
+        BehaviorAction.action_type == 'draft_approved',
+        BehaviorAction.sender_email == sender_email
+    ).order_by(desc(BehaviorAction.created_at)).limit(2).all()
+    
+    style_learning = ""
+    if past_approvals:
+        style_learning = f"\n\nUser has previously approved {len(past_approvals)} response(s) to this sender. Maintain similar tone and style."
+    
+    prompt = f"""You are Aimi, {user_context['name']}'s AI teammate on their operations team, helping draft an email response.
 
 USER PROFILE:
 - Name: {user_context['name']}
@@ -778,30 +910,30 @@ IMPORTANT:
 - End with just the closing (no signature block, that will be added separately)
 
 Draft the response now:"""
+    return {
+        "prompt": prompt,
+        "user_name": user.display_name or user.email.split('@')[0],
+        "message": message,
+        "headers": headers,
+        "user_context": user_context,
+        "attachments": attachments,
+        "trust_level": trust_level,
+        "has_unprocessed_attachments": has_unprocessed_attachments,
+        "sender_email": sender_email
+    }
 
-        # Generate response
-        try:
-            print(f"🤖 Calling Anthropic API...")
-            response = anthropic_client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=2000,
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
-            )
-            print(f"✅ Anthropic API responded successfully")
-        except Exception as e:
-            print(f"❌ Anthropic API error: {e}")
-            raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
-        
-        draft_body = response.content[0].text if response.content else ""
-        
-        # Add signature based on style preference
-        user_name = user.display_name or user.email.split('@')[0]
-        
-        if request.signature_style == "as_aimy":
-            signature = f"""
+
+def _draft_result(request: DraftResponseRequest, draft: Dict, draft_body: str) -> Dict:
+    """Add the signature to a generated draft and build the endpoint payload"""
+    user_name = draft["user_name"]
+    headers = draft["headers"]
+    message = draft["message"]
+    attachments = draft["attachments"]
+    has_unprocessed_attachments = draft["has_unprocessed_attachments"]
+    
+    # Add signature based on style preference
+    if request.signature_style == "as_aimy":
+        signature = f"""
 
 Best regards,
 Aimi (on behalf of {user_name})
@@ -809,52 +941,89 @@ Aimi (on behalf of {user_name})
 ---
 Sent via Hey Aimi - Your AI Teammate for Productivity
 www.okaimy.com"""
-            
-        elif request.signature_style == "ai_assisted":
-            signature = f"""
+        
+    elif request.signature_style == "ai_assisted":
+        signature = f"""
 
 Best,
 {user_name}
 
 ---
 Composed with Aimi - my AI teammate at Hey Aimi"""
-            
-        else:  # no_attribution
-            signature = f"""
+        
+    else:  # no_attribution
+        signature = f"""
 
 Best,
 {user_name}"""
+    
+    full_draft = draft_body.strip() + signature
+    
+    return {
+        "success": True,
+        "draft": full_draft,
+        "draft_body": draft_body.strip(),
+        "signature": signature.strip(),
+        "subject": f"Re: {headers.get('Subject', 'No Subject')}",
+        "to": headers.get('From', ''),
+        "original_message": {
+            "id": message['id'],
+            "threadId": message['threadId'],
+            "from": headers.get('From', ''),
+            "subject": headers.get('Subject', '')
+        },
+        "signature_style": request.signature_style,
+        "user_context": {
+            "tone": draft["user_context"]['tone_preference'],
+            "style": draft["user_context"]['communication_style']
+        },
+        "attachments": {
+            "has_attachments": len(attachments) > 0,
+            "count": len(attachments),
+            "unprocessed": has_unprocessed_attachments,
+            "auto_approved": len(attachments) > 0 and draft["trust_level"] == 'trusted',
+            "sender_blocked": len(attachments) > 0 and draft["trust_level"] == 'blocked',
+            "sender_email": draft["sender_email"] if has_unprocessed_attachments else None,
+            "files": [att['filename'] for att in attachments] if has_unprocessed_attachments else []
+        }
+    }
+
+
+@router.post("/messages/draft-response")
+async def draft_email_response(
+    request: DraftResponseRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Generate AI-powered email response draft
+    
+    Uses user profile (communication style, tone, priorities) to craft personalized responses.
+    Learns from approved drafts to improve future suggestions.
+    
+    Signature styles:
+    - as_aimy: Clearly from Aimi on behalf of user (max transparency + promotion)
+    - ai_assisted: From user with subtle Hey Aimi attribution (default, balanced)
+    - no_attribution: Just from user, no mention of AI
+    """
+    try:
+        print(f"🔍 Draft request - User: {request.user_email}, Message: {request.message_id}, Style: {request.signature_style}")
         
-        full_draft = draft_body.strip() + signature
+        draft = await _prepare_draft(request, db)
         
-        return {
-            "success": True,
-            "draft": full_draft,
-            "draft_body": draft_body.strip(),
-            "signature": signature.strip(),
-            "subject": f"Re: {headers.get('Subject', 'No Subject')}",
-            "to": headers.get('From', ''),
-            "original_message": {
-                "id": message['id'],
-                "threadId": message['threadId'],
-                "from": headers.get('From', ''),
-                "subject": headers.get('Subject', '')
-            },
-            "signature_style": request.signature_style,
-            "user_context": {
-                "tone": user_context['tone_preference'],
-                "style": user_context['communication_style']
-            },
-            "attachments": {
-                "has_attachments": len(attachments) > 0,
-                "count": len(attachments),
-                "unprocessed": has_unprocessed_attachments,
-                "auto_approved": len(attachments) > 0 and trust_level == 'trusted',
-                "sender_blocked": len(attachments) > 0 and trust_level == 'blocked',
-                "sender_email": sender_email if has_unprocessed_attachments else None,
-                "files": [att['filename'] for att in attachments] if has_unprocessed_attachments else []
-            }
-        }
+        # Generate response
+        try:
+            print(f"🤖 Calling LLM router...")
+            completion = await get_llm_router().complete(
+                prompt=draft["prompt"],
+                user_id=request.user_email,
+                **DRAFT_COMPLETION
+            )
+            print(f"✅ {completion['provider']} responded successfully")
+        except Exception as e:
+            print(f"❌ LLM error: {e}")
+            raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
+        
+        return _draft_result(request, draft, completion["text"] or "")
         
     except Exception as e:
         import traceback
@@ -869,6 +1038,33 @@ Best,
         detail_msg = f"{error_type}: {error_msg}" if error_msg else f"{error_type} (no error message)"
         raise HTTPException(status_code=500, detail=f"Draft generation failed: {detail_msg}")
 
+@router.post("/messages/draft-response/stream")
+async def stream_draft_email_response(
+    request: DraftResponseRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Server-sent events variant of /messages/draft-response.
+    
+    Streams `chunk` events with draft text as it is generated, then a `done`
+    event with the same payload as the JSON endpoint (signature included).
+    """
+    print(f"🔍 Streaming draft request - User: {request.user_email}, Message: {request.message_id}")
+    draft = await _prepare_draft(request, db)
+    
+    async def events():
+        chunks = []
+        async for text in get_llm_router().stream(
+            prompt=draft["prompt"],
+            user_id=request.user_email,
+            **DRAFT_COMPLETION
+        ):
+            chunks.append(text)
+            yield sse_event("chunk", {"text": text})
+        yield sse_event("done", _draft_result(request, draft, "".join(chunks)))
+    
+    return sse_response(events())
+
 
 @router.post("/messages/approve-draft")
 async def approve_draft_response(
@@ -939,7 +1135,7 @@ async def send_email_reply(
 ):
     """Send email reply via Gmail API"""
     try:
-        service = get_gmail_service(user_email, db)
+        google_client = await AsyncGoogleClient.for_user(user_email, db)
         
         # Create email message
         from email.mime.text import MIMEText
@@ -952,10 +1148,7 @@ async def send_email_reply(
         raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode('utf-8')
         
         # Send via Gmail API
-        sent_message = service.users().messages().send(
-            userId='me',
-            body={'raw': raw_message}
-        ).execute()
+        sent_message = await google_client.send_message(raw_message)
         
         return {
             "success": True,
@@ -973,8 +1166,9 @@ async def health_check():
     """Simple health check to verify AI service is configured"""
     return {
         "status": "ok",
-        "anthropic_configured": anthropic_client is not None,
-        "anthropic_key_set": bool(os.getenv("ANTHROPIC_API_KEY"))
+        "anthropic_configured": get_llm_router().anthropic_client is not None,
+        "anthropic_key_set": bool(os.getenv("ANTHROPIC_API_KEY")),
+        "llm_configured": get_llm_router().is_configured()
     }
 
 
@@ -999,15 +1193,10 @@ async def process_message_attachments(
             process_attachments_for_message
         )
         
-        # Get Gmail service
-        service = get_gmail_service(request.user_email, db)
+        google_client = await AsyncGoogleClient.for_user(request.user_email, db)
         
         # Get full message
-        message = service.users().messages().get(
-            userId='me',
-            id=request.message_id,
-            format='full'
-        ).execute()
+        message = await google_client.get_message(request.message_id, format='full')
         
         # Extract attachments
         attachments = extract_attachments_from_message(message)
@@ -1021,7 +1210,7 @@ async def process_message_attachments(
         
         # Process attachments (download, extract, summarize)
         processed = await process_attachments_for_message(
-            service,
+            google_client,
             request.message_id,
             attachments,
             request.user_email
@@ -1046,52 +1235,45 @@ class SummarizeMessageRequest(BaseModel):
     message_id: str
 
 
-@router.post("/summarize-message")
-async def summarize_message(request: SummarizeMessageRequest, db: Session = Depends(get_db)):
-    """
-    Generate an AI summary of a message
-    """
-    try:
-        if not anthropic_client:
-            raise HTTPException(status_code=503, detail="AI service not configured")
-        
-        # Get Gmail service
-        user = db.query(User).filter(User.email == request.user_email).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        service = get_gmail_service(user)
-        if not service:
-            raise HTTPException(status_code=401, detail="Gmail authentication required")
-        
-        # Fetch message
-        message = service.users().messages().get(
-            userId='me',
-            id=request.message_id,
-            format='full'
-        ).execute()
-        
-        # Extract message content
-        headers = {h['name']: h['value'] for h in message.get('payload', {}).get('headers', [])}
-        subject = headers.get('Subject', 'No Subject')
-        from_email = headers.get('From', 'Unknown')
-        
-        # Get body
-        body = ""
-        if 'parts' in message['payload']:
-            for part in message['payload']['parts']:
-                if part['mimeType'] == 'text/plain':
-                    if 'data' in part['body']:
-                        body = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
-                        break
-        elif 'body' in message['payload'] and 'data' in message['payload']['body']:
-            body = base64.urlsafe_b64decode(message['payload']['body']['data']).decode('utf-8')
-        
-        if not body:
-            body = message.get('snippet', '')
-        
-        # Generate AI summary
-        prompt = f"""Summarize this email in 2-3 sentences. Be concise but capture the key points and any action items.
+SUMMARY_COMPLETION = {"task_type": "light", "prefer_provider": "anthropic", "max_tokens": 200}
+
+
+async def _summary_prompt(request: SummarizeMessageRequest, db: Session) -> str:
+    """Fetch the message and build the summary prompt (shared by the JSON and streaming endpoints)"""
+    if not get_llm_router().is_configured():
+        raise HTTPException(status_code=503, detail="AI service not configured")
+    
+    # Get user and Gmail client
+    user = db.query(User).filter(User.email == request.user_email).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    google_client = await AsyncGoogleClient.for_user(request.user_email, db)
+    
+    # Fetch message
+    message = await google_client.get_message(request.message_id, format='full')
+    
+    # Extract message content
+    headers = {h['name']: h['value'] for h in message.get('payload', {}).get('headers', [])}
+    subject = headers.get('Subject', 'No Subject')
+    from_email = headers.get('From', 'Unknown')
+    
+    # Get body
+    body = ""
+    if 'parts' in message['payload']:
+        for part in message['payload']['parts']:
+            if part['mimeType'] == 'text/plain':
+                if 'data' in part['body']:
+                    body = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
+                    break
+    elif 'body' in message['payload'] and 'data' in message['payload']['body']:
+        body = base64.urlsafe_b64decode(message['payload']['body']['data']).decode('utf-8')
+    
+    if not body:
+        body = message.get('snippet', '')
+    
+    # Generate AI summary
+    prompt = f"""Summarize this email in 2-3 sentences. Be concise but capture the key points and any action items.
 
 From: {from_email}
 Subject: {subject}
@@ -1100,14 +1282,24 @@ Message:
 {body[:3000]}  # Limit to first 3000 chars
 
 Provide a clear, helpful summary that helps the recipient quickly understand what this email is about."""
+    return prompt
+
 
-        response = anthropic_client.messages.create(
-            model="claude-3-haiku-20240307",
-            max_tokens=200,
-            messages=[{"role": "user", "content": prompt}]
+@router.post("/summarize-message")
+async def summarize_message(request: SummarizeMessageRequest, db: Session = Depends(get_db)):
+    """
+    Generate an AI summary of a message
+    """
+    try:
+        prompt = await _summary_prompt(request, db)
+        
+        completion = await get_llm_router().complete(
+            prompt=prompt,
+            user_id=request.user_email,
+            **SUMMARY_COMPLETION
         )
         
-        summary = response.content[0].text.strip()
+        summary = completion["text"].strip()
         
         return {
             "success": True,
@@ -1120,3 +1312,29 @@ Provide a clear, helpful summary that helps the recipient quickly understand wha
         print(f"❌ Error summarizing message: {str(e)}")
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Failed to summarize message: {str(e)}")
+
+
+@router.post("/summarize-message/stream")
+async def stream_summarize_message(request: SummarizeMessageRequest, db: Session = Depends(get_db)):
+    """
+    Server-sent events variant of /summarize-message: `chunk` events as the
+    summary is generated, then a `done` event with the JSON endpoint's payload.
+    """
+    prompt = await _summary_prompt(request, db)
+    
+    async def events():
+        chunks = []
+        async for text in get_llm_router().stream(
+            prompt=prompt,
+            user_id=request.user_email,
+            **SUMMARY_COMPLETION
+        ):
+            chunks.append(text)
+            yield sse_event("chunk", {"text": text})
+        yield sse_event("done", {
+            "success": True,
+            "summary": "".join(chunks).strip(),
+            "message_id": request.message_id
+        })
+    
+    return sse_response(events())
@@ -4,12 +4,13 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta, date
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
-import anthropic
-import os
 
 from app.routers.auth import get_current_user
 from app.database import get_db
 from app.models import User, StandupStatus
+from app.services.llm_router import get_llm_router
+from app.services.llm_prompts import PromptSegments
+from app.services.llm_structured import parse_json
 
 router = APIRouter()
 
@@ -299,32 +300,32 @@ async def analyze_standup(request: StandupAnalyzeRequest, db: Session = Depends(
     try:
         print(f"🔍 Starting standup analysis for user: {request.user_email}")
         
-        # Import gmail service from utils
-        from app.utils.google_auth import get_gmail_service
+        # Import async Google client
+        from app.services.google_api_client import AsyncGoogleClient
         
-        # Get user's Gmail service (not async, don't await)
-        print(f"📧 Getting Gmail service...")
+        # Get user's Gmail client (non-blocking)
+        print(f"📧 Getting Gmail client...")
         try:
-            service = get_gmail_service(request.user_email, db)
-            print(f"✅ Gmail service obtained successfully")
+            google_client = await AsyncGoogleClient.for_user(request.user_email, db)
+            print(f"✅ Gmail client obtained successfully")
         except Exception as gmail_auth_error:
-            print(f"❌ Failed to get Gmail service:")
+            print(f"❌ Failed to get Gmail client:")
             print(f"   Type: {type(gmail_auth_error).__name__}")
             print(f"   Message: {str(gmail_auth_error)}")
             raise  # Re-raise to be caught by outer exception handler
         
-        # Fetch recent emails (last 3 days, inbox only)
-        three_days_ago = (datetime.now() - timedelta(days=3)).strftime('%Y/%m/%d')
-        query = f'in:inbox after:{three_days_ago}'
+        # Fetch recent emails (last 3 days, inbox only) from the synced local store
+        from app.services.gmail_sync import GmailSyncEngine
+        three_days_ago = datetime.now() - timedelta(days=3)
+        query = 'in:inbox'
         
-        print(f"📨 Fetching emails with query: {query}")
+        print(f"📨 Fetching emails with query: {query} after {three_days_ago:%Y/%m/%d}")
         try:
-            results = service.users().messages().list(
-                userId='me',
-                q=query,
-                maxResults=50
-            ).execute()
-            print(f"✅ Email list fetched: {len(results.get('messages', []))} messages")
+            messages = await GmailSyncEngine(db).get_messages(
+                google_client, request.user_email, query, max_results=20, after=three_days_ago,
+                profile='metadata'
+            )
+            print(f"✅ Emails fetched: {len(messages)} messages")
         except Exception as gmail_api_error:
             print(f"❌ Gmail API call failed:")
             print(f"   Type: {type(gmail_api_error).__name__}")
@@ -333,8 +334,6 @@ async def analyze_standup(request: StandupAnalyzeRequest, db: Session = Depends(
             print(f"   Traceback:\n{traceback.format_exc()}")
             raise  # Re-raise to be caught by outer exception handler
         
-        messages = results.get('messages', [])
-        
         if not messages:
             # No recent emails - return empty standup
             return {
@@ -354,16 +353,9 @@ async def analyze_standup(request: StandupAnalyzeRequest, db: Session = Depends(
                 'reasoning': 'You have a clear inbox! This is the perfect time to focus on deep creative work.'
             }
         
-        # Fetch full details for each email
         emails = []
-        for msg in messages[:20]:  # Limit to 20 most recent
+        for full_msg in messages:
             try:
-                full_msg = service.users().messages().get(
-                    userId='me',
-                    id=msg['id'],
-                    format='full'
-                ).execute()
-                
                 # Extract relevant fields
                 headers = {h['name']: h['value'] for h in full_msg['payload']['headers']}
                 
@@ -390,7 +382,7 @@ async def analyze_standup(request: StandupAnalyzeRequest, db: Session = Depends(
         emails.sort(key=lambda x: x['urgency'], reverse=True)
         
         # Use Claude to analyze and determine "The One Thing"
-        client = anthropic.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
+        llm = get_llm_router()
         
         # Create context for Claude
         email_context = "\n\n".join([
@@ -403,45 +395,43 @@ async def analyze_standup(request: StandupAnalyzeRequest, db: Session = Depends(
             for i, e in enumerate(emails[:10])
         ])
         
-        prompt = f"""You are Aimi, an AI partner helping a creative professional stay focused.
+        prompt = PromptSegments(instructions="""You are Aimi, an AI partner helping a creative professional stay focused.
 
-Analyze these recent emails and determine "The One Thing" they should focus on today:
-
-{email_context}
+Analyze the recent emails given after these instructions and determine "The One Thing" they should focus on today.
 
 Provide your analysis in this EXACT JSON format:
-{{
-    "the_one_thing": {{
+{
+    "the_one_thing": {
         "title": "Brief, actionable title",
         "description": "2-3 sentence explanation of why this matters",
         "urgency": 0-100,
         "project": "category name",
         "action": "Specific next step",
         "related_emails": ["Email 1", "Email 2"]
-    }},
+    },
     "secondary_priorities": [
-        {{
+        {
             "title": "Title",
             "urgency": 0-100,
             "action": "Next step"
-        }}
+        }
     ],
     "aimy_handling": [
-        {{
+        {
             "task": "What Aimi will handle",
             "status": "monitoring/drafting/scheduling",
             "emails": ["Email X"]
-        }}
+        }
     ],
     "daily_plan": [
-        {{
+        {
             "time": "Morning/Afternoon/Evening",
             "task": "What to do",
             "duration": "estimated time"
-        }}
+        }
     ],
     "reasoning": "Brief explanation of why you chose this focus"
-}}
+}
 
 Guidelines:
 - Choose ONE clear focus that has the most impact
@@ -449,28 +439,18 @@ Guidelines:
 - Suggest 2-3 secondary priorities (things that also matter but not urgent)
 - Identify what Aimi can handle (follow-ups, scheduling, monitoring)
 - Create a realistic daily plan
-- Be supportive and encouraging in tone"""
+- Be supportive and encouraging in tone""", data=f"Recent emails:\n\n{email_context}")
 
-        response = client.messages.create(
-            model="claude-3-haiku-20240307",
+        completion = await llm.complete(
+            prompt=prompt,
+            task_type="light",
+            prefer_provider="anthropic",
             max_tokens=2000,
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }]
+            user_id=request.user_email
         )
         
-        # Parse Claude's response
-        import json
-        analysis_text = response.content[0].text
-        
-        # Extract JSON from response (Claude might wrap it in markdown)
-        if '```json' in analysis_text:
-            analysis_text = analysis_text.split('```json')[1].split('```')[0]
-        elif '```' in analysis_text:
-            analysis_text = analysis_text.split('```')[1].split('```')[0]
-        
-        analysis = json.loads(analysis_text.strip())
+        # Parse Claude's response (fences tolerated, truncation repaired)
+        analysis = parse_json(completion["text"])
         
         return analysis
         
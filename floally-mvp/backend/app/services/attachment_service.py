@@ -4,16 +4,15 @@ Secure extraction and analysis of email attachments
 """
 import base64
 import io
-import os
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timezone
 
-import anthropic
 from PyPDF2 import PdfReader
 from sqlalchemy.orm import Session
 
 from app.models.user import User
 from app.models.trusted_sender import TrustedSender
+from app.services.llm_router import get_llm_router
 
 
 # Security constants
@@ -26,8 +25,6 @@ ALLOWED_MIME_TYPES = {
     'application/vnd.openxmlformats-officedocument.wordprocessingml.document': 'docx'
 }
 
-anthropic_client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-
 
 class AttachmentInfo:
     """Information about an email attachment"""
@@ -107,20 +104,15 @@ def is_attachment_safe(attachment_info: Dict) -> tuple[bool, str]:
     return True, "Safe"
 
 
-def download_attachment(gmail_service, user_id: str, message_id: str, attachment_id: str) -> Optional[bytes]:
+async def download_attachment(google_client, message_id: str, attachment_id: str) -> Optional[bytes]:
     """
     Download attachment from Gmail
     Returns attachment data as bytes
     """
     try:
-        attachment = gmail_service.users().messages().attachments().get(
-            userId=user_id,
-            messageId=message_id,
-            id=attachment_id
-        ).execute()
+        attachment = await google_client.get_attachment(message_id, attachment_id)
         
         # Decode base64 data
-        import base64
         attachment_data = base64.urlsafe_b64decode(attachment['data'])
         return attachment_data
     except Exception as e:
@@ -168,7 +160,8 @@ def extract_text_from_attachment(attachment_data: bytes, mime_type: str) -> str:
 async def summarize_attachment_with_ai(
     filename: str,
     extracted_text: str,
-    context: str = ""
+    context: str = "",
+    user_email: Optional[str] = None
 ) -> str:
     """
     Use Claude to summarize attachment content
@@ -197,19 +190,21 @@ Provide a brief summary highlighting:
 Summary:"""
 
     try:
-        response = anthropic_client.messages.create(
-            model="claude-3-haiku-20240307",
+        completion = await get_llm_router().complete(
+            prompt=prompt,
+            task_type="light",
+            prefer_provider="anthropic",
             max_tokens=300,
-            messages=[{"role": "user", "content": prompt}]
+            user_id=user_email
         )
-        return response.content[0].text.strip()
+        return completion["text"].strip()
     except Exception as e:
         print(f"Error summarizing attachment: {str(e)}")
         return f"[Attachment: {filename}]"
 
 
 async def process_attachments_for_message(
-    gmail_service,
+    google_client,
     message_id: str,
     attachments: List[Dict],
     user_email: str
@@ -229,9 +224,8 @@ async def process_attachments_for_message(
         
         # Download attachment
         print(f"📎 Downloading attachment: {att_info['filename']}")
-        attachment_data = download_attachment(
-            gmail_service,
-            'me',
+        attachment_data = await download_attachment(
+            google_client,
             message_id,
             att_info['attachment_id']
         )
@@ -254,7 +248,8 @@ async def process_attachments_for_message(
             summary = await summarize_attachment_with_ai(
                 att_info['filename'],
                 extracted_text,
-                context=f"Email to {user_email}"
+                context=f"Email to {user_email}",
+                user_email=user_email
             )
         
         processed_attachments.append({
@@ -7,12 +7,24 @@ from sqlalchemy.orm import Session
 from sqlalchemy import desc
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
-import anthropic
-import os
+from pydantic import BaseModel, Field
 import json
 
 from app.models.user import User, UserProfile, SenderStats, BehaviorAction
 from app.models.trusted_sender import TrustedSender, TrustLevel
+from app.services.llm_router import get_llm_router
+from app.services.llm_prompts import PromptSegments
+from app.services.llm_structured import parse_items
+
+
+class ContextualScore(BaseModel):
+    """One element of the contextual scoring prompt's JSON array"""
+    index: int
+    adjusted_score: int = Field(ge=0, le=100)
+    reasoning: str = ""
+    relationship_insight: str = ""
+    suggested_action: str = "review_today"
+    confidence: float = Field(default=0.8, ge=0.0, le=1.0)
 
 
 class ContextualScorer:
@@ -23,7 +35,88 @@ class ContextualScorer:
     
     def __init__(self, db: Session):
         self.db = db
-        self.anthropic_client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        
+        # Rows loaded by preload()/score_batch(), reused for the life of this scorer
+        self._sender_stats_cache: Dict[Tuple[str, str], Optional[SenderStats]] = {}
+        self._trust_cache: Dict[Tuple[str, str], Optional[TrustedSender]] = {}
+        self._user_context_cache: Dict[str, Dict] = {}
+    
+    def preload(self, user_id: str, sender_emails: List[str]):
+        """
+        Load everything scoring needs for these senders up front:
+        one IN query for SenderStats, one for TrustedSender, and the profile.
+        
+        Later calculate_contextual_importance calls for these senders make no queries.
+        """
+        missing = {
+            email for email in sender_emails
+            if email and (user_id, email) not in self._sender_stats_cache
+        }
+        if missing:
+            stats_rows = self.db.query(SenderStats).filter(
+                SenderStats.user_id == user_id,
+                SenderStats.sender_email.in_(missing)
+            ).all()
+            trust_rows = self.db.query(TrustedSender).filter(
+                TrustedSender.user_id == user_id,
+                TrustedSender.sender_email.in_(missing)
+            ).all()
+            
+            for email in missing:
+                self._sender_stats_cache[(user_id, email)] = None
+                self._trust_cache[(user_id, email)] = None
+            for row in stats_rows:
+                self._sender_stats_cache[(user_id, row.sender_email)] = row
+            for row in trust_rows:
+                self._trust_cache[(user_id, row.sender_email)] = row
+        
+        self._get_user_context(user_id)
+    
+    def score_batch(self, user_id: str, messages: List[Dict]) -> List[Dict]:
+        """
+        Score many messages with a handful of queries instead of three per message.
+        
+        Args:
+            user_id: User's ID
+            messages: Dicts with sender_email and optional sender_name, subject,
+                snippet and gmail_signals (same meaning as calculate_contextual_importance)
+        
+        Returns:
+            Score results in the same order as `messages`
+        """
+        self.preload(user_id, [m.get("sender_email") for m in messages])
+        return [
+            self.calculate_contextual_importance(
+                user_id=user_id,
+                sender_email=m.get("sender_email") or "",
+                sender_name=m.get("sender_name"),
+                subject=m.get("subject") or "",
+                snippet=m.get("snippet") or "",
+                gmail_signals=m.get("gmail_signals") or {}
+            )
+            for m in messages
+        ]
+    
+    def score_columns(self, user_id: str, messages: List[Dict]) -> Dict:
+        """
+        Vectorized score_batch for bulk re-scoring (backfills, large autonomous runs).
+        
+        Same inputs as score_batch; returns NumPy columns from
+        scoring_kernel.score_features (scores, confidence and integer codes)
+        instead of a dict per message. No reasoning strings are generated.
+        """
+        from app.services.scoring_kernel import pack_features, score_features
+        
+        self.preload(user_id, [m.get("sender_email") for m in messages])
+        sender_stats = {
+            email: row for (uid, email), row in self._sender_stats_cache.items()
+            if uid == user_id and row is not None
+        }
+        trust_levels = {
+            email: row.trust_level.value for (uid, email), row in self._trust_cache.items()
+            if uid == user_id and row is not None
+        }
+        return score_features(pack_features(messages, sender_stats, trust_levels))
     
     def calculate_contextual_importance(
         self,
@@ -78,11 +171,15 @@ class ContextualScorer:
         self,
         user_id: str,
         messages: List[Dict],
-        use_llm: bool = True
+        use_llm: bool = True,
+        preselected: bool = False
     ) -> List[Dict]:
         """
         Layer 4: LLM-powered contextual reasoning for complex cases
         Use sparingly for messages where fast scoring has low confidence
+        
+        With preselected=True the caller (the scoring cascade) has already
+        chosen which messages need it, so all of them are analyzed.
         """
         if not use_llm or not messages:
             return []
@@ -92,10 +189,13 @@ class ContextualScorer:
         sender_patterns = self._get_behavioral_patterns(user_id)
         
         # Filter to messages needing deep analysis (unknown senders, conflicting signals)
-        messages_needing_analysis = [
-            msg for msg in messages
-            if msg.get("confidence", 1.0) < 0.6 or msg.get("sender_relationship") == "unknown"
-        ][:20]  # Limit to 20 for cost control
+        if preselected:
+            messages_needing_analysis = messages
+        else:
+            messages_needing_analysis = [
+                msg for msg in messages
+                if msg.get("confidence", 1.0) < 0.6 or msg.get("sender_relationship") == "unknown"
+            ][:20]  # Limit to 20 for cost control
         
         if not messages_needing_analysis:
             return []
@@ -108,23 +208,30 @@ class ContextualScorer:
         )
         
         # Use Claude Sonnet for contextual reasoning
-        response = self.anthropic_client.messages.create(
-            model="claude-sonnet-4-20250514",  # Latest Sonnet 4 (upgraded from 3.5)
-            max_tokens=4000,
+        completion = await get_llm_router().complete(
+            prompt=prompt,
+            task_type="reasoning",  # Sonnet 4 (upgraded from 3.5)
+            prefer_provider="anthropic",
+            max_tokens=min(4000, 300 + 150 * len(messages_needing_analysis)),
             temperature=0.3,  # Lower temperature for consistency
-            messages=[{"role": "user", "content": prompt}]
+            user_id=user_id
         )
         
         # Parse and return enhanced scores
-        enhanced_scores = self._parse_llm_response(response.content[0].text)
+        enhanced_scores = self._parse_llm_response(completion["text"])
         return enhanced_scores
     
     def _get_sender_context(self, user_id: str, sender_email: str) -> Dict:
         """Layer 1: Load sender behavioral data"""
-        stats = self.db.query(SenderStats).filter(
-            SenderStats.user_id == user_id,
-            SenderStats.sender_email == sender_email
-        ).first()
+        key = (user_id, sender_email)
+        if key in self._sender_stats_cache:
+            stats = self._sender_stats_cache[key]
+        else:
+            stats = self.db.query(SenderStats).filter(
+                SenderStats.user_id == user_id,
+                SenderStats.sender_email == sender_email
+            ).first()
+            self._sender_stats_cache[key] = stats
         
         if not stats:
             return {
@@ -170,33 +277,44 @@ class ContextualScorer:
     
     def _get_user_context(self, user_id: str) -> Dict:
         """Layer 2: Load user profile and priorities"""
+        if user_id in self._user_context_cache:
+            return self._user_context_cache[user_id]
+        
         profile = self.db.query(UserProfile).filter(
             UserProfile.user_id == user_id
         ).first()
         
         if not profile:
-            return {
+            context = {
                 "role": "Professional",
                 "priorities": [],
                 "communication_style": "professional",
                 "has_context": False
             }
+        else:
+            context = {
+                "role": profile.role or "Professional",
+                "priorities": profile.priorities or [],
+                "communication_style": profile.communication_style or "professional",
+                "company": profile.company,
+                "work_hours": profile.work_hours,
+                "has_context": True
+            }
         
-        return {
-            "role": profile.role or "Professional",
-            "priorities": profile.priorities or [],
-            "communication_style": profile.communication_style or "professional",
-            "company": profile.company,
-            "work_hours": profile.work_hours,
-            "has_context": True
-        }
+        self._user_context_cache[user_id] = context
+        return context
     
     def _get_trust_context(self, user_id: str, sender_email: str) -> Dict:
         """Layer 3: Get explicit trust designation"""
-        trusted = self.db.query(TrustedSender).filter(
-            TrustedSender.user_id == user_id,
-            TrustedSender.sender_email == sender_email
-        ).first()
+        key = (user_id, sender_email)
+        if key in self._trust_cache:
+            trusted = self._trust_cache[key]
+        else:
+            trusted = self.db.query(TrustedSender).filter(
+                TrustedSender.user_id == user_id,
+                TrustedSender.sender_email == sender_email
+            ).first()
+            self._trust_cache[key] = trusted
         
         if not trusted:
             return {
@@ -420,11 +538,23 @@ class ContextualScorer:
         user_context: Dict,
         sender_patterns: Dict,
         messages: List[Dict]
-    ) -> str:
-        """Build rich context prompt for LLM reasoning"""
-        return f"""You are Aimi, {user_context.get('role', 'a professional')}'s AI operational teammate.
+    ) -> PromptSegments:
+        """Build rich context prompt for LLM reasoning (fixed instructions first, for prompt caching)"""
+        instructions = """You are Aimi, the user's AI operational teammate.
+
+QUESTION: Which of the messages given after the user context truly matter to this user given their role, priorities, and behavior patterns?
+
+For each message, provide:
+1. adjusted_score (0-100): Your contextual importance score
+2. reasoning: WHY this matters (or doesn't) to THIS specific user
+3. relationship_insight: What this sender means to the user
+4. suggested_action: reply_now | review_today | read_later | archive
+5. confidence (0-1): How sure you are of the score
 
-USER CONTEXT:
+Return ONLY valid JSON array format:
+[{"index": 0, "adjusted_score": 85, "reasoning": "...", "relationship_insight": "...", "suggested_action": "reply_now", "confidence": 0.8}, ...]"""
+        
+        context = f"""USER CONTEXT:
 - Role: {user_context.get('role')}
 - Current Priorities: {', '.join(user_context.get('priorities', ['General work']))}
 - Communication Style: {user_context.get('communication_style')}
@@ -432,9 +562,9 @@ USER CONTEXT:
 
 LEARNED PATTERNS (from {sender_patterns.get('total_actions_tracked', 0)} recent actions):
 - Senders user always archives: {len(sender_patterns.get('consistent_archives', []))} identified
-- Senders user always opens: {len(sender_patterns.get('consistent_opens', []))} identified
-
-MESSAGES NEEDING ANALYSIS:
+- Senders user always opens: {len(sender_patterns.get('consistent_opens', []))} identified"""
+        
+        data = f"""MESSAGES NEEDING ANALYSIS:
 {json.dumps([{
     'index': i,
     'from': msg.get('from'),
@@ -443,29 +573,10 @@ MESSAGES NEEDING ANALYSIS:
     'sender_relationship': msg.get('sender_relationship'),
     'initial_score': msg.get('importance_score'),
     'confidence': msg.get('confidence')
-} for i, msg in enumerate(messages)], indent=2)}
-
-QUESTION: Which of these messages truly matter to this user given their role, priorities, and behavior patterns?
-
-For each message, provide:
-1. adjusted_score (0-100): Your contextual importance score
-2. reasoning: WHY this matters (or doesn't) to THIS specific user
-3. relationship_insight: What this sender means to the user
-4. suggested_action: reply_now | review_today | read_later | archive
-
-Return ONLY valid JSON array format:
-[{{"index": 0, "adjusted_score": 85, "reasoning": "...", "relationship_insight": "...", "suggested_action": "reply_now"}}, ...]"""
+} for i, msg in enumerate(messages)], indent=2)}"""
+        
+        return PromptSegments(instructions=instructions, user_context=context, data=data)
     
     def _parse_llm_response(self, response_text: str) -> List[Dict]:
-        """Parse LLM JSON response"""
-        try:
-            # Extract JSON from markdown code blocks if present
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0]
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0]
-            
-            return json.loads(response_text.strip())
-        except Exception as e:
-            print(f"Failed to parse LLM response: {e}")
-            return []
+        """Parse LLM JSON response, keeping every valid score even if others are malformed"""
+        return [score.model_dump() for score in parse_items(response_text, ContextualScore)]
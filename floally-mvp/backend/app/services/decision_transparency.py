@@ -13,15 +13,23 @@ Every action Aimi takes or suggests should be:
 
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
-from sqlalchemy import Column, String, JSON, DateTime, Float, Integer, Boolean, Enum as SQLEnum
+from sqlalchemy import Column, String, JSON, DateTime, Float, Integer, Boolean, Enum as SQLEnum, insert
 from sqlalchemy.orm import Session
 import enum
 import logging
+import os
+import threading
+import time
+import weakref
 
-from app.database import Base
+from app.database import Base, SessionLocal
 
 logger = logging.getLogger(__name__)
 
+# Write-behind limits for DecisionBuffer
+DECISION_BUFFER_MAX_SIZE = int(os.getenv("DECISION_BUFFER_MAX_SIZE", "200"))
+DECISION_BUFFER_MAX_AGE_SECONDS = float(os.getenv("DECISION_BUFFER_MAX_AGE_SECONDS", "10"))
+
 
 class DecisionType(enum.Enum):
     """Types of decisions Aimi can make"""
@@ -86,6 +94,123 @@ class AimiDecision(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+def build_decision_row(
+    user_email: str,
+    decision_type: DecisionType,
+    decision_data: Dict,
+    reasoning: str,
+    confidence: float,
+    message_id: Optional[str] = None,
+    context_snapshot: Optional[Dict] = None,
+    ai_model: Optional[str] = None
+) -> Dict:
+    """Column values for an AimiDecision, with status derived from confidence"""
+    # Determine status based on confidence
+    if confidence >= 0.9:
+        status = DecisionStatus.HANDLED  # High confidence = auto-handle
+    elif confidence >= 0.6:
+        status = DecisionStatus.SUGGESTED  # Medium = suggest to user
+    else:
+        status = DecisionStatus.YOUR_CALL  # Low = ask user
+    
+    now = datetime.utcnow()
+    return {
+        "user_email": user_email,
+        "message_id": message_id,
+        "decision_type": decision_type,
+        "decision_data": decision_data,
+        "reasoning": reasoning,
+        "confidence": confidence,
+        "status": status,
+        "context_snapshot": context_snapshot or {},
+        "ai_model_used": ai_model or "unknown",
+        "created_at": now,  # Decision time, not flush time
+        "updated_at": now
+    }
+
+
+# Buffers with unflushed decisions, flushed on application shutdown
+_live_buffers: "weakref.WeakSet[DecisionBuffer]" = weakref.WeakSet()
+
+
+class DecisionBuffer:
+    """
+    Write-behind buffer for decision recording.
+    
+    Endpoints that record a decision per message (curated inbox scoring) add
+    them here and the whole batch is written with one bulk INSERT and one
+    commit, instead of a transaction per email. The buffer flushes itself
+    once it holds DECISION_BUFFER_MAX_SIZE rows or its oldest row is older
+    than DECISION_BUFFER_MAX_AGE_SECONDS; callers must flush() at request end
+    (in a finally block). Anything still pending at shutdown is flushed by
+    flush_all_decision_buffers().
+    
+    Buffered decisions have no ID until flushed, so use
+    DecisionTransparencyService.record_decision when the caller needs one.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+        self._rows: List[Dict] = []
+        self._oldest: Optional[float] = None
+        self._lock = threading.Lock()
+        _live_buffers.add(self)
+    
+    def record_decision(self, **kwargs):
+        """Buffer a decision (same arguments as DecisionTransparencyService.record_decision)"""
+        row = build_decision_row(**kwargs)
+        with self._lock:
+            self._rows.append(row)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            due = (
+                len(self._rows) >= DECISION_BUFFER_MAX_SIZE or
+                time.monotonic() - self._oldest >= DECISION_BUFFER_MAX_AGE_SECONDS
+            )
+        if due:
+            self.flush()
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    def flush(self, db: Optional[Session] = None) -> int:
+        """
+        Write all pending decisions in one bulk insert.
+        
+        Returns:
+            Number of decisions written (0 if nothing was pending or the write failed)
+        """
+        with self._lock:
+            rows, self._rows, self._oldest = self._rows, [], None
+        if not rows:
+            return 0
+        
+        session = db or self.db
+        try:
+            session.execute(insert(AimiDecision), rows)
+            session.commit()
+            logger.info(f"Recorded {len(rows)} buffered decision(s) in one batch")
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Failed to flush {len(rows)} buffered decision(s): {e}")
+            session.rollback()
+            return 0
+
+
+def flush_all_decision_buffers():
+    """Flush every buffer that still holds decisions (called on application shutdown)"""
+    pending = [buffer for buffer in list(_live_buffers) if len(buffer)]
+    if not pending or SessionLocal is None:
+        return
+    
+    db = SessionLocal()
+    try:
+        for buffer in pending:
+            buffer.flush(db)
+    finally:
+        db.close()
+
+
 class DecisionTransparencyService:
     """Service for recording, reviewing, and learning from Aimi's decisions"""
     
@@ -119,30 +244,21 @@ class DecisionTransparencyService:
         Returns:
             Decision ID for future reference
         """
-        # Determine status based on confidence
-        if confidence >= 0.9:
-            status = DecisionStatus.HANDLED  # High confidence = auto-handle
-        elif confidence >= 0.6:
-            status = DecisionStatus.SUGGESTED  # Medium = suggest to user
-        else:
-            status = DecisionStatus.YOUR_CALL  # Low = ask user
-        
-        decision = AimiDecision(
+        decision = AimiDecision(**build_decision_row(
             user_email=user_email,
-            message_id=message_id,
             decision_type=decision_type,
             decision_data=decision_data,
             reasoning=reasoning,
             confidence=confidence,
-            status=status,
-            context_snapshot=context_snapshot or {},
-            ai_model_used=ai_model or "unknown"
-        )
+            message_id=message_id,
+            context_snapshot=context_snapshot,
+            ai_model=ai_model
+        ))
         
         self.db.add(decision)
         self.db.commit()
         
-        logger.info(f"Recorded {decision_type.value} decision (confidence: {confidence:.2f}, status: {status.value})")
+        logger.info(f"Recorded {decision_type.value} decision (confidence: {confidence:.2f}, status: {decision.status.value})")
         
         return decision.id
     
@@ -31,6 +31,112 @@ class FilterIntelligenceCache(Base):
     last_updated = Column(DateTime, default=datetime.utcnow)
 
 
+class _DomainSuffixTrie:
+    """Reversed-label trie: a rule for example.com also matches mail.example.com"""
+    
+    def __init__(self, domains: List[str]):
+        self._root: Dict = {}
+        for domain in domains:
+            labels = _domain_labels(domain)
+            if not labels:
+                continue
+            node = self._root
+            for label in labels:
+                node = node.setdefault(label, {})
+            node[None] = domain  # Terminal marker keeps the rule as written
+    
+    def match(self, domain: str) -> Optional[str]:
+        """Return the rule matching `domain` or one of its parents, if any"""
+        node = self._root
+        for label in _domain_labels(domain):
+            node = node.get(label)
+            if node is None:
+                return None
+            if None in node:
+                return node[None]
+        return None
+
+
+def _domain_labels(domain: str) -> List[str]:
+    """'@Mail.Example.com' -> ['com', 'example', 'mail']"""
+    domain = (domain or '').strip().lower().lstrip('@.')
+    return [label for label in reversed(domain.split('.')) if label]
+
+
+class FilterMatcher:
+    """
+    Filter intelligence compiled for fast lookups.
+    
+    Built once per request from the cached intelligence dict; each check is
+    a few set lookups plus a walk of at most the sender domain's labels.
+    """
+    
+    def __init__(self, intelligence: Optional[Dict]):
+        intelligence = intelligence or {}
+        self.intelligence = intelligence
+        self.archive_senders = {s.lower() for s in intelligence.get("auto_archive_senders", [])}
+        self.star_senders = {s.lower() for s in intelligence.get("auto_star_senders", [])}
+        self.important_senders = {s.lower() for s in intelligence.get("auto_important_senders", [])}
+        self.low_priority_domains = _DomainSuffixTrie(intelligence.get("low_priority_domains", []))
+        self.high_priority_domains = _DomainSuffixTrie(intelligence.get("high_priority_domains", []))
+    
+    def check(self, sender_email: str, sender_domain: str) -> Dict:
+        """Same result shape as UserFilterIntelligence.check_sender_priority"""
+        email = (sender_email or '').lower()
+        
+        # Check for explicit auto-archive (LOW priority)
+        if email in self.archive_senders:
+            return {
+                "explicit_priority": "low",
+                "reasoning": f"User has filter to auto-archive emails from {sender_email}",
+                "skip_llm": True,
+                "importance_score": 0.1
+            }
+        
+        # Check domain-level auto-archive
+        if self.low_priority_domains.match(sender_domain):
+            return {
+                "explicit_priority": "low",
+                "reasoning": f"User has filter to auto-archive emails from {sender_domain}",
+                "skip_llm": True,
+                "importance_score": 0.15
+            }
+        
+        # Check for explicit auto-star (HIGH priority)
+        if email in self.star_senders:
+            return {
+                "explicit_priority": "high",
+                "reasoning": f"User has filter to auto-star emails from {sender_email}",
+                "skip_llm": True,
+                "importance_score": 0.95
+            }
+        
+        # Check for explicit auto-important (HIGH priority)
+        if email in self.important_senders:
+            return {
+                "explicit_priority": "high",
+                "reasoning": f"User has filter to mark emails from {sender_email} as important",
+                "skip_llm": True,
+                "importance_score": 0.90
+            }
+        
+        # Check domain-level high priority
+        if self.high_priority_domains.match(sender_domain):
+            return {
+                "explicit_priority": "high",
+                "reasoning": f"User has filter for high priority domain {sender_domain}",
+                "skip_llm": False,  # Still use LLM for nuance
+                "importance_boost": 0.2
+            }
+        
+        # No explicit filter match
+        return {
+            "explicit_priority": None,
+            "reasoning": None,
+            "skip_llm": False
+        }
+
+
 class UserFilterIntelligence:
     """Extract intelligence from user's Gmail filters"""
     
@@ -87,15 +193,46 @@ class UserFilterIntelligence:
             # Return empty intelligence on error
             return self._empty_intelligence()
     
+    async def get_filter_intelligence_async(
+        self,
+        google_client,
+        user_email: str,
+        force_refresh: bool = False
+    ) -> Dict:
+        """
+        Async variant of get_filter_intelligence for AsyncGoogleClient callers.
+        
+        Same caching behaviour; the Gmail filters call doesn't block the event loop.
+        """
+        if not force_refresh:
+            cached = self._get_cached_intelligence(user_email)
+            if cached:
+                logger.info(f"Using cached filter intelligence for {user_email}")
+                return cached
+        
+        try:
+            logger.info(f"Fetching Gmail filters for {user_email}")
+            filters = await google_client.list_filters()
+            intelligence = self._analyze_filters(filters)
+            self._cache_intelligence(user_email, intelligence)
+            return intelligence
+            
+        except Exception as e:
+            logger.error(f"Error fetching filters: {str(e)}")
+            return self._empty_intelligence()
+    
     def check_sender_priority(
         self, 
-        intelligence: Dict, 
+        intelligence, 
         sender_email: str,
         sender_domain: str
     ) -> Dict:
         """
         Check if sender matches any explicit user filter rules.
         
+        `intelligence` may be the raw dict or a FilterMatcher; callers checking
+        many senders should compile a FilterMatcher once and reuse it.
+        
         Returns:
             {
                 "explicit_priority": "high" | "low" | None,
@@ -103,57 +240,8 @@ class UserFilterIntelligence:
                 "skip_llm": bool  # True if filter rule is explicit enough
             }
         """
-        # Check for explicit auto-archive (LOW priority)
-        if sender_email in intelligence.get("auto_archive_senders", []):
-            return {
-                "explicit_priority": "low",
-                "reasoning": f"User has filter to auto-archive emails from {sender_email}",
-                "skip_llm": True,
-                "importance_score": 0.1
-            }
-        
-        # Check domain-level auto-archive
-        if sender_domain in intelligence.get("low_priority_domains", []):
-            return {
-                "explicit_priority": "low",
-                "reasoning": f"User has filter to auto-archive emails from {sender_domain}",
-                "skip_llm": True,
-                "importance_score": 0.15
-            }
-        
-        # Check for explicit auto-star (HIGH priority)
-        if sender_email in intelligence.get("auto_star_senders", []):
-            return {
-                "explicit_priority": "high",
-                "reasoning": f"User has filter to auto-star emails from {sender_email}",
-                "skip_llm": True,
-                "importance_score": 0.95
-            }
-        
-        # Check for explicit auto-important (HIGH priority)
-        if sender_email in intelligence.get("auto_important_senders", []):
-            return {
-                "explicit_priority": "high",
-                "reasoning": f"User has filter to mark emails from {sender_email} as important",
-                "skip_llm": True,
-                "importance_score": 0.90
-            }
-        
-        # Check domain-level high priority
-        if sender_domain in intelligence.get("high_priority_domains", []):
-            return {
-                "explicit_priority": "high",
-                "reasoning": f"User has filter for high priority domain {sender_domain}",
-                "skip_llm": False,  # Still use LLM for nuance
-                "importance_boost": 0.2
-            }
-        
-        # No explicit filter match
-        return {
-            "explicit_priority": None,
-            "reasoning": None,
-            "skip_llm": False
-        }
+        matcher = intelligence if isinstance(intelligence, FilterMatcher) else FilterMatcher(intelligence)
+        return matcher.check(sender_email, sender_domain)
     
     def _analyze_filters(self, filters_response: Dict) -> Dict:
         """
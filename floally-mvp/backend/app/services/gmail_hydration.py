@@ -0,0 +1,161 @@
+"""
+Gmail Hydration Service
+Turns lightweight `messages().list` results into full message resources
+using Gmail's batch HTTP endpoint instead of one round-trip per message.
+
+Gmail accepts up to 100 calls per batch request, but recommends staying
+around 50 to avoid per-user concurrency rate limits, so that is our default.
+A 60-message curated inbox therefore costs 2 batch calls instead of 60.
+
+`hydrate_messages_async` sends the batches through an AsyncGoogleClient
+without blocking the event loop.
+
+Callers pick a fetch profile instead of a raw Gmail format. `metadata`
+requests only the headers our endpoints read plus a `fields` partial-response
+mask, so list/scoring paths don't pull MIME bodies they never look at.
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Union
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = 100  # Hard limit enforced by Gmail
+DEFAULT_BATCH_SIZE = int(os.getenv("GMAIL_BATCH_SIZE", "50"))
+
+# Per-item errors worth a second attempt (rate limit / transient backend errors)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Headers read by the list, curated, standup and sync paths
+METADATA_HEADERS = [
+    'From', 'To', 'Cc', 'Reply-To', 'Subject', 'Date',
+    'List-Unsubscribe', 'List-Unsubscribe-Post', 'Message-ID', 'In-Reply-To'
+]
+
+
+class FetchProfile(NamedTuple):
+    """How much of each message to fetch"""
+    format: str  # Gmail format: minimal | metadata | full
+    metadata_headers: Optional[List[str]] = None  # Only used with format=metadata
+    fields: Optional[str] = None  # Gmail partial-response mask
+
+
+FETCH_PROFILES = {
+    # IDs and labels only (label sync, existence checks)
+    'minimal': FetchProfile('minimal', fields='id,threadId,labelIds,internalDate'),
+    # Headers, labels and snippet - everything list/scoring endpoints use
+    'metadata': FetchProfile(
+        'metadata',
+        metadata_headers=METADATA_HEADERS,
+        fields='id,threadId,labelIds,snippet,internalDate,payload/headers'
+    ),
+    # Complete MIME tree (message body readers)
+    'full': FetchProfile('full'),
+}
+
+
+def get_fetch_profile(profile: Union[str, FetchProfile]) -> FetchProfile:
+    """Resolve a profile name ('minimal', 'metadata', 'full') to its FetchProfile"""
+    if isinstance(profile, FetchProfile):
+        return profile
+    if profile not in FETCH_PROFILES:
+        raise ValueError(f"Unknown fetch profile: {profile}")
+    return FETCH_PROFILES[profile]
+
+
+class HydrationResult:
+    """Outcome of a batched hydration run"""
+
+    def __init__(self):
+        self.messages: Dict[str, Dict] = {}  # message_id -> Gmail message resource
+        self.failures: Dict[str, str] = {}  # message_id -> error description
+        self.batch_calls = 0  # Number of HTTP round-trips made
+
+    def ordered(self, message_ids: Iterable[str]) -> List[Dict]:
+        """Return hydrated messages in the order of `message_ids`, skipping failures"""
+        return [self.messages[mid] for mid in message_ids if mid in self.messages]
+
+
+async def hydrate_messages_async(
+    client,
+    message_ids: Iterable[str],
+    profile: Union[str, FetchProfile] = "full",
+    batch_size: Optional[int] = None,
+    retry_failed: bool = True
+) -> HydrationResult:
+    """
+    Fetch many Gmail messages using batched `messages.get` calls.
+
+    Args:
+        client: AsyncGoogleClient for the account
+        message_ids: Message IDs to fetch (duplicates are fetched once)
+        profile: Fetch profile name ('minimal', 'metadata', 'full') or FetchProfile
+        batch_size: Calls per batch request (default GMAIL_BATCH_SIZE, max 100)
+        retry_failed: Re-batch items that failed with a retryable status once
+
+    Returns:
+        HydrationResult with messages keyed by ID and per-message failures.
+        A failing message never fails the whole batch.
+
+    Batches are sent concurrently; the client's per-user semaphore bounds
+    how many are in flight at once.
+    """
+    result = HydrationResult()
+    unique_ids = list(dict.fromkeys(mid for mid in message_ids if mid))
+    if not unique_ids:
+        return result
+
+    size = max(1, min(batch_size or DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE))
+    profile = get_fetch_profile(profile)
+
+    retryable = await _run_batches_async(client, unique_ids, profile, size, result)
+
+    if retry_failed and retryable:
+        logger.info(f"Retrying {len(retryable)} Gmail message(s) after transient batch errors")
+        for mid in retryable:
+            result.failures.pop(mid, None)
+        await _run_batches_async(client, retryable, profile, size, result)
+
+    if result.failures:
+        logger.warning(f"Gmail hydration: {len(result.failures)} of {len(unique_ids)} message(s) failed")
+
+    return result
+
+
+async def _run_batches_async(client, message_ids: List[str], profile: FetchProfile, size: int, result: HydrationResult) -> List[str]:
+    """Execute batches for `message_ids` through the client's multipart batch transport, returning IDs that failed with a retryable status"""
+    chunks = [message_ids[start:start + size] for start in range(0, len(message_ids), size)]
+    responses = await asyncio.gather(
+        *(
+            client.batch_get_messages(
+                chunk,
+                format=profile.format,
+                metadata_headers=profile.metadata_headers,
+                fields=profile.fields
+            )
+            for chunk in chunks
+        ),
+        return_exceptions=True
+    )
+
+    retryable = []
+    for chunk, response in zip(chunks, responses):
+        result.batch_calls += 1
+        if isinstance(response, Exception):
+            logger.error(f"Gmail batch request failed: {response}")
+            for mid in chunk:
+                result.failures[mid] = str(response)
+            continue
+
+        for mid in chunk:
+            status, body = response.get(mid, (None, "Missing from batch response"))
+            if status == 200:
+                result.messages[mid] = body
+                continue
+            result.failures[mid] = str(body)
+            if status in RETRYABLE_STATUS_CODES:
+                retryable.append(mid)
+
+    return retryable
@@ -0,0 +1,334 @@
+"""
+Gmail Sync Service
+Keeps a local copy of recent inbox message metadata so curated, list and
+standup loads don't refetch the same messages on every call.
+
+The first load seeds the store from `in:inbox` and records the mailbox
+historyId. Later loads call `users.history.list` from that historyId and
+apply only what changed: new messages are hydrated (metadata format),
+label changes are applied in place and deleted messages are dropped. A warm
+inbox costs a single history call, or none at all inside
+GMAIL_SYNC_MIN_INTERVAL_SECONDS.
+
+Stored rows are returned in Gmail's message shape (id, threadId, labelIds,
+snippet, internalDate, payload.headers) so existing parsing code works
+unchanged. Queries the store can't answer from labels alone fall back to
+a live list + batched hydration.
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+
+from sqlalchemy.orm import Session
+from sqlalchemy import Column, String, JSON, DateTime, BigInteger, Text
+
+from app.database import Base
+from app.services.gmail_hydration import hydrate_messages_async, METADATA_HEADERS
+from app.services.google_api_client import GoogleAPIError
+
+logger = logging.getLogger(__name__)
+
+SEED_SIZE = int(os.getenv("GMAIL_SYNC_SEED_SIZE", "200"))
+MIN_SYNC_INTERVAL = timedelta(seconds=int(os.getenv("GMAIL_SYNC_MIN_INTERVAL_SECONDS", "15")))
+
+# Only the headers our endpoints read are kept
+STORED_HEADERS = set(METADATA_HEADERS)
+
+HISTORY_TYPES = ['messageAdded', 'messageDeleted', 'labelAdded', 'labelRemoved']
+
+
+def _in_inbox_category(category_label: Optional[str]) -> Callable[[Set[str]], bool]:
+    """Inbox tab predicate, matching how the routers classify labels"""
+    def matches(labels: Set[str]) -> bool:
+        if 'INBOX' not in labels:
+            return False
+        if category_label is None:
+            # Primary: no CATEGORY_ label other than CATEGORY_PERSONAL
+            return not any(l.startswith('CATEGORY_') for l in labels if l != 'CATEGORY_PERSONAL')
+        return category_label in labels
+    return matches
+
+
+# Gmail queries the store can answer from labels
+QUERY_PREDICATES: Dict[str, Callable[[Set[str]], bool]] = {
+    'category:primary': _in_inbox_category(None),
+    'category:social': _in_inbox_category('CATEGORY_SOCIAL'),
+    'category:promotions': _in_inbox_category('CATEGORY_PROMOTIONS'),
+    'category:updates': _in_inbox_category('CATEGORY_UPDATES'),
+    'category:forums': _in_inbox_category('CATEGORY_FORUMS'),
+    'in:inbox': lambda labels: 'INBOX' in labels,
+}
+
+# Serialises syncs per user within this worker
+_sync_locks: Dict[str, asyncio.Lock] = {}
+
+
+class GmailMessageStore(Base):
+    """Hydrated message metadata, keyed by user + Gmail message ID"""
+    __tablename__ = "gmail_message_store"
+
+    user_email = Column(String, primary_key=True)
+    message_id = Column(String, primary_key=True)
+    thread_id = Column(String, index=True)
+    label_ids = Column(JSON)  # List of Gmail label IDs
+    headers = Column(JSON)  # List of {"name", "value"} (STORED_HEADERS only)
+    snippet = Column(Text)
+    internal_date = Column(BigInteger, index=True)  # Epoch ms, Gmail's internalDate
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class GmailSyncState(Base):
+    """Last mailbox historyId applied to the store for a user"""
+    __tablename__ = "gmail_sync_state"
+
+    user_email = Column(String, primary_key=True)
+    history_id = Column(String)
+    last_full_sync = Column(DateTime)
+    last_synced = Column(DateTime)
+
+
+class GmailSyncEngine:
+    """Incremental Gmail → local store sync for one request"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.duplicate_threads_skipped = 0  # Messages dropped by seen_threads (store reads and live listings)
+
+    async def get_messages(
+        self,
+        google_client,
+        user_email: str,
+        query: str,
+        max_results: int,
+        after: Optional[datetime] = None,
+        seen_threads: Optional[Set[str]] = None,
+        profile: str = 'metadata'
+    ) -> List[Dict]:
+        """
+        Newest-first messages matching a Gmail `query`.
+
+        Served from the synced store when the query is label-based and the
+        caller only needs the `metadata` (or `minimal`) fetch profile;
+        otherwise (or if the store is unavailable) fetched live with `profile`.
+
+        Pass the same `seen_threads` set across calls to keep one message per
+        thread: duplicates are dropped from the lightweight list results, so
+        they are never hydrated (or scored by the caller).
+        """
+        if query in QUERY_PREDICATES and profile in ('metadata', 'minimal'):
+            try:
+                await self.sync(google_client, user_email)
+                messages = self.read_messages(user_email, query, max_results, after=after)
+                return self._drop_seen_threads(messages, seen_threads)
+            except GoogleAPIError:
+                raise
+            except Exception as e:
+                logger.warning(f"Gmail store unavailable for {user_email}, fetching live: {e}")
+                self.db.rollback()
+
+        live_query = query
+        if after:
+            live_query = f"{query} after:{after.strftime('%Y/%m/%d')}"
+        results = await google_client.list_messages(q=live_query, max_results=max_results)
+        refs = self._drop_seen_threads(results.get('messages', []), seen_threads)
+        message_ids = [m['id'] for m in refs]
+        hydrated = await hydrate_messages_async(google_client, message_ids, profile=profile)
+        return hydrated.ordered(message_ids)
+
+    def _drop_seen_threads(self, messages: List[Dict], seen_threads: Optional[Set[str]]) -> List[Dict]:
+        """Keep the first message of each thread not already in `seen_threads` (updated in place)"""
+        if seen_threads is None:
+            return messages
+        kept = []
+        for message in messages:
+            thread_id = message.get('threadId') or message['id']
+            if thread_id in seen_threads:
+                self.duplicate_threads_skipped += 1
+                continue
+            seen_threads.add(thread_id)
+            kept.append(message)
+        return kept
+
+    def read_messages(
+        self,
+        user_email: str,
+        query: str,
+        max_results: int,
+        after: Optional[datetime] = None
+    ) -> List[Dict]:
+        """Read matching messages from the store without touching Gmail"""
+        matches = QUERY_PREDICATES[query]
+        rows = self.db.query(GmailMessageStore).filter(GmailMessageStore.user_email == user_email)
+        if after:
+            rows = rows.filter(GmailMessageStore.internal_date >= int(after.timestamp() * 1000))
+
+        messages = []
+        for row in rows.order_by(GmailMessageStore.internal_date.desc()):
+            if matches(set(row.label_ids or [])):
+                messages.append(_to_gmail_message(row))
+                if len(messages) >= max_results:
+                    break
+        return messages
+
+    async def sync(self, google_client, user_email: str, force: bool = False) -> Dict:
+        """
+        Bring the store up to date.
+
+        Returns:
+            Stats dict: {"mode": "skipped" | "full" | "incremental", ...}
+        """
+        lock = _sync_locks.setdefault(user_email, asyncio.Lock())
+        async with lock:
+            state = self.db.query(GmailSyncState).filter(GmailSyncState.user_email == user_email).first()
+
+            if state and state.history_id and not force:
+                if state.last_synced and datetime.utcnow() - state.last_synced < MIN_SYNC_INTERVAL:
+                    return {"mode": "skipped"}
+                try:
+                    return await self._incremental_sync(google_client, user_email, state)
+                except GoogleAPIError as e:
+                    if e.status_code != 404:
+                        raise
+                    # historyId too old (Gmail keeps roughly a week) - reseed
+                    logger.info(f"History expired for {user_email}, running full Gmail sync")
+
+            return await self._full_sync(google_client, user_email, state)
+
+    async def _full_sync(self, google_client, user_email: str, state: Optional[GmailSyncState]) -> Dict:
+        # Read historyId before listing so changes made during the seed are replayed next time
+        profile = await google_client.get_profile()
+        results = await google_client.list_messages(q='in:inbox', max_results=SEED_SIZE)
+        message_ids = [m['id'] for m in results.get('messages', [])]
+        hydrated = await hydrate_messages_async(google_client, message_ids, profile='metadata')
+
+        self.db.query(GmailMessageStore).filter(GmailMessageStore.user_email == user_email).delete()
+        for message in hydrated.messages.values():
+            self.db.add(_to_row(user_email, message))
+
+        now = datetime.utcnow()
+        if state is None:
+            state = GmailSyncState(user_email=user_email)
+            self.db.add(state)
+        state.history_id = profile.get('historyId')
+        state.last_full_sync = now
+        state.last_synced = now
+        self.db.commit()
+
+        logger.info(f"Full Gmail sync for {user_email}: {len(hydrated.messages)} messages stored")
+        return {"mode": "full", "stored": len(hydrated.messages), "batch_calls": hydrated.batch_calls}
+
+    async def _incremental_sync(self, google_client, user_email: str, state: GmailSyncState) -> Dict:
+        records = []
+        history_id = state.history_id
+        page_token = None
+        while True:
+            response = await google_client.list_history(
+                state.history_id, history_types=HISTORY_TYPES, page_token=page_token
+            )
+            records.extend(response.get('history', []))
+            history_id = response.get('historyId', history_id)
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+
+        touched = {
+            item['message']['id']
+            for record in records
+            for key in ('messagesAdded', 'messagesDeleted', 'labelsAdded', 'labelsRemoved')
+            for item in record.get(key, [])
+        }
+        rows = {}
+        if touched:
+            rows = {
+                row.message_id: row
+                for row in self.db.query(GmailMessageStore).filter(
+                    GmailMessageStore.user_email == user_email,
+                    GmailMessageStore.message_id.in_(touched)
+                )
+            }
+
+        to_fetch: Set[str] = set()
+        deleted: Set[str] = set()
+        for record in records:
+            for item in record.get('messagesAdded', []):
+                message = item['message']
+                if 'INBOX' in message.get('labelIds', []):
+                    to_fetch.add(message['id'])
+                    deleted.discard(message['id'])
+            for item in record.get('messagesDeleted', []):
+                deleted.add(item['message']['id'])
+                to_fetch.discard(item['message']['id'])
+            for key, apply in (('labelsAdded', _add_labels), ('labelsRemoved', _remove_labels)):
+                for item in record.get(key, []):
+                    mid = item['message']['id']
+                    row = rows.get(mid)
+                    if row is not None:
+                        row.label_ids = apply(row.label_ids or [], item.get('labelIds', []))
+                    elif 'INBOX' in item['message'].get('labelIds', []) and mid not in deleted:
+                        # Moved (back) into the inbox - we have no metadata for it yet
+                        to_fetch.add(mid)
+
+        hydrated = await hydrate_messages_async(google_client, list(to_fetch), profile='metadata')
+        for message in hydrated.messages.values():
+            self.db.merge(_to_row(user_email, message))
+
+        for mid in deleted:
+            if mid in rows:
+                self.db.delete(rows[mid])
+
+        state.history_id = history_id
+        state.last_synced = datetime.utcnow()
+        self.db.commit()
+
+        stats = {
+            "mode": "incremental",
+            "history_records": len(records),
+            "added": len(hydrated.messages),
+            "deleted": len(deleted & rows.keys()),
+            "batch_calls": hydrated.batch_calls
+        }
+        if records:
+            logger.info(f"Incremental Gmail sync for {user_email}: {stats}")
+        return stats
+
+
+def _add_labels(current: Iterable[str], added: Iterable[str]) -> List[str]:
+    labels = list(current)
+    labels.extend(label for label in added if label not in labels)
+    return labels
+
+
+def _remove_labels(current: Iterable[str], removed: Iterable[str]) -> List[str]:
+    removed = set(removed)
+    return [label for label in current if label not in removed]
+
+
+def _to_row(user_email: str, message: Dict) -> GmailMessageStore:
+    headers = [
+        {'name': h['name'], 'value': h['value']}
+        for h in message.get('payload', {}).get('headers', [])
+        if h.get('name') in STORED_HEADERS
+    ]
+    return GmailMessageStore(
+        user_email=user_email,
+        message_id=message['id'],
+        thread_id=message.get('threadId'),
+        label_ids=message.get('labelIds', []),
+        headers=headers,
+        snippet=message.get('snippet', ''),
+        internal_date=int(message.get('internalDate') or 0)
+    )
+
+
+def _to_gmail_message(row: GmailMessageStore) -> Dict:
+    return {
+        'id': row.message_id,
+        'threadId': row.thread_id,
+        'labelIds': list(row.label_ids or []),
+        'snippet': row.snippet or '',
+        'internalDate': str(row.internal_date or 0),
+        'payload': {'headers': list(row.headers or [])}
+    }
@@ -0,0 +1,319 @@
+"""
+Async Google API Client
+Non-blocking Gmail and Calendar access for async FastAPI endpoints.
+
+googleapiclient is synchronous - every .execute() inside an `async def`
+endpoint blocks the event loop for the full network wait, stalling every
+other request on the worker. This client calls the same REST endpoints over
+a shared httpx connection pool using the OAuth tokens from
+get_user_credentials, and caps how many calls a single user can have in
+flight so one slow inbox can't monopolise the pool.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import os
+import uuid
+import weakref
+from urllib.parse import urlencode
+
+import httpx
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.google_auth import get_user_credentials
+
+logger = logging.getLogger(__name__)
+
+GMAIL_API_BASE = "https://gmail.googleapis.com/gmail/v1/users/me"
+GMAIL_BATCH_URL = "https://gmail.googleapis.com/batch/gmail/v1"
+CALENDAR_API_BASE = "https://www.googleapis.com/calendar/v3"
+
+USER_CONCURRENCY = int(os.getenv("GOOGLE_API_USER_CONCURRENCY", "4"))
+MAX_CONNECTIONS = int(os.getenv("GOOGLE_API_MAX_CONNECTIONS", "100"))
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("GOOGLE_API_TIMEOUT_SECONDS", "30"))
+
+# Shared across all requests on this worker
+_http_client: Optional[httpx.AsyncClient] = None
+
+# One semaphore per user; entries disappear once no client holds them
+_user_semaphores: "weakref.WeakValueDictionary[str, asyncio.Semaphore]" = weakref.WeakValueDictionary()
+
+
+class GoogleAPIError(Exception):
+    """Error response from a Google REST API"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"Google API error {status_code}: {message}")
+        self.status_code = status_code
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the worker-wide pooled HTTP client"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=REQUEST_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_CONNECTIONS // 2
+            )
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the pooled HTTP client (called on application shutdown)"""
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+
+
+def _get_user_semaphore(user_email: str) -> asyncio.Semaphore:
+    semaphore = _user_semaphores.get(user_email)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(USER_CONCURRENCY)
+        _user_semaphores[user_email] = semaphore
+    return semaphore
+
+
+class AsyncGoogleClient:
+    """Per-user async client for the Gmail and Calendar REST APIs"""
+
+    def __init__(self, user_email: str, credentials):
+        self.user_email = user_email
+        self.credentials = credentials
+        self._semaphore = _get_user_semaphore(user_email)
+
+    @classmethod
+    async def for_user(cls, user_email: str, db: Session = None) -> "AsyncGoogleClient":
+        """
+        Build a client for a user.
+
+        Credential lookup (and a token refresh, if one is due) runs in the
+        threadpool so it doesn't block the event loop either.
+        """
+        credentials = await run_in_threadpool(get_user_credentials, user_email, db)
+        return cls(user_email, credentials)
+
+    # ---------- Gmail ----------
+
+    async def list_messages(
+        self,
+        q: Optional[str] = None,
+        max_results: int = 10,
+        label_ids: Optional[List[str]] = None,
+        page_token: Optional[str] = None
+    ) -> Dict:
+        params = {"maxResults": max_results}
+        if q:
+            params["q"] = q
+        if label_ids:
+            params["labelIds"] = label_ids
+        if page_token:
+            params["pageToken"] = page_token
+        return await self._request("GET", f"{GMAIL_API_BASE}/messages", params=params)
+
+    async def get_message(
+        self,
+        message_id: str,
+        format: str = "full",
+        metadata_headers: Optional[List[str]] = None,
+        fields: Optional[str] = None
+    ) -> Dict:
+        params = _message_params(format, metadata_headers, fields)
+        return await self._request("GET", f"{GMAIL_API_BASE}/messages/{message_id}", params=params)
+
+    async def get_attachment(self, message_id: str, attachment_id: str) -> Dict:
+        """Attachment body ({"size", "data"} with base64url data)"""
+        return await self._request("GET", f"{GMAIL_API_BASE}/messages/{message_id}/attachments/{attachment_id}")
+
+    async def batch_get_messages(
+        self,
+        message_ids: Iterable[str],
+        format: str = "full",
+        metadata_headers: Optional[List[str]] = None,
+        fields: Optional[str] = None
+    ) -> Dict[str, Tuple[int, Any]]:
+        """
+        Fetch up to 100 messages in a single Gmail batch HTTP request.
+
+        Returns:
+            {message_id: (status_code, message_resource_or_error_body)}
+        """
+        query = urlencode(_message_params(format, metadata_headers, fields), doseq=True)
+        items = [(mid, "GET", f"/gmail/v1/users/me/messages/{mid}?{query}") for mid in message_ids]
+        return await self._batch(GMAIL_BATCH_URL, items)
+
+    async def modify_message(
+        self,
+        message_id: str,
+        add_label_ids: Optional[List[str]] = None,
+        remove_label_ids: Optional[List[str]] = None
+    ) -> Dict:
+        body = {}
+        if add_label_ids:
+            body["addLabelIds"] = add_label_ids
+        if remove_label_ids:
+            body["removeLabelIds"] = remove_label_ids
+        return await self._request("POST", f"{GMAIL_API_BASE}/messages/{message_id}/modify", json_body=body)
+
+    async def trash_message(self, message_id: str) -> Dict:
+        return await self._request("POST", f"{GMAIL_API_BASE}/messages/{message_id}/trash")
+
+    async def send_message(self, raw_message: str) -> Dict:
+        return await self._request("POST", f"{GMAIL_API_BASE}/messages/send", json_body={"raw": raw_message})
+
+    async def get_profile(self) -> Dict:
+        return await self._request("GET", f"{GMAIL_API_BASE}/profile")
+
+    async def list_filters(self) -> Dict:
+        return await self._request("GET", f"{GMAIL_API_BASE}/settings/filters")
+
+    async def list_history(
+        self,
+        start_history_id: str,
+        history_types: Optional[List[str]] = None,
+        page_token: Optional[str] = None,
+        max_results: int = 500
+    ) -> Dict:
+        """Mailbox changes since `start_history_id` (raises GoogleAPIError 404 if it has expired)"""
+        params = {"startHistoryId": start_history_id, "maxResults": max_results}
+        if history_types:
+            params["historyTypes"] = history_types
+        if page_token:
+            params["pageToken"] = page_token
+        return await self._request("GET", f"{GMAIL_API_BASE}/history", params=params)
+
+    # ---------- Calendar ----------
+
+    async def list_events(self, calendar_id: str = "primary", **params) -> Dict:
+        return await self._request("GET", f"{CALENDAR_API_BASE}/calendars/{calendar_id}/events", params=params)
+
+    async def list_calendars(self) -> Dict:
+        return await self._request("GET", f"{CALENDAR_API_BASE}/users/me/calendarList")
+
+    # ---------- Transport ----------
+
+    def _auth_headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.credentials.token}"}
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict] = None,
+        json_body: Optional[Dict] = None
+    ) -> Dict:
+        if params:
+            # Calendar/Gmail expect lowercase booleans in query strings
+            params = {k: (str(v).lower() if isinstance(v, bool) else v) for k, v in params.items()}
+
+        async with self._semaphore:
+            response = await get_http_client().request(
+                method, url, params=params, json=json_body, headers=self._auth_headers()
+            )
+
+        if response.status_code >= 400:
+            raise GoogleAPIError(response.status_code, _error_message(response.text))
+        if not response.content:
+            return {}
+        return response.json()
+
+    async def _batch(self, batch_url: str, items: List[Tuple[str, str, str]]) -> Dict[str, Tuple[int, Any]]:
+        """Send (request_id, method, path) items as one multipart/mixed batch request"""
+        if not items:
+            return {}
+
+        boundary = f"batch_{uuid.uuid4().hex}"
+        parts = []
+        for request_id, method, path in items:
+            parts.append(
+                f"--{boundary}\r\n"
+                f"Content-Type: application/http\r\n"
+                f"Content-ID: <{request_id}>\r\n\r\n"
+                f"{method} {path}\r\n\r\n"
+            )
+        body = "".join(parts) + f"--{boundary}--\r\n"
+
+        headers = self._auth_headers()
+        headers["Content-Type"] = f"multipart/mixed; boundary={boundary}"
+
+        async with self._semaphore:
+            response = await get_http_client().post(batch_url, content=body.encode("utf-8"), headers=headers)
+
+        if response.status_code >= 400:
+            raise GoogleAPIError(response.status_code, _error_message(response.text))
+
+        return parse_batch_response(response.headers.get("content-type", ""), response.text)
+
+
+def parse_batch_response(content_type: str, text: str) -> Dict[str, Tuple[int, Any]]:
+    """
+    Split a multipart/mixed batch response into per-request results.
+
+    Each part wraps an HTTP response; Google echoes our Content-ID back as
+    `<response-{request_id}>`.
+    """
+    boundary = None
+    for param in content_type.split(";"):
+        param = param.strip()
+        if param.startswith("boundary="):
+            boundary = param[len("boundary="):].strip('"')
+    if not boundary:
+        raise GoogleAPIError(502, "Batch response missing multipart boundary")
+
+    results = {}
+    text = text.replace("\r\n", "\n")
+    for part in text.split(f"--{boundary}"):
+        part = part.strip("\n")
+        if not part or part.startswith("--"):
+            continue
+
+        outer_headers, _, inner = part.partition("\n\n")
+        request_id = None
+        for line in outer_headers.split("\n"):
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-id":
+                request_id = value.strip().strip("<>")
+                if request_id.startswith("response-"):
+                    request_id = request_id[len("response-"):]
+        if request_id is None:
+            continue
+
+        status_and_headers, _, payload = inner.partition("\n\n")
+        status_line = status_and_headers.split("\n", 1)[0]
+        try:
+            status_code = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            status_code = 502
+
+        payload = payload.strip()
+        try:
+            data = json.loads(payload) if payload else {}
+        except ValueError:
+            data = payload
+        results[request_id] = (status_code, data)
+
+    return results
+
+
+def _message_params(format: str, metadata_headers: Optional[List[str]], fields: Optional[str]) -> Dict:
+    """Query parameters for messages.get (metadataHeaders only applies to format=metadata)"""
+    params = {"format": format}
+    if metadata_headers and format == "metadata":
+        params["metadataHeaders"] = metadata_headers
+    if fields:
+        params["fields"] = fields
+    return params
+
+
+def _error_message(body: str) -> str:
+    """Pull the human-readable message out of a Google error body"""
+    try:
+        return json.loads(body)["error"]["message"]
+    except Exception:
+        return body[:200]
@@ -0,0 +1,182 @@
+"""
+LLM Micro-Batching
+Coalesces small JSON-scoring requests from concurrent callers (usually
+different users) into one multi-request prompt.
+
+Under load, many "score these few messages" calls arrive within a few
+milliseconds of each other. Callers that pass `batch=True` to
+LLMRouter.complete are held for up to LLM_BATCH_WINDOW_MS; requests with the
+same task type, model, system prompt and temperature are sent as one prompt
+with each request fenced off and answered separately, and the combined JSON
+reply is split back per caller. One provider call (one RPM slot, one
+request overhead) then serves up to LLM_BATCH_MAX_REQUESTS callers.
+
+A batch also closes early when it would exceed the model's output limit
+(the sum of the callers' max_tokens) or LLM_BATCH_MAX_INPUT_TOKENS. Any
+request whose answer is missing or unparseable in the combined reply is
+re-run on its own, so callers always get the same kind of answer they
+would have got unbatched. Only use batch=True for prompts that ask for a
+JSON answer.
+
+Only BATCHABLE_TASK_TYPES are ever batched: reasoning-tier prompts are long
+and have large outputs, so a few of them would fill a batch's budgets and
+one unparseable combined reply would re-run every one of them.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import os
+import re
+
+from app.services.llm_prompts import PromptInput, prompt_text
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENABLED = os.getenv("LLM_BATCH_ENABLED", "true").lower() != "false"
+BATCH_WINDOW_MS = float(os.getenv("LLM_BATCH_WINDOW_MS", "20"))
+BATCH_MAX_REQUESTS = int(os.getenv("LLM_BATCH_MAX_REQUESTS", "8"))
+BATCH_MAX_INPUT_TOKENS = int(os.getenv("LLM_BATCH_MAX_INPUT_TOKENS", "24000"))
+
+# batch=True is ignored for every other task type
+BATCHABLE_TASK_TYPES = ("fast", "light")
+
+# Scheduler lane for shared batch calls, which serve several users at once.
+# It has its own concurrency limit instead of LLM_USER_CONCURRENCY
+BATCH_USER_ID = "_batch"
+BATCH_CONCURRENCY = int(os.getenv("LLM_BATCH_CONCURRENCY", "16"))
+
+BATCH_HEADER = "You are answering {count} independent requests in one reply."
+_REQUEST_PATTERN = re.compile(r"=== REQUEST (\d+) ===\n(.*?)\n=== END REQUEST \1 ===", re.DOTALL)
+
+
+def build_batch_prompt(prompts: List[str]) -> str:
+    """One prompt that asks for every request's JSON answer, keyed by request number"""
+    sections = "\n\n".join(
+        f"=== REQUEST {i} ===\n{prompt}\n=== END REQUEST {i} ===" for i, prompt in enumerate(prompts)
+    )
+    return f"""{BATCH_HEADER.format(count=len(prompts))} They come from unrelated contexts: answer each one using only its own text, exactly as if it had been sent alone, and never mix details between requests.
+
+{sections}
+
+Reply with ONLY a JSON object of this form, with one entry per request, where "response" is the JSON value that request asks for:
+{{"responses": [{{"request": 0, "response": ...}}, {{"request": 1, "response": ...}}]}}"""
+
+
+def batch_prompt_parts(prompt: str) -> Optional[List[str]]:
+    """The individual prompts inside a build_batch_prompt() prompt, or None if it isn't one"""
+    if not prompt.startswith("You are answering ") or "=== REQUEST 0 ===" not in prompt:
+        return None
+    return [body for _, body in _REQUEST_PATTERN.findall(prompt)]
+
+
+def split_batch_response(text: str, count: int) -> List[Optional[str]]:
+    """Each request's answer as JSON text (None where it is missing or malformed)"""
+    answers: List[Optional[str]] = [None] * count
+    start, end = text.find("{"), text.rfind("}") + 1
+    if start == -1 or end <= start:
+        return answers
+    try:
+        entries = json.loads(text[start:end]).get("responses", [])
+    except (ValueError, AttributeError):
+        return answers
+    if not isinstance(entries, list):
+        return answers
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        index = entry.get("request")
+        if isinstance(index, int) and 0 <= index < count and "response" in entry:
+            response = entry["response"]
+            answers[index] = response if isinstance(response, str) else json.dumps(response)
+    return answers
+
+
+class BatchRequest:
+    """
+    One caller waiting in a batch.
+
+    `prompt` is kept as the caller passed it (PromptSegments keep their
+    cache breakpoints) for when the request is sent on its own; `text` is
+    what goes into a combined prompt.
+    """
+
+    def __init__(self, prompt: PromptInput, max_tokens: int, input_tokens: int, user_id: Optional[str], hedge: bool):
+        self.prompt = prompt
+        self.text = prompt_text(prompt)
+        self.max_tokens = max_tokens
+        self.input_tokens = input_tokens
+        self.user_id = user_id
+        self.hedge = hedge
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class _OpenBatch:
+    def __init__(self, output_limit: int):
+        self.requests: List[BatchRequest] = []
+        self.output_limit = output_limit
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    def fits(self, request: BatchRequest) -> bool:
+        return (
+            sum(r.max_tokens for r in self.requests) + request.max_tokens <= self.output_limit and
+            sum(r.input_tokens for r in self.requests) + request.input_tokens <= BATCH_MAX_INPUT_TOKENS
+        )
+
+
+class MicroBatcher:
+    """
+    Collects BatchRequests per key and hands each closed batch to `run_batch`,
+    which must resolve every request's future.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[Tuple, List[BatchRequest]], Awaitable[None]],
+        window_ms: float = BATCH_WINDOW_MS,
+        max_requests: int = BATCH_MAX_REQUESTS
+    ):
+        self.run_batch = run_batch
+        self.window = window_ms / 1000
+        self.max_requests = max_requests
+        self._open: Dict[Tuple, _OpenBatch] = {}
+        self._running: set = set()
+
+    async def submit(self, key: Tuple, request: BatchRequest, output_limit: int) -> Dict[str, Any]:
+        """Add a request to the open batch for `key` and wait for its result"""
+        batch = self._open.get(key)
+        if batch is not None and not batch.fits(request):
+            self._close(key)
+            batch = None
+        if batch is None:
+            batch = _OpenBatch(output_limit)
+            batch.timer = asyncio.get_running_loop().call_later(self.window, self._close, key)
+            self._open[key] = batch
+
+        batch.requests.append(request)
+        if len(batch.requests) >= self.max_requests:
+            self._close(key)
+        return await request.future
+
+    def _close(self, key: Tuple):
+        batch = self._open.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        task = asyncio.create_task(self._run(key, batch.requests))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, key: Tuple, requests: List[BatchRequest]):
+        live = [r for r in requests if not r.future.done()]
+        if not live:
+            return
+        try:
+            await self.run_batch(key, live)
+        except Exception as e:
+            logger.error(f"LLM batch of {len(live)} failed: {e}")
+            for request in live:
+                if not request.future.done():
+                    request.future.set_exception(e)
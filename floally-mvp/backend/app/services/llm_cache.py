@@ -0,0 +1,226 @@
+"""
+LLM Completion Cache
+Reuses completions for identical requests instead of calling the model again.
+
+Re-opening the same message for a summary, refreshing the standup analysis
+or retrying a draft sends exactly the same prompt to the same model. The
+router looks each request up here first, keyed by a hash of task type,
+resolved provider/model, system prompt, normalized prompt, temperature and
+max_tokens.
+
+Two tiers are checked in order:
+- MemoryCacheTier: per-worker LRU, no I/O
+- SQLCacheTier: llm_completion_cache table, shared by every worker and
+  surviving restarts (hits are copied back into memory)
+
+Entries expire after a per-task TTL (LLM_CACHE_TTLS); a TTL of 0 disables
+caching for that task type. Callers that want a fresh generation each time
+pass `cache=False` to LLMRouter.complete.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from sqlalchemy import Column, String, JSON, DateTime
+from starlette.concurrency import run_in_threadpool
+
+from app.database import Base, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() != "false"
+MEMORY_CACHE_SIZE = int(os.getenv("LLM_CACHE_MEMORY_SIZE", "512"))
+
+# Seconds a completion stays valid, per task type
+LLM_CACHE_TTLS: Dict[str, int] = {
+    "fast": 6 * 3600,
+    "reasoning": 3600,
+    "strategic": 3600,
+    "light": 6 * 3600,
+    "simple_generation": 0,  # Creative output - callers expect variety
+}
+DEFAULT_TTL_SECONDS = 3600
+
+
+class LLMCompletionCache(Base):
+    """Persistent completion cache shared across workers"""
+    __tablename__ = "llm_completion_cache"
+
+    cache_key = Column(String, primary_key=True)  # sha256 of the request
+    task_type = Column(String, index=True)
+    model = Column(String)
+    response = Column(JSON)  # LLMRouter.complete result dict
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, index=True)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Drop leading/trailing blank space and trailing spaces on each line"""
+    return "\n".join(line.rstrip() for line in (prompt or "").strip().splitlines())
+
+
+def make_cache_key(
+    task_type: str,
+    provider: str,
+    model: str,
+    system_prompt: Optional[str],
+    prompt: str,
+    temperature: float,
+    max_tokens: int
+) -> str:
+    payload = json.dumps(
+        [task_type, provider, model, normalize_prompt(system_prompt or ""),
+         normalize_prompt(prompt), float(temperature), int(max_tokens)],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def ttl_for_task(task_type: str) -> int:
+    return LLM_CACHE_TTLS.get(task_type, DEFAULT_TTL_SECONDS)
+
+
+class MemoryCacheTier:
+    """In-process LRU of {key: (expires_at, response)}"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = MEMORY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[Tuple[datetime, Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= datetime.utcnow():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    async def set(self, key: str, response: Dict[str, Any], ttl_seconds: int, task_type: str, model: str):
+        with self._lock:
+            self._entries[key] = (datetime.utcnow() + timedelta(seconds=ttl_seconds), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLCacheTier:
+    """llm_completion_cache table; DB work runs in the threadpool"""
+
+    name = "sql"
+
+    def __init__(self, session_factory: Optional[Callable] = None):
+        self.session_factory = session_factory or SessionLocal
+
+    async def get(self, key: str) -> Optional[Tuple[datetime, Dict[str, Any]]]:
+        if self.session_factory is None:
+            return None
+        return await run_in_threadpool(self._get, key)
+
+    async def set(self, key: str, response: Dict[str, Any], ttl_seconds: int, task_type: str, model: str):
+        if self.session_factory is None:
+            return
+        await run_in_threadpool(self._set, key, response, ttl_seconds, task_type, model)
+
+    def _get(self, key: str) -> Optional[Tuple[datetime, Dict[str, Any]]]:
+        db = self.session_factory()
+        try:
+            row = db.query(LLMCompletionCache).filter(LLMCompletionCache.cache_key == key).first()
+            if row is None:
+                return None
+            if row.expires_at and row.expires_at <= datetime.utcnow():
+                db.delete(row)
+                db.commit()
+                return None
+            return row.expires_at, row.response
+        finally:
+            db.close()
+
+    def _set(self, key: str, response: Dict[str, Any], ttl_seconds: int, task_type: str, model: str):
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            db.merge(LLMCompletionCache(
+                cache_key=key,
+                task_type=task_type,
+                model=model,
+                response=response,
+                created_at=now,
+                expires_at=now + timedelta(seconds=ttl_seconds)
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+class CompletionCache:
+    """
+    Read-through cache over an ordered list of tiers.
+
+    Tiers implement async get(key) -> (expires_at, response) | None and
+    set(key, response, ttl_seconds, task_type, model). A hit in a lower tier
+    is copied into the tiers above it for its remaining lifetime. Tier errors
+    are logged and treated as misses - the cache must never fail a completion.
+    """
+
+    def __init__(self, tiers: Optional[List] = None):
+        self.tiers = tiers if tiers is not None else [MemoryCacheTier(), SQLCacheTier()]
+        self.stats = {"hits": 0, "misses": 0, "stores": 0}
+        for tier in self.tiers:
+            self.stats[f"{tier.name}_hits"] = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        for index, tier in enumerate(self.tiers):
+            try:
+                entry = await tier.get(key)
+            except Exception as e:
+                logger.warning(f"LLM cache tier '{tier.name}' read failed: {e}")
+                continue
+            if entry is not None:
+                expires_at, response = entry
+                self.stats["hits"] += 1
+                self.stats[f"{tier.name}_hits"] += 1
+                remaining = int((expires_at - datetime.utcnow()).total_seconds())
+                for upper in self.tiers[:index]:
+                    try:
+                        await upper.set(key, response, remaining, "", response.get("model", ""))
+                    except Exception as e:
+                        logger.warning(f"LLM cache tier '{upper.name}' backfill failed: {e}")
+                return response
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, response: Dict[str, Any], task_type: str):
+        ttl_seconds = ttl_for_task(task_type)
+        if ttl_seconds <= 0:
+            return
+        self.stats["stores"] += 1
+        for tier in self.tiers:
+            try:
+                await tier.set(key, response, ttl_seconds, task_type, response.get("model", ""))
+            except Exception as e:
+                logger.warning(f"LLM cache tier '{tier.name}' write failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0
+        }
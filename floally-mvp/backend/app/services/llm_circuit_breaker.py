@@ -0,0 +1,158 @@
+"""
+LLM Circuit Breakers
+Per provider/model health tracking for LLMRouter.
+
+Without a breaker, every request during a provider outage waits for the
+failing call (often a full timeout) before falling back. Each breaker keeps
+a rolling window of recent outcomes; once enough calls in the window fail,
+or are slower than SLOW_CALL_SECONDS, the circuit opens and the router
+skips that provider/model immediately. After OPEN_SECONDS the circuit goes
+half-open and lets a single probe through: success closes it, failure
+re-opens it.
+"""
+
+from typing import Dict, Optional, Tuple
+from collections import deque
+import logging
+import os
+import threading
+import time
+
+WINDOW_SECONDS = float(os.getenv("LLM_BREAKER_WINDOW_SECONDS", "60"))
+MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "5"))
+ERROR_RATE_THRESHOLD = float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5"))
+SLOW_CALL_SECONDS = float(os.getenv("LLM_BREAKER_SLOW_CALL_SECONDS", "30"))
+OPEN_SECONDS = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30"))
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Rolling-window breaker for one provider/model"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.trips = 0
+        # (timestamp, failed, latency_seconds)
+        self._calls: deque = deque()
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        """Whether routing should consider this provider (does not claim the probe)"""
+        with self._lock:
+            self._advance()
+            return self.state == CLOSED or (self.state == HALF_OPEN and not self.probe_in_flight)
+
+    def allow_request(self) -> bool:
+        """Claim permission to call; in half-open state only one probe is allowed"""
+        with self._lock:
+            self._advance()
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self, latency: float):
+        self._record(failed=latency > SLOW_CALL_SECONDS, latency=latency)
+
+    def record_failure(self, latency: float):
+        self._record(failed=True, latency=latency)
+
+    def latency_percentile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        """Latency of successful calls in the window at quantile q (None if too few samples)"""
+        with self._lock:
+            self._trim(time.monotonic())
+            latencies = sorted(latency for _, failed, latency in self._calls if not failed)
+        if len(latencies) < min_samples:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    def release_probe(self):
+        """Give up a claimed half-open probe without recording an outcome"""
+        with self._lock:
+            self.probe_in_flight = False
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            self._advance()
+            calls = len(self._calls)
+            failures = sum(1 for _, failed, _ in self._calls if failed)
+            latencies = sorted(latency for _, _, latency in self._calls)
+            return {
+                "state": self.state,
+                "calls": calls,
+                "error_rate": round(failures / calls, 3) if calls else 0.0,
+                "p95_latency_seconds": round(latencies[int(0.95 * (calls - 1))], 3) if calls else None,
+                "trips": self.trips
+            }
+
+    def _record(self, failed: bool, latency: float):
+        with self._lock:
+            now = time.monotonic()
+            if self.state == HALF_OPEN and self.probe_in_flight:
+                self.probe_in_flight = False
+                if failed:
+                    self._open(now)
+                else:
+                    self.state = CLOSED
+                    self._calls.clear()
+                return
+
+            self._calls.append((now, failed, latency))
+            self._trim(now)
+            if self.state == CLOSED and len(self._calls) >= MIN_CALLS:
+                failures = sum(1 for _, f, _ in self._calls if f)
+                if failures / len(self._calls) >= ERROR_RATE_THRESHOLD:
+                    self._open(now)
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self.opened_at = now
+        self.trips += 1
+        logger.warning(f"LLM circuit opened for {self.name}")
+
+    def _advance(self):
+        now = time.monotonic()
+        if self.state == OPEN and now - self.opened_at >= OPEN_SECONDS:
+            self.state = HALF_OPEN
+            self.probe_in_flight = False
+        self._trim(now)
+
+    def _trim(self, now: float):
+        while self._calls and now - self._calls[0][0] > WINDOW_SECONDS:
+            self._calls.popleft()
+
+
+class BreakerRegistry:
+    """Breakers keyed by (provider, model), created on first use"""
+
+    def __init__(self):
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str, model: str) -> CircuitBreaker:
+        key = (provider, model)
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(f"{provider}/{model}")
+                self._breakers[key] = breaker
+            return breaker
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.snapshot() for breaker in breakers}
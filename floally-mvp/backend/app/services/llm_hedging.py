@@ -0,0 +1,87 @@
+"""
+LLM Request Hedging
+Budget and delay policy for hedged completions in LLMRouter.
+
+A hedged completion starts on the primary provider; if it hasn't answered
+after the primary's recent HEDGE_PERCENTILE latency, the same request is
+sent to the fallback provider and whichever answers first wins (the other
+is cancelled). Only the slow tail pays for a second call, and each task
+type may hedge at most its HEDGE_BUDGETS share of requests in a rolling
+window, so the extra cost stays bounded.
+"""
+
+from typing import Dict, Optional
+from collections import deque
+import os
+import threading
+import time
+
+HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.9"))
+HEDGE_DEFAULT_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_SECONDS", "4"))
+HEDGE_MIN_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "0.5"))
+HEDGE_MIN_SAMPLES = 10
+HEDGE_WINDOW_SECONDS = 300
+
+# Max share of a task type's hedge-enabled requests that may send a second call
+HEDGE_BUDGETS: Dict[str, float] = {
+    "fast": 0.2,
+    "light": 0.2,
+    "reasoning": 0.1,
+    "strategic": 0.05,
+    "simple_generation": 0.0,
+}
+DEFAULT_HEDGE_BUDGET = 0.1
+
+
+def hedge_delay(latency_percentile: Optional[float]) -> float:
+    """Seconds to wait on the primary before hedging"""
+    if latency_percentile is None:
+        return HEDGE_DEFAULT_DELAY_SECONDS
+    return max(HEDGE_MIN_DELAY_SECONDS, latency_percentile)
+
+
+class HedgeBudget:
+    """Rolling per-task count of hedge-enabled requests vs. hedges actually fired"""
+
+    def __init__(self, budgets: Optional[Dict[str, float]] = None):
+        self.budgets = budgets if budgets is not None else HEDGE_BUDGETS
+        self._requests: Dict[str, deque] = {}
+        self._hedges: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record_request(self, task_type: str):
+        with self._lock:
+            self._requests.setdefault(task_type, deque()).append(time.monotonic())
+
+    def try_spend(self, task_type: str) -> bool:
+        """Claim a hedge for this task type if it is within budget"""
+        ratio = self.budgets.get(task_type, DEFAULT_HEDGE_BUDGET)
+        if ratio <= 0:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            requests = self._trim(self._requests.setdefault(task_type, deque()), now)
+            hedges = self._trim(self._hedges.setdefault(task_type, deque()), now)
+            # +1 lets the first slow request of a quiet period hedge
+            if len(hedges) >= int(ratio * len(requests)) + 1:
+                return False
+            hedges.append(now)
+            return True
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                task_type: {
+                    "requests": len(self._trim(self._requests.get(task_type, deque()), now)),
+                    "hedges": len(self._trim(self._hedges.get(task_type, deque()), now)),
+                    "budget": self.budgets.get(task_type, DEFAULT_HEDGE_BUDGET)
+                }
+                for task_type in self._requests
+            }
+
+    @staticmethod
+    def _trim(events: deque, now: float) -> deque:
+        while events and now - events[0] > HEDGE_WINDOW_SECONDS:
+            events.popleft()
+        return events
@@ -0,0 +1,79 @@
+"""
+Structured LLM Prompts
+Lets callers mark which parts of a prompt repeat across calls, so providers
+can serve them from their prompt caches.
+
+A PromptSegments prompt is sent as three parts, in order:
+- instructions: the fixed task/format block, identical for every call
+- user_context: profile details that repeat across one user's calls
+- data: what this call is about (messages, events, descriptions)
+
+Callers pass it to LLMRouter.complete()/stream() in place of a string.
+Each provider gets it in the form its cache understands:
+- Anthropic: one content block per segment, with a cache breakpoint after
+  the instructions and after the user context
+- OpenAI: the joined text, cached automatically by prefix; a
+  prompt_cache_key of the instructions and user context routes calls that
+  share them to the same cache
+- Gemini: the joined text (implicit prefix caching)
+
+Cache reads and writes come back in the provider's usage metadata and are
+priced separately (see llm_tokens.estimate_cost). Completion-cache keys,
+token counts and micro-batched prompts use the joined text. A prompt
+trimmed by fit_request is sent as plain text.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Union
+import hashlib
+
+ANTHROPIC_CACHE_CONTROL = {"type": "ephemeral"}
+
+
+@dataclass(frozen=True)
+class PromptSegments:
+    """A prompt split by how often each part changes"""
+    instructions: str = ""
+    user_context: str = ""
+    data: str = ""
+
+    def parts(self) -> List[str]:
+        return [part for part in (self.instructions, self.user_context, self.data) if part]
+
+    def __str__(self) -> str:
+        return "\n\n".join(self.parts())
+
+
+PromptInput = Union[str, PromptSegments]
+
+
+def prompt_text(prompt: PromptInput) -> str:
+    """The prompt as one string"""
+    return str(prompt)
+
+
+def anthropic_content(prompt: PromptInput) -> Union[str, List[Dict[str, Any]]]:
+    """Message content with cache breakpoints after the repeated segments"""
+    if not isinstance(prompt, PromptSegments):
+        return prompt
+    blocks = []
+    for text, cacheable in (
+        (prompt.instructions, True),
+        (prompt.user_context, True),
+        (prompt.data, False)
+    ):
+        if not text:
+            continue
+        block: Dict[str, Any] = {"type": "text", "text": text}
+        if cacheable:
+            block["cache_control"] = ANTHROPIC_CACHE_CONTROL
+        blocks.append(block)
+    return blocks
+
+
+def cache_prefix_key(prompt: PromptInput) -> Optional[str]:
+    """Stable key for the prompt's cacheable prefix (None for plain prompts)"""
+    if not isinstance(prompt, PromptSegments) or not (prompt.instructions or prompt.user_context):
+        return None
+    prefix = f"{prompt.instructions}\x00{prompt.user_context}"
+    return hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:32]
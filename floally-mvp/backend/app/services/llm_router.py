@@ -3,12 +3,31 @@ LLM Router Service
 Intelligently routes requests to the best model based on task type, cost, and quality needs.
 Provides fallback between Anthropic, OpenAI, and Google Gemini for redundancy.
 """
-from typing import Optional, Dict, Any, Literal
+from typing import Optional, Dict, Any, List, Literal, AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from functools import partial
+import asyncio
+import time
 import anthropic
 import openai
+import httpx
 import os
 from datetime import datetime
 
+from app.services.llm_cache import CompletionCache, CACHE_ENABLED, make_cache_key
+from app.services.llm_circuit_breaker import BreakerRegistry, CircuitOpenError
+from app.services.llm_hedging import HedgeBudget, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES, hedge_delay
+from app.services.llm_scheduler import LLMScheduler
+from app.services.llm_tokens import count_tokens, estimate_cost, fit_request, model_spec
+from app.services.llm_usage_ledger import UsageLedger, LEDGER_ENABLED, current_endpoint
+from app.services.llm_stub import StubProvider, STUB_MODE
+from app.services.llm_prompts import PromptInput, prompt_text, anthropic_content, cache_prefix_key
+from app.services.llm_batching import (
+    MicroBatcher, BatchRequest, BATCH_ENABLED, BATCHABLE_TASK_TYPES, BATCH_USER_ID, BATCH_CONCURRENCY,
+    build_batch_prompt, split_batch_response
+)
+
 # Import Gemini (optional - graceful degradation if not installed)
 try:
     import google.generativeai as genai
@@ -17,7 +36,89 @@ except ImportError:
     GEMINI_AVAILABLE = False
     print("ℹ️ google-generativeai not installed - Gemini support disabled")
 
-TaskType = Literal["fast", "reasoning", "strategic", "simple_generation"]
+TaskType = Literal["fast", "reasoning", "strategic", "simple_generation", "light"]
+
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "50"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+GEMINI_THREAD_POOL_SIZE = int(os.getenv("GEMINI_THREAD_POOL_SIZE", "8"))
+
+# Errors caused by the request itself rather than provider health
+CLIENT_ERRORS = (anthropic.BadRequestError, openai.BadRequestError)
+
+
+# Task-specific configurations (pricing and limits live in llm_tokens.MODEL_SPECS)
+TASK_CONFIGS: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "fast": {
+        "primary": {
+            "provider": "gemini",
+            "model": "gemini-2.5-flash",  # Latest Gemini 2.5 (faster & better)
+            "max_tokens": 1000,
+            "temperature": 0.3
+        },
+        "fallback": {
+            "provider": "openai",
+            "model": "gpt-4o-mini",
+            "max_tokens": 1000,
+            "temperature": 0.3
+        }
+    },
+    "reasoning": {
+        "primary": {
+            "provider": "anthropic",
+            "model": "claude-sonnet-4-20250514",  # Latest Sonnet 4 model
+            "max_tokens": 4000,
+            "temperature": 0.3
+        },
+        "fallback": {
+            "provider": "openai",
+            "model": "gpt-4o",
+            "max_tokens": 4000,
+            "temperature": 0.3
+        }
+    },
+    "strategic": {
+        "primary": {
+            "provider": "anthropic",
+            "model": "claude-sonnet-4-20250514",  # Latest Sonnet 4 model
+            "max_tokens": 4000,
+            "temperature": 0.4
+        },
+        "fallback": {
+            "provider": "openai",
+            "model": "gpt-4o",
+            "max_tokens": 4000,
+            "temperature": 0.4
+        }
+    },
+    "simple_generation": {
+        "primary": {
+            "provider": "gemini",
+            "model": "gemini-2.5-flash",  # Latest Gemini 2.5 (faster & better)
+            "max_tokens": 1000,
+            "temperature": 0.7
+        },
+        "fallback": {
+            "provider": "openai",
+            "model": "gpt-4o-mini",
+            "max_tokens": 1000,
+            "temperature": 0.7
+        }
+    },
+    "light": {
+        "primary": {
+            "provider": "anthropic",
+            "model": "claude-3-haiku-20240307",
+            "max_tokens": 1000,
+            "temperature": 1.0  # Anthropic's default, as Haiku callers have always used
+        },
+        "fallback": {
+            "provider": "openai",
+            "model": "gpt-4o-mini",
+            "max_tokens": 1000,
+            "temperature": 1.0
+        }
+    }
+}
 
 
 class LLMRouter:
@@ -25,10 +126,17 @@ class LLMRouter:
     Smart LLM routing with cost optimization and redundancy.
     
     Strategy:
-    - Fast/high-volume tasks: Gemini Flash (50% cheaper than GPT-4o-mini!)
+    - Fast/high-volume tasks: Gemini Flash
     - Reasoning tasks: Claude Sonnet 3.5 (best quality)
     - Strategic tasks: Claude Sonnet 3.5 or o1 (rare use)
+    - Light tasks: Claude Haiku (summaries, drafts, short JSON analyses)
     - Fallback: Switch provider if primary fails
+    - Circuit breakers: skip a provider/model that is currently failing
+    - Scheduler: stay inside provider RPM/TPM limits, queue fairly per user
+    - Stub mode (LLM_STUB_MODE): answer every call locally for load tests/CI
+    - Micro-batching: concurrent JSON scoring calls share one provider request
+    - Prompt caching: PromptSegments prompts reuse the providers' cached prefixes
+    - Streaming: stream() yields text deltas with the same routing and fallback
     """
     
     def __init__(self):
@@ -36,9 +144,23 @@ class LLMRouter:
         self.openai_key = os.getenv("OPENAI_API_KEY")
         self.gemini_key = os.getenv("GEMINI_API_KEY")
         
+        # Async clients share one pooled HTTP client, so completions don't block
+        # the event loop and each call reuses warm TLS connections
+        self.http_client = httpx.AsyncClient(
+            timeout=LLM_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_CONNECTIONS // 2
+            )
+        )
+        
         # Initialize clients if keys available
-        self.anthropic_client = anthropic.Anthropic(api_key=self.anthropic_key) if self.anthropic_key else None
-        self.openai_client = openai.OpenAI(api_key=self.openai_key) if self.openai_key else None
+        self.anthropic_client = anthropic.AsyncAnthropic(
+            api_key=self.anthropic_key, http_client=self.http_client
+        ) if self.anthropic_key else None
+        self.openai_client = openai.AsyncOpenAI(
+            api_key=self.openai_key, http_client=self.http_client
+        ) if self.openai_key else None
         
         # Initialize Gemini if available
         if GEMINI_AVAILABLE and self.gemini_key:
@@ -47,14 +169,47 @@ class LLMRouter:
         else:
             self.gemini_available = False
         
+        # Completion cache (memory LRU + SQL); None disables caching
+        self.cache: Optional[CompletionCache] = CompletionCache() if CACHE_ENABLED else None
+        
+        # Health per provider/model - open circuits are skipped when routing
+        self.breakers = BreakerRegistry()
+        self.hedge_budget = HedgeBudget()
+        
+        # Rate limits (RPM/TPM), concurrency caps and fair queueing
+        self.scheduler = LLMScheduler(lane_concurrency={BATCH_USER_ID: BATCH_CONCURRENCY})
+        
+        # Persistent per-completion usage/cost rows; None disables the ledger
+        self.ledger: Optional[UsageLedger] = UsageLedger() if LEDGER_ENABLED else None
+        
+        # Local stand-in for every provider (offline benchmarks and load tests)
+        self.stub: Optional[StubProvider] = StubProvider() if STUB_MODE else None
+        if self.stub is not None:
+            print("🧪 LLM stub mode - provider calls are answered locally")
+        
+        # Coalesces concurrent batch=True calls; None sends them individually
+        self.batcher: Optional[MicroBatcher] = MicroBatcher(self._run_batch) if BATCH_ENABLED else None
+        
+        # Only used if this google-generativeai has no generate_content_async
+        self._gemini_executor: Optional[ThreadPoolExecutor] = None
+        
         # Track usage for monitoring
         self.usage_stats = {
             "anthropic_calls": 0,
             "openai_calls": 0,
             "gemini_calls": 0,
-            "fallback_count": 0
+            "fallback_count": 0,
+            "hedged_requests": 0,
+            "hedge_wins": 0,
+            "batches": 0,
+            "batched_requests": 0,
+            "batch_retries": 0
         }
     
+    def is_configured(self) -> bool:
+        """True if at least one provider has an API key (or stub mode is on)"""
+        return bool(self.stub or self.anthropic_client or self.openai_client or self.gemini_available)
+    
     def get_model_for_task(
         self, 
         task_type: TaskType,
@@ -68,133 +223,91 @@ class LLMRouter:
                 "provider": "anthropic" | "openai" | "gemini",
                 "model": "model-name",
                 "max_tokens": int,
-                "temperature": float,
-                "cost_estimate": float  # per 1M tokens
+                "temperature": float
             }
         """
         
-        # Task-specific configurations with Gemini as cheapest fast option
-        configs = {
-            "fast": {
-                "primary": {
-                    "provider": "gemini",
-                    "model": "gemini-2.5-flash",  # Latest Gemini 2.5 (faster & better)
-                    "max_tokens": 1000,
-                    "temperature": 0.3,
-                    "cost_per_1m_tokens": 0.075  # 50% cheaper than GPT-4o-mini!
-                },
-                "fallback": {
-                    "provider": "openai",
-                    "model": "gpt-4o-mini",
-                    "max_tokens": 1000,
-                    "temperature": 0.3,
-                    "cost_per_1m_tokens": 0.15
-                }
-            },
-            "reasoning": {
-                "primary": {
-                    "provider": "anthropic",
-                    "model": "claude-sonnet-4-20250514",  # Latest Sonnet 4 model
-                    "max_tokens": 4000,
-                    "temperature": 0.3,
-                    "cost_per_1m_tokens": 3.0
-                },
-                "fallback": {
-                    "provider": "openai",
-                    "model": "gpt-4o",
-                    "max_tokens": 4000,
-                    "temperature": 0.3,
-                    "cost_per_1m_tokens": 2.5
-                }
-            },
-            "strategic": {
-                "primary": {
-                    "provider": "anthropic",
-                    "model": "claude-sonnet-4-20250514",  # Latest Sonnet 4 model
-                    "max_tokens": 4000,
-                    "temperature": 0.4,
-                    "cost_per_1m_tokens": 3.0
-                },
-                "fallback": {
-                    "provider": "openai",
-                    "model": "gpt-4o",
-                    "max_tokens": 4000,
-                    "temperature": 0.4,
-                    "cost_per_1m_tokens": 2.5
-                }
-            },
-            "simple_generation": {
-                "primary": {
-                    "provider": "gemini",
-                    "model": "gemini-2.5-flash",  # Latest Gemini 2.5 (faster & better)
-                    "max_tokens": 1000,
-                    "temperature": 0.7,
-                    "cost_per_1m_tokens": 0.075  # Cheapest option!
-                },
-                "fallback": {
-                    "provider": "openai",
-                    "model": "gpt-4o-mini",
-                    "max_tokens": 1000,
-                    "temperature": 0.7,
-                    "cost_per_1m_tokens": 0.15
-                }
-            }
-        }
-        
-        task_config = configs.get(task_type, configs["reasoning"])
-        
-        # Use preferred provider if specified and available
-        if prefer_provider:
-            if prefer_provider == "gemini" and self.gemini_available:
-                return task_config["primary"] if task_config["primary"]["provider"] == "gemini" else task_config["fallback"]
-            elif prefer_provider == "anthropic" and self.anthropic_client:
-                return task_config["primary"] if task_config["primary"]["provider"] == "anthropic" else task_config["fallback"]
-            elif prefer_provider == "openai" and self.openai_client:
-                return task_config["primary"] if task_config["primary"]["provider"] == "openai" else task_config["fallback"]
-        
-        # Default: use primary if available, otherwise fallback
+        task_config = TASK_CONFIGS.get(task_type, TASK_CONFIGS["reasoning"])
         primary = task_config["primary"]
         fallback = task_config["fallback"]
         
-        # Check primary provider availability
-        if primary["provider"] == "gemini" and self.gemini_available:
-            return primary
-        elif primary["provider"] == "anthropic" and self.anthropic_client:
-            return primary
-        elif primary["provider"] == "openai" and self.openai_client:
-            return primary
+        # Use preferred provider if specified, available and its circuit isn't open
+        if prefer_provider and self._provider_configured(prefer_provider):
+            preferred = primary if primary["provider"] == prefer_provider else fallback
+            if self._is_routable(preferred):
+                return preferred
         
-        # Try fallback providers
-        if fallback["provider"] == "gemini" and self.gemini_available:
-            self.usage_stats["fallback_count"] += 1
-            return fallback
-        elif fallback["provider"] == "anthropic" and self.anthropic_client:
-            self.usage_stats["fallback_count"] += 1
-            return fallback
-        elif fallback["provider"] == "openai" and self.openai_client:
+        # Default: use primary if routable, otherwise fallback
+        if self._is_routable(primary):
+            return primary
+        if self._is_routable(fallback):
             self.usage_stats["fallback_count"] += 1
             return fallback
-        else:
-            raise ValueError(f"No LLM provider available for task type: {task_type}")
+        
+        if any(self._provider_configured(c["provider"]) for c in (primary, fallback)):
+            raise CircuitOpenError(f"All LLM circuits open for task type: {task_type}")
+        raise ValueError(f"No LLM provider available for task type: {task_type}")
+    
+    def _provider_configured(self, provider: str) -> bool:
+        if self.stub is not None:
+            return True
+        if provider == "gemini":
+            return self.gemini_available
+        if provider == "anthropic":
+            return bool(self.anthropic_client)
+        if provider == "openai":
+            return bool(self.openai_client)
+        return False
+    
+    def _is_routable(self, config: Dict[str, Any]) -> bool:
+        """Provider has a key and its circuit for this model isn't open"""
+        return (
+            self._provider_configured(config["provider"]) and
+            self.breakers.get(config["provider"], config["model"]).is_available()
+        )
     
     async def complete(
         self,
-        prompt: str,
+        prompt: PromptInput,
         task_type: TaskType = "reasoning",
         system_prompt: Optional[str] = None,
         prefer_provider: Optional[Literal["anthropic", "openai", "gemini"]] = None,
+        cache: bool = True,
+        hedge: bool = False,
+        user_id: Optional[str] = None,
+        batch: bool = False,
         **kwargs
     ) -> Dict[str, Any]:
         """
         Universal completion method that routes to the best model.
         
+        Identical requests are answered from the completion cache; pass
+        cache=False when every call should produce a fresh generation.
+        
+        hedge=True (for latency-critical calls) sends the request to the
+        fallback provider too if the primary is slower than usual, within
+        the task type's hedging budget.
+        
+        user_id is used for per-user fairness when calls have to queue for
+        provider capacity.
+        
+        batch=True (for small prompts that ask for a JSON answer) lets the
+        call share one provider request with other concurrent batch calls of
+        the same task type. Only fast and light calls are batched; the flag
+        is ignored for other task types. See app.services.llm_batching.
+        
+        prompt may be a PromptSegments, whose fixed instructions and user
+        context are then served from the provider's prompt cache on repeat
+        calls; see app.services.llm_prompts.
+        
         Returns:
             {
                 "text": str,
                 "provider": str,
                 "model": str,
                 "tokens_used": int,
-                "cost_estimate": float
+                "cost_estimate": float,
+                "cached": bool
             }
         """
         config = self.get_model_for_task(task_type, prefer_provider)
@@ -204,86 +317,457 @@ class LLMRouter:
         # Override config with kwargs if provided
         max_tokens = kwargs.get("max_tokens", config["max_tokens"])
         temperature = kwargs.get("temperature", config["temperature"])
+        started = time.monotonic()
         
-        try:
-            if provider == "anthropic":
-                return await self._anthropic_complete(
-                    prompt=prompt,
-                    model=model,
-                    system_prompt=system_prompt,
-                    max_tokens=max_tokens,
-                    temperature=temperature
+        cache_key = None
+        if cache and self.cache is not None:
+            cache_key = make_cache_key(
+                task_type, provider, model, system_prompt, prompt_text(prompt), temperature, max_tokens
+            )
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                self._record_usage(task_type, cached, started, user_id, cache_hit=True)
+                return {**cached, "cached": True}
+        
+        if batch and self.batcher is not None and task_type in BATCHABLE_TASK_TYPES:
+            request = BatchRequest(prompt, max_tokens, count_tokens(prompt_text(prompt), model), user_id, hedge)
+            result = await self.batcher.submit(
+                (task_type, provider, model, system_prompt, temperature), request, model_spec(model)["max_output"]
+            )
+        else:
+            result = await self._route_completion(
+                prompt, task_type, system_prompt, provider, model, max_tokens, temperature,
+                hedge=hedge, user_id=user_id
+            )
+        self._record_usage(task_type, result, started, user_id, fallback=result.get("provider") != provider)
+        
+        if cache_key is not None:
+            await self.cache.set(cache_key, result, task_type)
+        return {**result, "cached": False}
+    
+    async def stream(
+        self,
+        prompt: PromptInput,
+        task_type: TaskType = "reasoning",
+        system_prompt: Optional[str] = None,
+        prefer_provider: Optional[Literal["anthropic", "openai", "gemini"]] = None,
+        cache: bool = True,
+        user_id: Optional[str] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Streaming counterpart of complete(): yields text deltas as the
+        provider generates them, whichever provider serves the request.
+        
+        Routing, circuit breakers, the scheduler and the completion cache
+        behave as in complete(). A cache hit is yielded as a single chunk,
+        and a finished stream is cached for later complete()/stream() calls.
+        Fallback only happens before the first chunk - once text has been
+        yielded, a provider error is raised to the caller.
+        """
+        config = self.get_model_for_task(task_type, prefer_provider)
+        provider = config["provider"]
+        model = config["model"]
+        max_tokens = kwargs.get("max_tokens", config["max_tokens"])
+        temperature = kwargs.get("temperature", config["temperature"])
+        started = time.monotonic()
+        
+        cache_key = None
+        if cache and self.cache is not None:
+            cache_key = make_cache_key(
+                task_type, provider, model, system_prompt, prompt_text(prompt), temperature, max_tokens
+            )
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                self._record_usage(task_type, cached, started, user_id, cache_hit=True)
+                if cached["text"]:
+                    yield cached["text"]
+                return
+        
+        candidates = [(provider, model)]
+        for fallback in self._fallback_configs(task_type, provider):
+            candidates.append((fallback["provider"], fallback["model"]))
+        
+        last_error = None
+        for attempt, (candidate_provider, candidate_model) in enumerate(candidates):
+            if attempt > 0:
+                if not self._is_routable({"provider": candidate_provider, "model": candidate_model}):
+                    continue
+                self.usage_stats["fallback_count"] += 1
+            
+            usage: Dict[str, Any] = {}
+            chunks: List[str] = []
+            try:
+                async with aclosing(self._stream_provider(
+                    candidate_provider, candidate_model, prompt, system_prompt, max_tokens, temperature,
+                    usage, task_type=task_type, user_id=user_id
+                )) as provider_stream:
+                    async for chunk in provider_stream:
+                        chunks.append(chunk)
+                        yield chunk
+            except Exception as e:
+                if chunks:
+                    raise
+                print(f"⚠️ {candidate_provider} failed, trying fallback: {e}")
+                last_error = e
+                continue
+            
+            self._record_usage(task_type, usage, started, user_id, fallback=attempt > 0)
+            if cache_key is not None:
+                await self.cache.set(cache_key, {**usage, "text": "".join(chunks)}, task_type)
+            return
+        
+        raise Exception(f"All LLM providers failed. Last error: {last_error}")
+    
+    async def _route_completion(
+        self,
+        prompt: PromptInput,
+        task_type: TaskType,
+        system_prompt: Optional[str],
+        provider: str,
+        model: str,
+        max_tokens: int,
+        temperature: float,
+        hedge: bool = False,
+        user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Call the chosen provider, falling back to the task's other provider if it fails"""
+        candidates = [(provider, model)]
+        for config in self._fallback_configs(task_type, provider):
+            candidates.append((config["provider"], config["model"]))
+        
+        if hedge and len(candidates) > 1 and self._is_routable(
+            {"provider": candidates[1][0], "model": candidates[1][1]}
+        ):
+            return await self._hedged_completion(
+                task_type, candidates[0], candidates[1], prompt, system_prompt, max_tokens, temperature, user_id
+            )
+        
+        last_error = None
+        for attempt, (candidate_provider, candidate_model) in enumerate(candidates):
+            if attempt > 0:
+                if not self._is_routable({"provider": candidate_provider, "model": candidate_model}):
+                    continue
+                self.usage_stats["fallback_count"] += 1
+            try:
+                return await self._call_provider(
+                    candidate_provider, candidate_model, prompt, system_prompt, max_tokens, temperature,
+                    task_type=task_type, user_id=user_id
                 )
-            elif provider == "openai":
-                return await self._openai_complete(
+            except Exception as e:
+                print(f"⚠️ {candidate_provider} failed, trying fallback: {e}")
+                last_error = e
+        
+        # All providers failed
+        raise Exception(f"All LLM providers failed. Last error: {last_error}")
+    
+    async def _run_batch(self, key: tuple, requests: List[BatchRequest]):
+        """
+        Answer a closed batch with one provider call and split the reply.
+        
+        Tokens and cost of the shared call are apportioned to each caller
+        (input by prompt size, output by answer size) so the usage ledger
+        still adds up per user. Requests whose answer is missing from the
+        reply are re-run on their own.
+        """
+        task_type, provider, model, system_prompt, temperature = key
+        if len(requests) == 1:
+            await self._run_batch_request(key, requests[0])
+            return
+        
+        self.usage_stats["batches"] += 1
+        self.usage_stats["batched_requests"] += len(requests)
+        combined = await self._route_completion(
+            build_batch_prompt([request.text for request in requests]), task_type, system_prompt,
+            provider, model, sum(request.max_tokens for request in requests), temperature,
+            hedge=any(request.hedge for request in requests), user_id=BATCH_USER_ID
+        )
+        
+        answers = split_batch_response(combined["text"], len(requests))
+        answer_tokens = [count_tokens(answer, combined["model"]) if answer else 0 for answer in answers]
+        total_prompt_tokens = sum(request.input_tokens for request in requests) or 1
+        total_answer_tokens = sum(answer_tokens) or 1
+        
+        retry = []
+        for request, answer, tokens in zip(requests, answers, answer_tokens):
+            if answer is None:
+                retry.append(request)
+                continue
+            input_tokens = round((combined.get("input_tokens") or 0) * request.input_tokens / total_prompt_tokens)
+            output_tokens = round((combined.get("output_tokens") or 0) * tokens / total_answer_tokens)
+            if not request.future.done():
+                request.future.set_result({
+                    "text": answer,
+                    "provider": combined["provider"],
+                    "model": combined["model"],
+                    "tokens_used": input_tokens + output_tokens,
+                    "input_tokens": input_tokens,
+                    "output_tokens": output_tokens,
+                    "cost_estimate": estimate_cost(combined["model"], input_tokens, output_tokens),
+                    "batch_size": len(requests)
+                })
+        
+        if retry:
+            print(f"⚠️ {len(retry)} of {len(requests)} batched answers unusable, retrying individually")
+            self.usage_stats["batch_retries"] += len(retry)
+            await asyncio.gather(*(self._run_batch_request(key, request) for request in retry))
+    
+    async def _run_batch_request(self, key: tuple, request: BatchRequest):
+        """Send one batched request on its own (original prompt, cache breakpoints intact), resolving its future either way"""
+        task_type, provider, model, system_prompt, temperature = key
+        try:
+            result = await self._route_completion(
+                request.prompt, task_type, system_prompt, provider, model, request.max_tokens, temperature,
+                hedge=request.hedge, user_id=request.user_id
+            )
+        except Exception as e:
+            if not request.future.done():
+                request.future.set_exception(e)
+            return
+        if not request.future.done():
+            request.future.set_result(result)
+    
+    async def _hedged_completion(
+        self,
+        task_type: TaskType,
+        primary: tuple,
+        backup: tuple,
+        prompt: PromptInput,
+        system_prompt: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Race the backup against a slow primary.
+        
+        The backup starts only if the primary hasn't answered within its
+        recent latency percentile and the task's hedging budget allows it;
+        the first successful answer wins and the other call is cancelled.
+        A primary that fails outright falls back to the backup as usual.
+        """
+        args = (prompt, system_prompt, max_tokens, temperature, task_type, user_id)
+        self.hedge_budget.record_request(task_type)
+        delay = hedge_delay(
+            self.breakers.get(*primary).latency_percentile(HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES)
+        )
+        
+        primary_task = asyncio.create_task(self._call_provider(*primary, *args))
+        try:
+            done, _ = await asyncio.wait({primary_task}, timeout=delay)
+            if not done and not self.hedge_budget.try_spend(task_type):
+                await asyncio.wait({primary_task})
+                done = {primary_task}
+        except asyncio.CancelledError:
+            primary_task.cancel()
+            raise
+        
+        if done:
+            if primary_task.exception() is None:
+                return primary_task.result()
+            print(f"⚠️ {primary[0]} failed, trying fallback: {primary_task.exception()}")
+            self.usage_stats["fallback_count"] += 1
+            try:
+                return await self._call_provider(*backup, *args)
+            except Exception as e:
+                raise Exception(f"All LLM providers failed. Last error: {e}")
+        
+        # Primary is slow - hedge
+        self.usage_stats["hedged_requests"] += 1
+        print(f"⏱️ {primary[0]} slower than {delay:.1f}s, hedging with {backup[0]}")
+        backup_task = asyncio.create_task(self._call_provider(*backup, *args))
+        pending = {primary_task, backup_task}
+        last_error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup_task:
+                            self.usage_stats["hedge_wins"] += 1
+                        return task.result()
+                    last_error = task.exception()
+            raise Exception(f"All LLM providers failed. Last error: {last_error}")
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    def _record_usage(
+        self,
+        task_type: TaskType,
+        result: Dict[str, Any],
+        started: float,
+        user_id: Optional[str],
+        cache_hit: bool = False,
+        fallback: bool = False
+    ):
+        """Add a served completion to the usage ledger (cache hits cost nothing)"""
+        if self.ledger is None:
+            return
+        self.ledger.record(
+            user_id=user_id,
+            endpoint=current_endpoint(),
+            task_type=task_type,
+            provider=result.get("provider"),
+            model=result.get("model"),
+            input_tokens=result.get("input_tokens") or 0,
+            output_tokens=result.get("output_tokens") or 0,
+            cache_read_tokens=result.get("cache_read_tokens") or 0,
+            cache_write_tokens=result.get("cache_write_tokens") or 0,
+            latency_ms=int((time.monotonic() - started) * 1000),
+            cost_usd=0.0 if cache_hit else result.get("cost_estimate") or 0.0,
+            cache_hit=cache_hit,
+            fallback=fallback
+        )
+    
+    def _fallback_configs(self, task_type: TaskType, exclude_provider: str) -> List[Dict[str, Any]]:
+        """The task's configs for providers other than `exclude_provider`, in fallback order"""
+        task_config = TASK_CONFIGS.get(task_type, TASK_CONFIGS["reasoning"])
+        return [
+            config for config in (task_config["primary"], task_config["fallback"])
+            if config["provider"] != exclude_provider
+        ]
+    
+    async def _call_provider(
+        self,
+        provider: str,
+        model: str,
+        prompt: PromptInput,
+        system_prompt: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        task_type: TaskType = "reasoning",
+        user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        One provider call: size the request to the model's limits, wait for
+        a scheduler slot, then call through that provider/model's circuit breaker.
+        """
+        breaker = self.breakers.get(provider, model)
+        if not breaker.is_available():
+            raise CircuitOpenError(f"Circuit open for {provider}/{model}")
+        
+        if self.stub is not None:
+            call = partial(self.stub.complete, provider)
+        elif provider == "anthropic":
+            call = self._anthropic_complete
+        elif provider == "openai":
+            call = self._openai_complete
+        else:  # gemini
+            call = self._gemini_complete
+        
+        # Trim the prompt / clamp max_tokens to this model's limits, and
+        # reserve what the call can actually use
+        fitted, max_tokens, input_tokens = fit_request(prompt_text(prompt), system_prompt, model, max_tokens)
+        if fitted != prompt_text(prompt):
+            prompt = fitted  # Trimmed - segment boundaries no longer hold
+        slot = await self.scheduler.acquire(provider, task_type, user_id, input_tokens + max_tokens)
+        async with slot:
+            # Re-check (and claim a half-open probe) now that we're about to call
+            if not breaker.allow_request():
+                slot.settle(0)
+                raise CircuitOpenError(f"Circuit open for {provider}/{model}")
+            
+            started = time.monotonic()
+            try:
+                result = await call(
                     prompt=prompt,
                     model=model,
                     system_prompt=system_prompt,
                     max_tokens=max_tokens,
                     temperature=temperature
                 )
-            else:  # gemini
-                return await self._gemini_complete(
+            except CLIENT_ERRORS:
+                # The provider answered - our request was bad, so it's not a health signal
+                breaker.record_success(time.monotonic() - started)
+                raise
+            except asyncio.CancelledError:
+                # Cancelled by the caller - says nothing about provider health
+                breaker.release_probe()
+                raise
+            except Exception:
+                breaker.record_failure(time.monotonic() - started)
+                raise
+            breaker.record_success(time.monotonic() - started)
+            slot.settle(result.get("tokens_used"))
+            return result
+    
+    async def _stream_provider(
+        self,
+        provider: str,
+        model: str,
+        prompt: PromptInput,
+        system_prompt: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        usage: Dict[str, Any],
+        task_type: TaskType = "reasoning",
+        user_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Streaming version of _call_provider(). The slot and breaker are held
+        for the whole stream; `usage` is filled with the provider/model/token
+        fields once the stream has finished.
+        """
+        breaker = self.breakers.get(provider, model)
+        if not breaker.is_available():
+            raise CircuitOpenError(f"Circuit open for {provider}/{model}")
+        
+        if self.stub is not None:
+            stream = partial(self.stub.stream, provider)
+        elif provider == "anthropic":
+            stream = self._anthropic_stream
+        elif provider == "openai":
+            stream = self._openai_stream
+        else:  # gemini
+            stream = self._gemini_stream
+        
+        # Trim the prompt / clamp max_tokens to this model's limits, and
+        # reserve what the call can actually use
+        fitted, max_tokens, input_tokens = fit_request(prompt_text(prompt), system_prompt, model, max_tokens)
+        if fitted != prompt_text(prompt):
+            prompt = fitted  # Trimmed - segment boundaries no longer hold
+        slot = await self.scheduler.acquire(provider, task_type, user_id, input_tokens + max_tokens)
+        async with slot:
+            if not breaker.allow_request():
+                slot.settle(0)
+                raise CircuitOpenError(f"Circuit open for {provider}/{model}")
+            
+            started = time.monotonic()
+            try:
+                async with aclosing(stream(
                     prompt=prompt,
                     model=model,
                     system_prompt=system_prompt,
                     max_tokens=max_tokens,
-                    temperature=temperature
-                )
-        except Exception as e:
-            # Try fallback provider
-            print(f"⚠️ {provider} failed, trying fallback: {e}")
-            
-            # Determine fallback provider (try others in order)
-            fallback_order = ["gemini", "openai", "anthropic"]
-            fallback_order.remove(provider)
-            
-            for fallback_provider in fallback_order:
-                try:
-                    fallback_config = self.get_model_for_task(task_type, prefer_provider=fallback_provider)
-                    self.usage_stats["fallback_count"] += 1
-                    
-                    if fallback_provider == "anthropic":
-                        return await self._anthropic_complete(
-                            prompt=prompt,
-                            model=fallback_config["model"],
-                            system_prompt=system_prompt,
-                            max_tokens=max_tokens,
-                            temperature=temperature
-                        )
-                    elif fallback_provider == "openai":
-                        return await self._openai_complete(
-                            prompt=prompt,
-                            model=fallback_config["model"],
-                            system_prompt=system_prompt,
-                            max_tokens=max_tokens,
-                            temperature=temperature
-                        )
-                    else:  # gemini
-                        return await self._gemini_complete(
-                            prompt=prompt,
-                            model=fallback_config["model"],
-                            system_prompt=system_prompt,
-                            max_tokens=max_tokens,
-                            temperature=temperature
-                        )
-                except Exception as fallback_error:
-                    print(f"⚠️ {fallback_provider} fallback also failed: {fallback_error}")
-                    continue
-            
-            # All providers failed
-            raise Exception(f"All LLM providers failed. Last error: {e}")
+                    temperature=temperature,
+                    usage=usage
+                )) as chunks:
+                    async for chunk in chunks:
+                        yield chunk
+            except CLIENT_ERRORS:
+                breaker.record_success(time.monotonic() - started)
+                raise
+            except (asyncio.CancelledError, GeneratorExit):
+                # Client went away mid-stream - not a provider health signal
+                breaker.release_probe()
+                raise
+            except Exception:
+                breaker.record_failure(time.monotonic() - started)
+                raise
+            breaker.record_success(time.monotonic() - started)
+            slot.settle(usage.get("tokens_used"))
     
     async def _anthropic_complete(
         self,
-        prompt: str,
+        prompt: PromptInput,
         model: str,
         system_prompt: Optional[str],
         max_tokens: int,
         temperature: float
     ) -> Dict[str, Any]:
         """Call Anthropic API"""
-        messages = [{"role": "user", "content": prompt}]
+        messages = [{"role": "user", "content": anthropic_content(prompt)}]
         
         kwargs = {
             "model": model,
@@ -295,29 +779,17 @@ class LLMRouter:
         if system_prompt:
             kwargs["system"] = system_prompt
         
-        response = self.anthropic_client.messages.create(**kwargs)
+        response = await self.anthropic_client.messages.create(**kwargs)
         
         self.usage_stats["anthropic_calls"] += 1
         
         text = response.content[0].text if response.content else ""
         
-        return {
-            "text": text,
-            "provider": "anthropic",
-            "model": model,
-            "tokens_used": response.usage.input_tokens + response.usage.output_tokens,
-            "input_tokens": response.usage.input_tokens,
-            "output_tokens": response.usage.output_tokens,
-            "cost_estimate": self._calculate_anthropic_cost(
-                model, 
-                response.usage.input_tokens, 
-                response.usage.output_tokens
-            )
-        }
+        return {"text": text, **self._anthropic_usage(model, response.usage)}
     
     async def _openai_complete(
         self,
-        prompt: str,
+        prompt: PromptInput,
         model: str,
         system_prompt: Optional[str],
         max_tokens: int,
@@ -329,36 +801,25 @@ class LLMRouter:
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         
-        messages.append({"role": "user", "content": prompt})
+        messages.append({"role": "user", "content": prompt_text(prompt)})
         
-        response = self.openai_client.chat.completions.create(
+        response = await self.openai_client.chat.completions.create(
             model=model,
             messages=messages,
             max_tokens=max_tokens,
-            temperature=temperature
+            temperature=temperature,
+            **self._openai_cache_kwargs(prompt)
         )
         
         self.usage_stats["openai_calls"] += 1
         
         text = response.choices[0].message.content
         
-        return {
-            "text": text,
-            "provider": "openai",
-            "model": model,
-            "tokens_used": response.usage.total_tokens,
-            "input_tokens": response.usage.prompt_tokens,
-            "output_tokens": response.usage.completion_tokens,
-            "cost_estimate": self._calculate_openai_cost(
-                model,
-                response.usage.prompt_tokens,
-                response.usage.completion_tokens
-            )
-        }
+        return {"text": text, **self._openai_usage(model, response.usage)}
     
     async def _gemini_complete(
         self,
-        prompt: str,
+        prompt: PromptInput,
         model: str,
         system_prompt: Optional[str],
         max_tokens: int,
@@ -369,9 +830,9 @@ class LLMRouter:
             raise Exception("Gemini not available")
         
         # Combine system prompt and user prompt for Gemini
-        full_prompt = prompt
+        full_prompt = prompt_text(prompt)
         if system_prompt:
-            full_prompt = f"{system_prompt}\n\n{prompt}"
+            full_prompt = f"{system_prompt}\n\n{full_prompt}"
         
         gemini_model = genai.GenerativeModel(
             model_name=model,
@@ -381,66 +842,211 @@ class LLMRouter:
             }
         )
         
-        response = gemini_model.generate_content(full_prompt)
+        if hasattr(gemini_model, "generate_content_async"):
+            response = await gemini_model.generate_content_async(full_prompt)
+        else:
+            # No async API in this SDK version - keep the blocking call off the event loop
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                self._get_gemini_executor(), gemini_model.generate_content, full_prompt
+            )
         
         self.usage_stats["gemini_calls"] += 1
         
         text = response.text
         
-        # Estimate token usage (Gemini doesn't always return usage metadata)
-        input_tokens = len(full_prompt.split()) * 1.3  # Rough estimate
-        output_tokens = len(text.split()) * 1.3
-        
         return {
             "text": text,
-            "provider": "gemini",
-            "model": model,
-            "tokens_used": int(input_tokens + output_tokens),
-            "input_tokens": int(input_tokens),
-            "output_tokens": int(output_tokens),
-            "cost_estimate": self._calculate_gemini_cost(
-                model,
-                int(input_tokens),
-                int(output_tokens)
-            )
+            **self._gemini_usage(model, getattr(response, "usage_metadata", None), full_prompt, text)
         }
     
-    def _calculate_gemini_cost(self, model: str, input_tokens: int, output_tokens: int) -> float:
-        """Calculate cost for Gemini models"""
-        costs = {
-            "gemini-1.5-flash": {"input": 0.075, "output": 0.30},
-            "gemini-1.5-pro": {"input": 1.25, "output": 5.0},
-            "gemini-2.0-flash-exp": {"input": 0.075, "output": 0.30}
+    async def _anthropic_stream(
+        self,
+        prompt: PromptInput,
+        model: str,
+        system_prompt: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        usage: Dict[str, Any]
+    ) -> AsyncIterator[str]:
+        """Stream from Anthropic Messages API"""
+        kwargs = {
+            "model": model,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "messages": [{"role": "user", "content": anthropic_content(prompt)}]
         }
+        if system_prompt:
+            kwargs["system"] = system_prompt
         
-        model_cost = costs.get(model, costs["gemini-1.5-flash"])
-        input_cost = (input_tokens / 1_000_000) * model_cost["input"]
-        output_cost = (output_tokens / 1_000_000) * model_cost["output"]
+        async with self.anthropic_client.messages.stream(**kwargs) as response:
+            async for text in response.text_stream:
+                yield text
+            message = await response.get_final_message()
         
-        return input_cost + output_cost
+        self.usage_stats["anthropic_calls"] += 1
+        usage.update(self._anthropic_usage(model, message.usage))
     
-    def _calculate_anthropic_cost(self, model: str, input_tokens: int, output_tokens: int) -> float:
-        """Calculate cost for Anthropic models"""
-        costs = {
-            "claude-3-haiku-20240307": {"input": 0.25, "output": 1.25},
-            "claude-3-5-sonnet-20241022": {"input": 3.0, "output": 15.0},  # Deprecated
-            "claude-sonnet-4-20250514": {"input": 3.0, "output": 15.0},  # Latest
-            "claude-3-opus-20240229": {"input": 15.0, "output": 75.0}
-        }
+    async def _openai_stream(
+        self,
+        prompt: PromptInput,
+        model: str,
+        system_prompt: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        usage: Dict[str, Any]
+    ) -> AsyncIterator[str]:
+        """Stream from OpenAI chat completions (usage arrives in the final chunk)"""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt_text(prompt)})
         
-        model_cost = costs.get(model, {"input": 3.0, "output": 15.0})
-        return (input_tokens / 1_000_000 * model_cost["input"]) + (output_tokens / 1_000_000 * model_cost["output"])
+        response = await self.openai_client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+            stream_options={"include_usage": True},
+            **self._openai_cache_kwargs(prompt)
+        )
+        
+        provider_usage = None
+        parts = []
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+            if chunk.usage:
+                provider_usage = chunk.usage
+        
+        self.usage_stats["openai_calls"] += 1
+        if provider_usage is not None:
+            usage.update(self._openai_usage(model, provider_usage))
+        else:
+            # Usage chunk missing (e.g. an OpenAI-compatible proxy) - count locally
+            usage.update(self._usage_fields(
+                "openai", model,
+                sum(count_tokens(m["content"], model) for m in messages),
+                count_tokens("".join(parts), model)
+            ))
     
-    def _calculate_openai_cost(self, model: str, input_tokens: int, output_tokens: int) -> float:
-        """Calculate cost for OpenAI models"""
-        costs = {
-            "gpt-4o-mini": {"input": 0.15, "output": 0.60},
-            "gpt-4o": {"input": 2.5, "output": 10.0},
-            "o1-preview": {"input": 15.0, "output": 60.0}
-        }
+    async def _gemini_stream(
+        self,
+        prompt: PromptInput,
+        model: str,
+        system_prompt: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        usage: Dict[str, Any]
+    ) -> AsyncIterator[str]:
+        """Stream from Gemini (one chunk with the whole text if the SDK has no async API)"""
+        if not GEMINI_AVAILABLE or not self.gemini_available:
+            raise Exception("Gemini not available")
         
-        model_cost = costs.get(model, {"input": 2.5, "output": 10.0})
-        return (input_tokens / 1_000_000 * model_cost["input"]) + (output_tokens / 1_000_000 * model_cost["output"])
+        full_prompt = prompt_text(prompt)
+        if system_prompt:
+            full_prompt = f"{system_prompt}\n\n{full_prompt}"
+        
+        gemini_model = genai.GenerativeModel(
+            model_name=model,
+            generation_config={
+                "max_output_tokens": max_tokens,
+                "temperature": temperature,
+            }
+        )
+        
+        if not hasattr(gemini_model, "generate_content_async"):
+            result = await self._gemini_complete(prompt, model, system_prompt, max_tokens, temperature)
+            usage.update({k: v for k, v in result.items() if k != "text"})
+            if result["text"]:
+                yield result["text"]
+            return
+        
+        response = await gemini_model.generate_content_async(full_prompt, stream=True)
+        parts = []
+        async for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                continue  # Chunk without text parts (e.g. the final finish-reason chunk)
+            if text:
+                parts.append(text)
+                yield text
+        
+        self.usage_stats["gemini_calls"] += 1
+        text = "".join(parts)
+        usage.update(self._gemini_usage(model, getattr(response, "usage_metadata", None), full_prompt, text))
+    
+    @staticmethod
+    def _usage_fields(
+        provider: str,
+        model: str,
+        input_tokens: int,
+        output_tokens: int,
+        cache_read_tokens: int = 0,
+        cache_write_tokens: int = 0
+    ) -> Dict[str, Any]:
+        """Provider/model/token/cost fields of a result (input_tokens includes cached tokens)"""
+        return {
+            "provider": provider,
+            "model": model,
+            "tokens_used": input_tokens + output_tokens,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cache_read_tokens": cache_read_tokens,
+            "cache_write_tokens": cache_write_tokens,
+            "cost_estimate": estimate_cost(model, input_tokens, output_tokens, cache_read_tokens, cache_write_tokens)
+        }
+    
+    def _anthropic_usage(self, model: str, usage) -> Dict[str, Any]:
+        """Anthropic reports cached prompt tokens apart from input_tokens"""
+        cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+        return self._usage_fields(
+            "anthropic", model, usage.input_tokens + cache_read + cache_write, usage.output_tokens,
+            cache_read, cache_write
+        )
+    
+    def _openai_usage(self, model: str, usage) -> Dict[str, Any]:
+        """OpenAI includes cached tokens in prompt_tokens"""
+        details = getattr(usage, "prompt_tokens_details", None)
+        cache_read = getattr(details, "cached_tokens", None) or 0
+        return self._usage_fields("openai", model, usage.prompt_tokens, usage.completion_tokens, cache_read)
+    
+    def _gemini_usage(self, model: str, metadata, full_prompt: str, text: str) -> Dict[str, Any]:
+        """Gemini doesn't always return usage metadata - count locally then"""
+        if metadata and getattr(metadata, "prompt_token_count", None):
+            return self._usage_fields(
+                "gemini", model, metadata.prompt_token_count, metadata.candidates_token_count or 0,
+                getattr(metadata, "cached_content_token_count", None) or 0
+            )
+        return self._usage_fields("gemini", model, count_tokens(full_prompt, model), count_tokens(text, model))
+    
+    @staticmethod
+    def _openai_cache_kwargs(prompt: PromptInput) -> Dict[str, Any]:
+        """Route calls that share a cacheable prefix to the same OpenAI prompt cache"""
+        key = cache_prefix_key(prompt)
+        return {"prompt_cache_key": key} if key else {}
+    
+    def _get_gemini_executor(self) -> ThreadPoolExecutor:
+        """Dedicated pool for blocking Gemini calls (kept apart from the default executor)"""
+        if self._gemini_executor is None:
+            self._gemini_executor = ThreadPoolExecutor(
+                max_workers=GEMINI_THREAD_POOL_SIZE, thread_name_prefix="gemini"
+            )
+        return self._gemini_executor
+    
+    async def close(self):
+        """Release pooled connections and threads (called on application shutdown)"""
+        if not self.http_client.is_closed:
+            await self.http_client.aclose()
+        if self.ledger is not None:
+            self.ledger.flush()
+        if self._gemini_executor is not None:
+            self._gemini_executor.shutdown(wait=False)
+            self._gemini_executor = None
     
     def get_usage_stats(self) -> Dict[str, Any]:
         """Get usage statistics"""
@@ -448,7 +1054,12 @@ class LLMRouter:
             **self.usage_stats,
             "timestamp": datetime.now().isoformat(),
             "anthropic_available": bool(self.anthropic_client),
-            "openai_available": bool(self.openai_client)
+            "openai_available": bool(self.openai_client),
+            "stub_mode": self.stub is not None,
+            "cache": self.cache.get_stats() if self.cache is not None else {"enabled": False},
+            "circuit_breakers": self.breakers.snapshot(),
+            "hedging": self.hedge_budget.snapshot(),
+            "scheduler": self.scheduler.snapshot()
         }
 
 
@@ -461,3 +1072,11 @@ def get_llm_router() -> LLMRouter:
     if _router is None:
         _router = LLMRouter()
     return _router
+
+
+async def close_llm_router():
+    """Close the singleton router's HTTP pool, if one was created"""
+    global _router
+    if _router is not None:
+        await _router.close()
+    _router = None
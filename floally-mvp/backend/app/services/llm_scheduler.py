@@ -0,0 +1,287 @@
+"""
+LLM Request Scheduler
+Keeps LLMRouter inside provider rate limits and shares capacity fairly.
+
+Every provider call takes a slot from the scheduler first. A slot needs:
+- a free global concurrency slot (LLM_MAX_CONCURRENCY)
+- a free slot for the user (LLM_USER_CONCURRENCY, or the lane's own
+  limit for shared lanes such as the micro-batcher's)
+- one request from the provider's RPM bucket
+- the estimated prompt + max output tokens from its TPM bucket
+
+Token estimates are settled against actual usage when the call returns, so
+over-estimates are refunded to the bucket.
+
+Requests that can't run yet wait in a queue ordered by task priority
+(`fast` before `strategic`), then by how much the user already has queued
+or running, so one heavy user is interleaved with everyone else instead of
+draining the budget first. A request that waits longer than
+LLM_QUEUE_TIMEOUT_SECONDS raises SchedulerTimeoutError, and the router
+treats that like any other provider failure and falls back.
+"""
+
+from typing import Dict, List, Optional
+import asyncio
+import itertools
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+USER_CONCURRENCY = int(os.getenv("LLM_USER_CONCURRENCY", "4"))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "30"))
+
+# Requests and tokens per minute, per provider
+PROVIDER_LIMITS: Dict[str, Dict[str, int]] = {
+    "anthropic": {
+        "rpm": int(os.getenv("LLM_ANTHROPIC_RPM", "50")),
+        "tpm": int(os.getenv("LLM_ANTHROPIC_TPM", "40000")),
+    },
+    "openai": {
+        "rpm": int(os.getenv("LLM_OPENAI_RPM", "500")),
+        "tpm": int(os.getenv("LLM_OPENAI_TPM", "200000")),
+    },
+    "gemini": {
+        "rpm": int(os.getenv("LLM_GEMINI_RPM", "1000")),
+        "tpm": int(os.getenv("LLM_GEMINI_TPM", "1000000")),
+    },
+}
+
+# Lower runs first
+TASK_PRIORITIES: Dict[str, int] = {
+    "fast": 0,
+    "light": 1,
+    "simple_generation": 2,
+    "reasoning": 3,
+    "strategic": 4,
+}
+
+ANONYMOUS_USER = "_anonymous"
+
+
+class SchedulerTimeoutError(Exception):
+    """A request waited too long for rate-limit capacity"""
+
+
+class TokenBucket:
+    """Continuously refilling bucket (capacity per minute)"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(max(1, per_minute))
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def clamp(self, amount: float) -> float:
+        """Requests larger than the bucket could never run - cap them at its size"""
+        return min(amount, self.capacity)
+
+    def can_take(self, amount: float) -> bool:
+        self._refill()
+        return self.tokens >= amount
+
+    def take(self, amount: float):
+        self._refill()
+        self.tokens -= amount
+
+    def give_back(self, amount: float):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def seconds_until(self, amount: float) -> float:
+        self._refill()
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+
+class _Waiter:
+    def __init__(self, provider: str, user_id: str, priority: int, tokens: float, rank: int, seq: int):
+        self.provider = provider
+        self.user_id = user_id
+        self.priority = priority
+        self.tokens = tokens
+        self.rank = rank  # User's queued + running requests when this one arrived
+        self.seq = seq
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def sort_key(self):
+        return (self.priority, self.rank, self.seq)
+
+
+class Slot:
+    """Granted capacity for one provider call; settle() with actual usage when done"""
+
+    def __init__(self, scheduler: "LLMScheduler", provider: str, user_id: str, reserved_tokens: float):
+        self.scheduler = scheduler
+        self.provider = provider
+        self.user_id = user_id
+        self.reserved_tokens = reserved_tokens
+        self._settled = False
+
+    def settle(self, actual_tokens: Optional[int]):
+        """Refund (or charge) the difference between reserved and actual tokens"""
+        if self._settled or actual_tokens is None:
+            return
+        self._settled = True
+        bucket = self.scheduler.token_buckets[self.provider]
+        difference = self.reserved_tokens - actual_tokens
+        if difference > 0:
+            bucket.give_back(difference)
+        elif difference < 0:
+            bucket.take(-difference)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.scheduler._release(self)
+
+
+class LLMScheduler:
+    """Concurrency limits, provider RPM/TPM buckets and a fair priority queue"""
+
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENCY,
+        user_concurrency: int = USER_CONCURRENCY,
+        limits: Optional[Dict[str, Dict[str, int]]] = None,
+        lane_concurrency: Optional[Dict[str, int]] = None
+    ):
+        self.max_concurrency = max_concurrency
+        self.user_concurrency = user_concurrency
+        # Per-lane limits replacing user_concurrency for shared, multi-user lanes
+        self.lane_concurrency = dict(lane_concurrency or {})
+        limits = limits or PROVIDER_LIMITS
+        self.request_buckets = {p: TokenBucket(l["rpm"]) for p, l in limits.items()}
+        self.token_buckets = {p: TokenBucket(l["tpm"]) for p, l in limits.items()}
+        self.in_flight = 0
+        self.user_in_flight: Dict[str, int] = {}
+        self.user_queued: Dict[str, int] = {}
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.stats = {"granted": 0, "queued": 0, "timeouts": 0}
+
+    async def acquire(
+        self,
+        provider: str,
+        task_type: str,
+        user_id: Optional[str],
+        estimated_tokens: int,
+        timeout: float = QUEUE_TIMEOUT_SECONDS
+    ) -> Slot:
+        """Wait for capacity and return a Slot (use it as `async with`)"""
+        user_id = user_id or ANONYMOUS_USER
+        tokens = self.token_buckets[provider].clamp(estimated_tokens)
+        rank = self.user_in_flight.get(user_id, 0) + self.user_queued.get(user_id, 0)
+        waiter = _Waiter(provider, user_id, TASK_PRIORITIES.get(task_type, 3), tokens, rank, next(self._seq))
+
+        self._waiters.append(waiter)
+        self.user_queued[user_id] = self.user_queued.get(user_id, 0) + 1
+        self._dispatch()
+        if not waiter.future.done():
+            self.stats["queued"] += 1
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except asyncio.TimeoutError:
+            if waiter.future.done():
+                # Granted just as we gave up - hand the capacity straight back
+                self._abandon(waiter.future.result())
+            else:
+                self._remove_waiter(waiter)
+            self.stats["timeouts"] += 1
+            logger.warning(f"LLM request for {user_id} timed out waiting for {provider} capacity")
+            raise SchedulerTimeoutError(f"Waited {timeout:.0f}s for {provider} capacity")
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._abandon(waiter.future.result())
+            else:
+                self._remove_waiter(waiter)
+            raise
+
+    def snapshot(self) -> Dict:
+        return {
+            **self.stats,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "providers": {
+                provider: {
+                    "requests_available": int(self.request_buckets[provider].tokens),
+                    "tokens_available": int(self.token_buckets[provider].tokens),
+                }
+                for provider in self.request_buckets
+            }
+        }
+
+    def _remove_waiter(self, waiter: _Waiter):
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+            self._decrement(self.user_queued, waiter.user_id)
+        self._dispatch()
+
+    def _abandon(self, slot: Slot):
+        """Return an unused slot, including its request and token reservations"""
+        slot.settle(0)
+        self.request_buckets[slot.provider].give_back(1)
+        self._release(slot)
+
+    def _release(self, slot: Slot):
+        self.in_flight -= 1
+        self._decrement(self.user_in_flight, slot.user_id)
+        self._dispatch()
+
+    @staticmethod
+    def _decrement(counts: Dict[str, int], user_id: str):
+        counts[user_id] -= 1
+        if counts[user_id] <= 0:
+            del counts[user_id]
+
+    def _dispatch(self):
+        """Grant every waiter that fits, in priority/fairness order"""
+        next_wakeup = None
+        # Once a provider's bucket can't fit a waiter, later waiters for that
+        # provider wait too - small requests mustn't starve a large one
+        blocked_providers = set()
+        for waiter in sorted(self._waiters, key=_Waiter.sort_key):
+            if self.in_flight >= self.max_concurrency:
+                break
+            if waiter.future.done() or waiter.provider in blocked_providers:
+                continue
+            if self.user_in_flight.get(waiter.user_id, 0) >= self.lane_concurrency.get(waiter.user_id, self.user_concurrency):
+                continue
+            requests = self.request_buckets[waiter.provider]
+            tokens = self.token_buckets[waiter.provider]
+            if not (requests.can_take(1) and tokens.can_take(waiter.tokens)):
+                blocked_providers.add(waiter.provider)
+                wait = max(requests.seconds_until(1), tokens.seconds_until(waiter.tokens))
+                next_wakeup = wait if next_wakeup is None else min(next_wakeup, wait)
+                continue
+
+            requests.take(1)
+            tokens.take(waiter.tokens)
+            self._waiters.remove(waiter)
+            self._decrement(self.user_queued, waiter.user_id)
+            self.in_flight += 1
+            self.user_in_flight[waiter.user_id] = self.user_in_flight.get(waiter.user_id, 0) + 1
+            self.stats["granted"] += 1
+            waiter.future.set_result(Slot(self, waiter.provider, waiter.user_id, waiter.tokens))
+
+        if next_wakeup is not None and self._waiters:
+            self._schedule_wakeup(next_wakeup)
+
+    def _schedule_wakeup(self, delay: float):
+        if self._timer is not None:
+            self._timer.cancel()
+        loop = asyncio.get_running_loop()
+        self._timer = loop.call_later(max(delay, 0.01), self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
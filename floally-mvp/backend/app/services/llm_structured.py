@@ -0,0 +1,288 @@
+"""
+LLM Structured Output
+Tolerant JSON extraction for model responses, so one malformed or
+truncated element doesn't throw away a whole (paid-for) completion.
+
+Models wrap JSON in prose or ``` fences, stop mid-array when they hit
+max_tokens, and now and then emit a trailing comma or a bad element.
+IncrementalJSONParser scans the text once, chunk by chunk as it streams:
+- the first JSON value in the text is the response; anything around it is ignored
+- elements of the watched array (the top-level array, or the array under
+  `key` in the top-level object) are parsed one by one as each completes,
+  so a bad element costs only itself and streams can act on items early
+- value() repairs a truncated response by closing the open string and
+  brackets, backing up to the last complete element if needed
+
+parse_json() / parse_model() / parse_items() are the one-shot forms used
+on complete responses. parse_model() and parse_items() validate against the
+caller's Pydantic schema for its prompt family, element by element for
+arrays, keeping the valid elements.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar
+import json
+import logging
+import re
+
+from pydantic import BaseModel, ValidationError
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_CLOSERS = {"{": "}", "[": "]"}
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+MAX_REPAIR_ATTEMPTS = 64
+
+
+class StructuredOutputError(ValueError):
+    """No usable JSON in a model response"""
+
+
+class IncrementalJSONParser:
+    """
+    Single-pass scanner over a (possibly streaming, possibly truncated)
+    model response.
+
+    feed() returns the watched array's elements completed by that chunk.
+    """
+
+    def __init__(self, key: Optional[str] = None):
+        self.key = key
+        self.text = ""
+        self.items: List[Any] = []
+        self.bad_items = 0
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._end: Optional[int] = None
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._array_closed = False
+        self._item_start: Optional[int] = None
+        # (text index, open containers) where the value can be cut and closed
+        self._cuts: List[Tuple[int, Tuple[str, ...]]] = []
+
+    @property
+    def done(self) -> bool:
+        """The top-level value has been closed"""
+        return self._end is not None
+
+    @property
+    def found_array(self) -> bool:
+        """The watched array has been reached"""
+        return self._array_depth is not None
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Scan another piece of the response"""
+        self.text += chunk
+        new_items: List[Any] = []
+        text = self.text
+        while self._pos < len(text) and not self.done:
+            self._scan(text, self._pos, new_items)
+            self._pos += 1
+        return new_items
+
+    def finish(self) -> List[Any]:
+        """Salvage the watched array's last element if the response stopped inside it"""
+        if self._item_start is None or self._array_closed:
+            return []
+        fragment = self.text[self._item_start:].rstrip()
+        self._item_start = None
+        new_items: List[Any] = []
+        if fragment and fragment[0] in _CLOSERS:
+            partial = IncrementalJSONParser()
+            partial.feed(fragment)
+            try:
+                self._add_item(partial.value(), new_items)
+            except StructuredOutputError:
+                self.bad_items += 1
+        else:
+            self._emit(fragment, new_items)
+        return new_items
+
+    def value(self) -> Any:
+        """The response's JSON value, repaired if it is truncated or has trailing commas"""
+        if self._start is None:
+            raise StructuredOutputError("No JSON found in response")
+        body = self.text[self._start:self._end]
+        try:
+            return json.loads(body)
+        except ValueError:
+            pass
+        try:
+            return json.loads(_TRAILING_COMMA.sub(r"\1", body))
+        except ValueError:
+            pass
+        if self.done:
+            raise StructuredOutputError("Malformed JSON in response")
+
+        # Truncated - close what is open, backing up to earlier cut points if needed
+        head = body + ('"' if self._in_string else "")
+        candidates = [(head, tuple(self._stack))] + [
+            (self.text[self._start:index], stack) for index, stack in reversed(self._cuts)
+        ]
+        for fragment, stack in candidates[:MAX_REPAIR_ATTEMPTS]:
+            repaired = _TRAILING_COMMA.sub(r"\1", fragment.rstrip().rstrip(",").rstrip(":"))
+            try:
+                return json.loads(repaired + "".join(_CLOSERS[c] for c in reversed(stack)))
+            except ValueError:
+                continue
+        raise StructuredOutputError("Truncated JSON could not be repaired")
+
+    def _scan(self, text: str, i: int, new_items: List[Any]):
+        c = text[i]
+        if self._start is None:
+            if c in _CLOSERS:
+                self._start = i
+                self._open(c, i)
+            return
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif c == "\\":
+                self._escape = True
+            elif c == '"':
+                self._in_string = False
+                self._last_string = text[self._string_start:i + 1]
+                if self._at_array_level() and self._item_start == self._string_start:
+                    self._emit(text[self._item_start:i + 1], new_items)
+            return
+
+        if c == '"':
+            self._in_string = True
+            self._string_start = i
+            if self._at_array_level() and self._item_start is None:
+                self._item_start = i
+        elif c in _CLOSERS:
+            if self._at_array_level() and self._item_start is None:
+                self._item_start = i
+            self._open(c, i)
+        elif c in "}]":
+            if self._at_array_level():
+                if self._item_start is not None:
+                    self._emit(text[self._item_start:i], new_items)
+                self._array_closed = True
+            if self._stack:
+                self._stack.pop()
+            if not self._stack:
+                self._end = i + 1
+            elif self._at_array_level() and self._item_start is not None:
+                self._emit(text[self._item_start:i + 1], new_items)
+        elif c == ":":
+            if len(self._stack) == 1 and self._last_string is not None:
+                try:
+                    self._current_key = json.loads(self._last_string)
+                except ValueError:
+                    self._current_key = None
+        elif c == ",":
+            self._cuts.append((i, tuple(self._stack)))
+            if len(self._stack) == 1:
+                self._current_key = None
+            if self._at_array_level() and self._item_start is not None:
+                self._emit(text[self._item_start:i], new_items)
+        elif not c.isspace() and self._at_array_level() and self._item_start is None:
+            self._item_start = i  # Number/true/false/null element
+
+    def _open(self, c: str, i: int):
+        self._stack.append(c)
+        self._cuts.append((i + 1, tuple(self._stack)))
+        if c == "[" and self._array_depth is None:
+            if self.key is None and len(self._stack) == 1:
+                self._array_depth = 1
+            elif self.key is not None and len(self._stack) == 2 and self._current_key == self.key:
+                self._array_depth = 2
+
+    def _at_array_level(self) -> bool:
+        return (
+            self._array_depth is not None and not self._array_closed and
+            len(self._stack) == self._array_depth
+        )
+
+    def _emit(self, fragment: str, new_items: List[Any]):
+        self._item_start = None
+        fragment = fragment.strip()
+        if not fragment:
+            return
+        try:
+            self._add_item(json.loads(fragment), new_items)
+        except ValueError:
+            self.bad_items += 1
+            logger.warning(f"Skipping malformed JSON element: {fragment[:80]!r}")
+
+    def _add_item(self, item: Any, new_items: List[Any]):
+        self.items.append(item)
+        new_items.append(item)
+
+
+def parse_json(text: str) -> Any:
+    """First JSON value in a model response (fences/prose tolerated, truncation repaired)"""
+    parser = IncrementalJSONParser()
+    parser.feed(text or "")
+    return parser.value()
+
+
+def parse_model(
+    text: str,
+    schema: Type[ModelT],
+    items: Optional[Dict[str, Type[BaseModel]]] = None
+) -> ModelT:
+    """
+    Parse and validate a response that should be one `schema` object.
+
+    `items` maps list fields to their element schema; those lists are
+    validated element by element first, so one bad element is dropped
+    instead of failing the whole object.
+    """
+    data = parse_json(text)
+    if isinstance(data, dict):
+        for field, item_schema in (items or {}).items():
+            if field in data:
+                data[field] = validate_items(data[field], item_schema)
+    try:
+        return schema.model_validate(data)
+    except ValidationError as e:
+        raise StructuredOutputError(f"Response doesn't match {schema.__name__}: {e}") from e
+
+
+def validate_items(values: Any, schema: Type[ModelT]) -> List[ModelT]:
+    """Validate each element on its own, keeping the valid ones"""
+    if not isinstance(values, list):
+        return []
+    valid = []
+    for value in values:
+        try:
+            valid.append(schema.model_validate(value))
+        except ValidationError as e:
+            logger.warning(f"Dropping {schema.__name__} that failed validation: {e.errors()[:1]}")
+    if len(valid) < len(values):
+        logger.info(f"Kept {len(valid)} of {len(values)} {schema.__name__} items")
+    return valid
+
+
+def parse_items(text: str, schema: Type[ModelT], key: Optional[str] = None) -> List[ModelT]:
+    """
+    Salvage the valid `schema` elements of the response's array - the
+    top-level array, or the one under `key` - skipping malformed ones and
+    keeping what was complete before a truncation.
+    """
+    parser = IncrementalJSONParser(key=key)
+    parser.feed(text or "")
+    parser.finish()
+    if parser.found_array:
+        return validate_items(parser.items, schema)
+
+    # The model used the other shape (bare array vs {"key": [...]})
+    try:
+        value = parser.value()
+    except StructuredOutputError:
+        return []
+    if isinstance(value, dict):
+        lists = [v for k, v in value.items() if isinstance(v, list) and (key is None or k == key)]
+        value = lists[0] if len(lists) == 1 else []
+    return validate_items(value, schema)
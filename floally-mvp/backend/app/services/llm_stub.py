@@ -0,0 +1,288 @@
+"""
+Stub LLM Provider
+Local, deterministic stand-in for Anthropic/OpenAI/Gemini, for load tests,
+benchmarks and CI without network access or provider spend.
+
+With LLM_STUB_MODE=true, LLMRouter treats every provider as configured and
+sends each call here instead of the real client. Everything else - task
+routing, fallback, circuit breakers, hedging, the scheduler, the completion
+cache and the usage ledger - runs exactly as in production, keyed by the
+real provider/model names, and costs are the real models' estimated costs.
+
+Responses depend only on the prompt, so repeated runs are comparable:
+- prompts that ask for JSON get schema-valid JSON for their family
+  (inbox analyses, contextual scoring, email importance, save-my-day
+  triage, standup analysis, project plans, goal dates)
+- micro-batched prompts get one answer per inner prompt, in the batch reply format
+- everything else (summaries, drafts, standups) gets plain prose
+
+Latency per provider is log-normal with the configured median and p95,
+scaled by LLM_STUB_LATENCY_SCALE (0 = no delay), and a call fails with
+StubProviderError at the provider's error_rate. Both are drawn from one
+RNG seeded with LLM_STUB_SEED. LLM_STUB_PROFILE (JSON) overrides the
+per-provider profile, e.g. {"anthropic": {"median_ms": 2000, "error_rate": 0.2}}.
+"""
+
+from typing import Any, AsyncIterator, Dict, List, Optional
+from datetime import datetime, timedelta
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import re
+
+from app.services.llm_tokens import count_tokens, estimate_cost
+from app.services.llm_batching import batch_prompt_parts
+from app.services.llm_prompts import PromptInput, prompt_text
+
+logger = logging.getLogger(__name__)
+
+STUB_MODE = os.getenv("LLM_STUB_MODE", "false").lower() == "true"
+STUB_SEED = int(os.getenv("LLM_STUB_SEED", "42"))
+STUB_LATENCY_SCALE = float(os.getenv("LLM_STUB_LATENCY_SCALE", "1.0"))
+STUB_STREAM_CHUNK_WORDS = 8
+
+# Latency (ms) and failure rate per provider
+STUB_PROFILES: Dict[str, Dict[str, float]] = {
+    "anthropic": {"median_ms": 1200, "p95_ms": 4000, "error_rate": 0.01},
+    "openai": {"median_ms": 800, "p95_ms": 2500, "error_rate": 0.01},
+    "gemini": {"median_ms": 500, "p95_ms": 1500, "error_rate": 0.01},
+}
+
+_WORDS = (
+    "review reply schedule follow up project deadline client budget meeting "
+    "draft update priority team proposal timeline notes invoice design launch "
+    "feedback agenda contract plan research summary decision next steps"
+).split()
+
+_INDEX_PATTERN = re.compile(r"""['"]index['"]:\s*(\d+)""")
+_EMAIL_ID_PATTERN = re.compile(r"Email (\d+) \(ID: ([^)]*)\)")
+
+
+class StubProviderError(Exception):
+    """Injected provider failure"""
+
+
+def _load_profiles() -> Dict[str, Dict[str, float]]:
+    profiles = {provider: dict(profile) for provider, profile in STUB_PROFILES.items()}
+    raw = os.getenv("LLM_STUB_PROFILE")
+    if raw:
+        try:
+            for provider, overrides in json.loads(raw).items():
+                profiles.setdefault(provider, dict(STUB_PROFILES["openai"])).update(overrides)
+        except (ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring invalid LLM_STUB_PROFILE: {e}")
+    return profiles
+
+
+class StubProvider:
+    """Answers provider calls locally with deterministic, schema-valid output"""
+
+    def __init__(
+        self,
+        profiles: Optional[Dict[str, Dict[str, float]]] = None,
+        seed: int = STUB_SEED,
+        latency_scale: float = STUB_LATENCY_SCALE
+    ):
+        self.profiles = profiles or _load_profiles()
+        self.latency_scale = latency_scale
+        self._rng = random.Random(seed)
+
+    async def complete(
+        self,
+        provider: str,
+        prompt: PromptInput,
+        model: str,
+        system_prompt: Optional[str],
+        max_tokens: int,
+        temperature: float
+    ) -> Dict[str, Any]:
+        """Same result shape as LLMRouter's provider calls"""
+        prompt = prompt_text(prompt)
+        latency, fail = self._draw(provider)
+        await asyncio.sleep(latency)
+        if fail:
+            raise StubProviderError(f"Injected {provider} failure")
+        text = respond(prompt)
+        return self._result(provider, model, prompt, system_prompt, text)
+
+    async def stream(
+        self,
+        provider: str,
+        prompt: PromptInput,
+        model: str,
+        system_prompt: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        usage: Dict[str, Any]
+    ) -> AsyncIterator[str]:
+        """Yield the response in word chunks; the drawn latency is time to first chunk"""
+        prompt = prompt_text(prompt)
+        latency, fail = self._draw(provider)
+        await asyncio.sleep(latency)
+        if fail:
+            raise StubProviderError(f"Injected {provider} failure")
+        text = respond(prompt)
+        words = text.split(" ")
+        for start in range(0, len(words), STUB_STREAM_CHUNK_WORDS):
+            chunk = " ".join(words[start:start + STUB_STREAM_CHUNK_WORDS])
+            yield chunk if start == 0 else " " + chunk
+            await asyncio.sleep(0)
+        result = self._result(provider, model, prompt, system_prompt, text)
+        usage.update({k: v for k, v in result.items() if k != "text"})
+
+    def _draw(self, provider: str):
+        """(latency seconds, whether this call fails)"""
+        profile = self.profiles.get(provider, STUB_PROFILES["openai"])
+        median = max(profile.get("median_ms", 0), 0.001)
+        p95 = max(profile.get("p95_ms", median), median)
+        sigma = math.log(p95 / median) / 1.645
+        latency_ms = self._rng.lognormvariate(math.log(median), sigma)
+        fail = self._rng.random() < profile.get("error_rate", 0.0)
+        return latency_ms / 1000 * self.latency_scale, fail
+
+    @staticmethod
+    def _result(provider: str, model: str, prompt: str, system_prompt: Optional[str], text: str) -> Dict[str, Any]:
+        input_tokens = count_tokens(prompt, model) + count_tokens(system_prompt, model)
+        output_tokens = count_tokens(text, model)
+        return {
+            "text": text,
+            "provider": provider,
+            "model": model,
+            "tokens_used": input_tokens + output_tokens,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cost_estimate": estimate_cost(model, input_tokens, output_tokens)
+        }
+
+
+def respond(prompt: str) -> str:
+    """Deterministic response for a prompt, shaped like the caller expects"""
+    parts = batch_prompt_parts(prompt)
+    if parts is not None:
+        return json.dumps({"responses": [
+            {"request": i, "response": _as_json_value(respond(part))} for i, part in enumerate(parts)
+        ]})
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).hexdigest())
+    if '"analyses"' in prompt:
+        return json.dumps({"analyses": [
+            {
+                "index": index,
+                "importance_score": rng.randint(5, 95),
+                "reason": _phrase(rng, 6),
+                "suggested_action": rng.choice(["read_now", "read_later", "archive", "unsubscribe"]),
+                "confidence": round(rng.uniform(0.3, 0.95), 2)
+            }
+            for index in _indices(prompt)
+        ]})
+    if '"adjusted_score"' in prompt:
+        return json.dumps([
+            {
+                "index": index,
+                "adjusted_score": rng.randint(5, 95),
+                "reasoning": _phrase(rng, 8),
+                "relationship_insight": _phrase(rng, 5),
+                "suggested_action": rng.choice(["reply_now", "review_today", "read_later", "archive"]),
+                "confidence": round(rng.uniform(0.5, 0.95), 2)
+            }
+            for index in _indices(prompt)
+        ])
+    if '"emailIndex"' in prompt:
+        analyses = []
+        for number, email_id in _EMAIL_ID_PATTERN.findall(prompt):
+            important = rng.random() < 0.4
+            analyses.append({
+                "emailId": email_id,
+                "emailIndex": int(number) - 1,
+                "important": important,
+                "priority": rng.choice(["High", "Medium"]) if important else "Low",
+                "requiresAction": important,
+                "actionType": rng.choice(["Reply", "Review", "Schedule"]) if important else "Archive",
+                "reason": _phrase(rng, 6),
+                "urgency": rng.choice(["Today", "This Week", "When Possible"])
+            })
+        return json.dumps(analyses)
+    if '"top_priorities"' in prompt:
+        return json.dumps({
+            "top_priorities": [{"title": _phrase(rng, 4), "reason": _phrase(rng, 8)} for _ in range(3)],
+            "can_wait": [_phrase(rng, 4) for _ in range(rng.randint(3, 5))],
+            "reassurance": _phrase(rng, 16)
+        })
+    if '"the_one_thing"' in prompt:
+        return json.dumps({
+            "the_one_thing": {
+                "title": _phrase(rng, 4),
+                "description": _phrase(rng, 20),
+                "urgency": rng.randint(40, 95),
+                "project": _phrase(rng, 2),
+                "action": _phrase(rng, 5),
+                "related_emails": ["Email 1"]
+            },
+            "secondary_priorities": [
+                {"title": _phrase(rng, 4), "urgency": rng.randint(10, 70), "action": _phrase(rng, 5)}
+                for _ in range(rng.randint(2, 3))
+            ],
+            "aimy_handling": [{"task": _phrase(rng, 5), "status": "monitoring", "emails": ["Email 2"]}],
+            "daily_plan": [
+                {"time": time, "task": _phrase(rng, 5), "duration": f"{rng.randint(1, 3)} hours"}
+                for time in ("Morning", "Afternoon", "Evening")
+            ],
+            "reasoning": _phrase(rng, 14)
+        })
+    if '"enhanced_description"' in prompt:
+        today = datetime.now()
+        return json.dumps({
+            "enhanced_description": _phrase(rng, 24),
+            "timeline": f"{rng.randint(2, 6)} weeks",
+            "goals": [
+                {
+                    "goal": _phrase(rng, 5),
+                    "deadline": (today + timedelta(days=7 * (i + 1))).strftime('%Y-%m-%d'),
+                    "status": "not_started",
+                    "sub_tasks": [
+                        {"task": _phrase(rng, 4), "estimated_hours": rng.choice([0.5, 1.0, 2.0, 4.0]),
+                         "status": "not_started"}
+                        for _ in range(rng.randint(3, 5))
+                    ]
+                }
+                for i in range(rng.randint(3, 5))
+            ],
+            "success_metrics": _phrase(rng, 10),
+            "recommended_priority": rng.choice(["low", "medium", "high", "critical"])
+        })
+    if "Goals to schedule:" in prompt:
+        today = datetime.now()
+        return json.dumps({"goals": [
+            {"goal": goal, "deadline": (today + timedelta(days=7 * (i + 1))).strftime('%Y-%m-%d')}
+            for i, goal in enumerate(_numbered_goals(prompt))
+        ]})
+    return _prose(rng)
+
+
+def _as_json_value(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _indices(prompt: str) -> List[int]:
+    return sorted({int(index) for index in _INDEX_PATTERN.findall(prompt)})
+
+
+def _numbered_goals(prompt: str) -> List[str]:
+    section = prompt.split("Goals to schedule:", 1)[1].strip().split("\n\n", 1)[0]
+    return [re.sub(r"^\d+\.\s*", "", line).strip() for line in section.splitlines() if line.strip()]
+
+
+def _phrase(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(_WORDS) for _ in range(words))
+    return text[0].upper() + text[1:]
+
+
+def _prose(rng: random.Random) -> str:
+    sentences = [_phrase(rng, rng.randint(8, 16)) + "." for _ in range(rng.randint(3, 6))]
+    return " ".join(sentences)
@@ -0,0 +1,261 @@
+"""
+LLM Token Accounting
+Model pricing/limits table, token counting and pre-flight request sizing.
+
+Provider usage metadata is always preferred for what a call actually used;
+count_tokens() is for everything else - pre-flight budgeting, scheduler
+reservations and providers that return no usage. It uses tiktoken when it
+is installed and its encoding files can be loaded (exact for OpenAI models,
+a close estimate for Claude and Gemini) and a word/character heuristic
+otherwise.
+
+MODEL_SPECS covers every model TASK_CONFIGS can route to. Prices change, so
+they can be overridden without a deploy by pointing LLM_MODEL_SPECS_FILE at
+a JSON file of {model: {field: value}} entries, merged over the defaults.
+"""
+
+from typing import Dict, Optional, Tuple
+from functools import lru_cache
+import json
+import logging
+import math
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+# Import tiktoken (optional - falls back to a heuristic if not installed)
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+MAX_INPUT_TOKENS = int(os.getenv("LLM_MAX_INPUT_TOKENS", "100000"))
+MIN_OUTPUT_TOKENS = 256
+SAFETY_MARGIN_TOKENS = 64  # Message framing and tokenizer differences
+
+# USD per 1M tokens; context_window and max_output in tokens
+MODEL_SPECS: Dict[str, Dict] = {
+    "claude-3-haiku-20240307": {
+        "provider": "anthropic", "input": 0.25, "output": 1.25,
+        "context_window": 200_000, "max_output": 4_096
+    },
+    "claude-3-5-sonnet-20241022": {
+        "provider": "anthropic", "input": 3.0, "output": 15.0,
+        "context_window": 200_000, "max_output": 8_192
+    },
+    "claude-sonnet-4-20250514": {
+        "provider": "anthropic", "input": 3.0, "output": 15.0,
+        "context_window": 200_000, "max_output": 64_000
+    },
+    "claude-3-opus-20240229": {
+        "provider": "anthropic", "input": 15.0, "output": 75.0,
+        "context_window": 200_000, "max_output": 4_096
+    },
+    "gpt-4o-mini": {
+        "provider": "openai", "input": 0.15, "output": 0.60,
+        "context_window": 128_000, "max_output": 16_384
+    },
+    "gpt-4o": {
+        "provider": "openai", "input": 2.5, "output": 10.0,
+        "context_window": 128_000, "max_output": 16_384
+    },
+    "o1-preview": {
+        "provider": "openai", "input": 15.0, "output": 60.0,
+        "context_window": 128_000, "max_output": 32_768
+    },
+    "gemini-2.5-flash": {
+        "provider": "gemini", "input": 0.30, "output": 2.50,
+        "context_window": 1_048_576, "max_output": 65_536
+    },
+    "gemini-2.0-flash-exp": {
+        "provider": "gemini", "input": 0.075, "output": 0.30,
+        "context_window": 1_048_576, "max_output": 8_192
+    },
+    "gemini-1.5-flash": {
+        "provider": "gemini", "input": 0.075, "output": 0.30,
+        "context_window": 1_048_576, "max_output": 8_192
+    },
+    "gemini-1.5-pro": {
+        "provider": "gemini", "input": 1.25, "output": 5.0,
+        "context_window": 2_097_152, "max_output": 8_192
+    },
+}
+
+# Used for models missing from MODEL_SPECS (priced conservatively)
+PROVIDER_DEFAULT_SPECS: Dict[str, Dict] = {
+    "anthropic": {"input": 3.0, "output": 15.0, "context_window": 200_000, "max_output": 4_096},
+    "openai": {"input": 2.5, "output": 10.0, "context_window": 128_000, "max_output": 4_096},
+    "gemini": {"input": 0.30, "output": 2.50, "context_window": 1_048_576, "max_output": 8_192},
+}
+
+# Prompt-cache token prices as multiples of the model's input price
+PROMPT_CACHE_PRICING: Dict[str, Dict[str, float]] = {
+    "anthropic": {"read": 0.1, "write": 1.25},
+    "openai": {"read": 0.5, "write": 1.0},
+    "gemini": {"read": 0.25, "write": 1.0},
+}
+
+# cl100k/o200k undercount Claude's tokenizer a little; scale the estimate up
+TOKENIZER_CORRECTION: Dict[str, float] = {
+    "anthropic": 1.1,
+    "openai": 1.0,
+    "gemini": 1.0,
+}
+
+_WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def _load_spec_overrides():
+    path = os.getenv("LLM_MODEL_SPECS_FILE")
+    if not path:
+        return
+    try:
+        with open(path) as f:
+            overrides = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not load LLM_MODEL_SPECS_FILE {path}: {e}")
+        return
+    for model, spec in overrides.items():
+        MODEL_SPECS[model] = {**MODEL_SPECS.get(model, {}), **spec}
+
+
+_load_spec_overrides()
+
+
+def provider_for_model(model: str) -> str:
+    spec = MODEL_SPECS.get(model)
+    if spec:
+        return spec["provider"]
+    if model.startswith("claude"):
+        return "anthropic"
+    if model.startswith("gemini"):
+        return "gemini"
+    return "openai"
+
+
+@lru_cache(maxsize=None)
+def model_spec(model: str) -> Dict:
+    """Pricing and limits for a model (provider defaults if it isn't in the table)"""
+    spec = MODEL_SPECS.get(model)
+    if spec is not None:
+        return spec
+    provider = provider_for_model(model)
+    logger.warning(f"No pricing for model {model} - using {provider} defaults")
+    return {"provider": provider, **PROVIDER_DEFAULT_SPECS[provider]}
+
+
+def estimate_cost(
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    cache_read_tokens: int = 0,
+    cache_write_tokens: int = 0
+) -> float:
+    """
+    USD cost of a call.
+
+    input_tokens is all prompt tokens; cache_read_tokens and
+    cache_write_tokens are the parts of it read from / written to the
+    provider's prompt cache, priced at PROMPT_CACHE_PRICING multiples of
+    the input price.
+    """
+    spec = model_spec(model)
+    cache_pricing = PROMPT_CACHE_PRICING[spec.get("provider") or provider_for_model(model)]
+    uncached = max(input_tokens - cache_read_tokens - cache_write_tokens, 0)
+    input_cost = spec["input"] * (
+        uncached +
+        cache_read_tokens * cache_pricing["read"] +
+        cache_write_tokens * cache_pricing["write"]
+    )
+    return (input_cost + output_tokens * spec["output"]) / 1_000_000
+
+
+@lru_cache(maxsize=None)
+def _encoding(name: str):
+    """tiktoken encoding, or None if tiktoken or its encoding files aren't available"""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning(f"tiktoken encoding {name} unavailable, estimating tokens: {e}")
+        return None
+
+
+def _encoding_for(model: str):
+    return _encoding("o200k_base" if model.startswith(("gpt-4o", "o1")) else "cl100k_base")
+
+
+def count_tokens(text: Optional[str], model: str) -> int:
+    """Estimated tokens for text as `model` would count them"""
+    if not text:
+        return 0
+    encoding = _encoding_for(model)
+    if encoding is not None:
+        tokens = len(encoding.encode(text, disallowed_special=()))
+    else:
+        # Roughly one token per word/punctuation mark, never less than 4 chars/token
+        tokens = max(len(_WORD_PATTERN.findall(text)), len(text) // 4)
+    return math.ceil(tokens * TOKENIZER_CORRECTION.get(provider_for_model(model), 1.0))
+
+
+def trim_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """
+    Cut text to about max_tokens, dropping the middle.
+
+    Prompts usually open with the task and end with output instructions,
+    so both ends are kept and the bulk content in between is shortened.
+    """
+    current = count_tokens(text, model)
+    if current <= max_tokens:
+        return text
+    marker = f"\n\n[... {current - max_tokens} tokens trimmed ...]\n\n"
+    budget = max(0, max_tokens - count_tokens(marker, model))
+    # Work in characters at the text's own chars-per-token ratio, shrinking
+    # a little more if the kept parts turn out denser than average
+    keep_chars = int(len(text) * budget / current)
+    for _ in range(3):
+        head = keep_chars * 2 // 3
+        tail = keep_chars - head
+        trimmed = text[:head] + marker + (text[-tail:] if tail else "")
+        if count_tokens(trimmed, model) <= max_tokens:
+            break
+        keep_chars = int(keep_chars * 0.9)
+    return trimmed
+
+
+def fit_request(
+    prompt: str,
+    system_prompt: Optional[str],
+    model: str,
+    max_tokens: int
+) -> Tuple[str, int, int]:
+    """
+    Pre-flight sizing for one call.
+
+    Clamps max_tokens to the model's output limit and what's left of its
+    context window, and trims the prompt if it exceeds the input budget
+    (LLM_MAX_INPUT_TOKENS or the context window, whichever is smaller).
+
+    Returns:
+        (prompt, max_tokens, input_tokens)
+    """
+    spec = model_spec(model)
+    max_tokens = min(max_tokens, spec["max_output"])
+    system_tokens = count_tokens(system_prompt, model)
+    prompt_tokens = count_tokens(prompt, model)
+
+    input_limit = min(
+        MAX_INPUT_TOKENS,
+        spec["context_window"] - min(max_tokens, MIN_OUTPUT_TOKENS)
+    ) - system_tokens - SAFETY_MARGIN_TOKENS
+    if prompt_tokens > input_limit:
+        logger.warning(f"Prompt of {prompt_tokens} tokens trimmed to {input_limit} for {model}")
+        prompt = trim_to_tokens(prompt, max(input_limit, 0), model)
+        prompt_tokens = count_tokens(prompt, model)
+
+    input_tokens = system_tokens + prompt_tokens
+    max_tokens = max(1, min(max_tokens, spec["context_window"] - input_tokens - SAFETY_MARGIN_TOKENS))
+    return prompt, max_tokens, input_tokens
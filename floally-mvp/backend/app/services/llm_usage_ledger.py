@@ -0,0 +1,199 @@
+"""
+LLM Usage Ledger
+Append-only record of every completion LLMRouter serves, for cost and
+latency reporting that survives restarts and can be broken down per user.
+
+Each completion (including cache hits, at zero cost) becomes one
+llm_usage_ledger row: user, endpoint, task type, provider, model, tokens
+(with prompt-cache reads/writes), latency, cost, cache hit and whether a
+fallback provider answered. Rows are
+buffered and written with one bulk INSERT once LLM_LEDGER_BATCH_SIZE rows
+are pending or the oldest is LLM_LEDGER_MAX_AGE_SECONDS old; the router
+flushes the rest on shutdown and the usage endpoint flushes before querying.
+
+The endpoint is the FastAPI route template ("POST /api/messages/draft-response")
+of the request being handled, bound by LLMUsageContextMiddleware. Calls made
+outside a request are recorded with no endpoint.
+"""
+
+from typing import Callable, Dict, List, Optional
+from contextvars import ContextVar
+from datetime import datetime
+import asyncio
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, case, func, insert
+from sqlalchemy.orm import Session
+
+from app.database import Base, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+LEDGER_ENABLED = os.getenv("LLM_LEDGER_ENABLED", "true").lower() != "false"
+LEDGER_BATCH_SIZE = int(os.getenv("LLM_LEDGER_BATCH_SIZE", "50"))
+LEDGER_MAX_AGE_SECONDS = float(os.getenv("LLM_LEDGER_MAX_AGE_SECONDS", "10"))
+
+_request_scope: ContextVar[Optional[dict]] = ContextVar("llm_request_scope", default=None)
+
+
+class LLMUsageRecord(Base):
+    """One served completion"""
+    __tablename__ = "llm_usage_ledger"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    user_id = Column(String, index=True)
+    endpoint = Column(String, index=True)
+    task_type = Column(String)
+    provider = Column(String)
+    model = Column(String)
+    input_tokens = Column(Integer, default=0)
+    output_tokens = Column(Integer, default=0)
+    cache_read_tokens = Column(Integer, default=0)  # Part of input_tokens read from the provider's prompt cache
+    cache_write_tokens = Column(Integer, default=0)  # Part of input_tokens written to it
+    latency_ms = Column(Integer)
+    cost_usd = Column(Float, default=0.0)
+    cache_hit = Column(Boolean, default=False)
+    fallback = Column(Boolean, default=False)
+
+
+class LLMUsageContextMiddleware:
+    """ASGI middleware that lets the ledger see which route an LLM call belongs to"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            # Routing fills scope["route"] in later; we keep the same dict
+            _request_scope.set(scope)
+        await self.app(scope, receive, send)
+
+
+def current_endpoint() -> Optional[str]:
+    """Route template of the request being handled, if any"""
+    scope = _request_scope.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path")
+    return f"{scope.get('method', '')} {path}".strip()
+
+
+class UsageLedger:
+    """Write-behind buffer of LLMUsageRecord rows"""
+
+    def __init__(self, session_factory: Optional[Callable] = None):
+        self.session_factory = session_factory or SessionLocal
+        self._rows: List[Dict] = []
+        self._oldest: Optional[float] = None
+        self._lock = threading.Lock()
+        self._pending_flush: Optional[asyncio.Future] = None
+
+    def record(self, **row):
+        """Buffer one completion (LLMUsageRecord column values)"""
+        row.setdefault("created_at", datetime.utcnow())
+        with self._lock:
+            self._rows.append(row)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            due = (
+                len(self._rows) >= LEDGER_BATCH_SIZE or
+                time.monotonic() - self._oldest >= LEDGER_MAX_AGE_SECONDS
+            )
+        if due:
+            self._schedule_flush()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _schedule_flush(self):
+        """Flush in the threadpool so the event loop never waits on the INSERT"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._pending_flush is None or self._pending_flush.done():
+            self._pending_flush = loop.run_in_executor(None, self.flush)
+
+    def flush(self) -> int:
+        """
+        Write all pending rows in one bulk insert.
+
+        Returns:
+            Number of rows written (0 if nothing was pending or the write failed)
+        """
+        with self._lock:
+            rows, self._rows, self._oldest = self._rows, [], None
+        if not rows or self.session_factory is None:
+            return 0
+
+        db = self.session_factory()
+        try:
+            db.execute(insert(LLMUsageRecord), rows)
+            db.commit()
+            logger.info(f"Recorded {len(rows)} LLM usage row(s) in one batch")
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Failed to flush {len(rows)} LLM usage row(s): {e}")
+            db.rollback()
+            return 0
+        finally:
+            db.close()
+
+
+def _aggregate(db: Session, group_column, since: datetime, user_id: Optional[str]) -> List[Dict]:
+    query = db.query(
+        group_column.label("key"),
+        func.count(LLMUsageRecord.id),
+        func.coalesce(func.sum(LLMUsageRecord.input_tokens), 0),
+        func.coalesce(func.sum(LLMUsageRecord.output_tokens), 0),
+        func.coalesce(func.sum(LLMUsageRecord.cache_read_tokens), 0),
+        func.coalesce(func.sum(LLMUsageRecord.cache_write_tokens), 0),
+        func.coalesce(func.sum(LLMUsageRecord.cost_usd), 0.0),
+        func.avg(LLMUsageRecord.latency_ms),
+        func.max(LLMUsageRecord.latency_ms),
+        func.sum(case((LLMUsageRecord.cache_hit, 1), else_=0)),
+        func.sum(case((LLMUsageRecord.fallback, 1), else_=0))
+    ).filter(LLMUsageRecord.created_at >= since)
+    if user_id:
+        query = query.filter(LLMUsageRecord.user_id == user_id)
+    rows = query.group_by(group_column).order_by(func.sum(LLMUsageRecord.cost_usd).desc()).all()
+
+    return [
+        {
+            "key": str(key) if key is not None else None,
+            "calls": calls,
+            "input_tokens": int(input_tokens),
+            "output_tokens": int(output_tokens),
+            "cache_read_tokens": int(cache_read_tokens),
+            "cache_write_tokens": int(cache_write_tokens),
+            "cost_usd": round(float(cost), 6),
+            "avg_latency_ms": round(float(avg_latency), 1) if avg_latency is not None else None,
+            "max_latency_ms": max_latency,
+            "cache_hit_rate": round((cache_hits or 0) / calls, 3) if calls else 0.0,
+            "fallbacks": int(fallbacks or 0)
+        }
+        for (
+            key, calls, input_tokens, output_tokens, cache_read_tokens, cache_write_tokens,
+            cost, avg_latency, max_latency, cache_hits, fallbacks
+        ) in rows
+    ]
+
+
+def usage_summary(db: Session, since: datetime, user_id: Optional[str] = None) -> Dict:
+    """Cost, token and latency aggregates per user, endpoint, day and model since `since`"""
+    return {
+        "since": since.isoformat(),
+        "by_user": _aggregate(db, LLMUsageRecord.user_id, since, user_id),
+        "by_endpoint": _aggregate(db, LLMUsageRecord.endpoint, since, user_id),
+        "by_day": sorted(
+            _aggregate(db, func.date(LLMUsageRecord.created_at), since, user_id),
+            key=lambda row: row["key"] or ""
+        ),
+        "by_model": _aggregate(db, LLMUsageRecord.model, since, user_id)
+    }
@@ -0,0 +1,127 @@
+"""
+Message Analysis Cache
+Remembers per-message AI analyses so curated inbox refreshes only send new
+or changed messages to the model.
+
+An analysis is reused when it was produced for the same user, message ID,
+prompt version, task type (model tier) and user-context hash, and the
+message's analysed fields (category, flags, subject, snippet) still hash to
+the same fingerprint. Bump ANALYSIS_PROMPT_VERSION whenever the analysis
+prompt or its output format changes.
+"""
+
+from typing import Dict, Iterable, List
+from datetime import datetime, timedelta
+import hashlib
+import json
+import logging
+import os
+
+from sqlalchemy import Column, String, JSON, DateTime
+from sqlalchemy.orm import Session
+
+from app.database import Base
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_PROMPT_VERSION = "curated-v2"
+CACHE_DURATION_DAYS = int(os.getenv("MESSAGE_ANALYSIS_CACHE_DAYS", "14"))
+
+
+class MessageAnalysisCache(Base):
+    """One AI analysis per user + message + prompt version/task type + user context"""
+    __tablename__ = "message_analysis_cache"
+
+    user_email = Column(String, primary_key=True)
+    message_id = Column(String, primary_key=True)
+    prompt_version = Column(String, primary_key=True)  # "<ANALYSIS_PROMPT_VERSION>:<task type>"
+    context_hash = Column(String, primary_key=True)
+    fingerprint = Column(String)  # Hash of the message fields the prompt saw
+    analysis = Column(JSON)  # {"importance_score", "reason", "suggested_action", "confidence"}
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:32]
+
+
+def context_hash(user_context: Dict) -> str:
+    """Hash of the user context fields that appear in the analysis prompt"""
+    return _digest([
+        user_context.get('role', 'Professional'),
+        user_context.get('priorities', ['Focus', 'Efficiency']),
+        user_context.get('projects', ['General Work']),
+    ])
+
+
+def message_fingerprint(summary: Dict) -> str:
+    """Hash of a prompt message summary, minus its position in the batch"""
+    return _digest({k: v for k, v in summary.items() if k != 'index'})
+
+
+class MessageAnalysisStore:
+    """Lookup and save memoized analyses for one user + context + task type"""
+
+    def __init__(self, db: Session, user_email: str, user_context: Dict, task_type: str = "light"):
+        self.db = db
+        self.user_email = user_email
+        self.context_hash = context_hash(user_context)
+        # Analyses from different model tiers are never served for each other
+        self.prompt_version = f"{ANALYSIS_PROMPT_VERSION}:{task_type}"
+
+    def lookup(self, fingerprints: Dict[str, str]) -> Dict[str, Dict]:
+        """
+        Cached analyses still valid for these messages.
+
+        Args:
+            fingerprints: message_id -> message_fingerprint()
+
+        Returns:
+            message_id -> analysis (only for hits)
+        """
+        if not fingerprints:
+            return {}
+        cutoff = datetime.utcnow() - timedelta(days=CACHE_DURATION_DAYS)
+        rows = self.db.query(MessageAnalysisCache).filter(
+            MessageAnalysisCache.user_email == self.user_email,
+            MessageAnalysisCache.prompt_version == self.prompt_version,
+            MessageAnalysisCache.context_hash == self.context_hash,
+            MessageAnalysisCache.message_id.in_(list(fingerprints)),
+            MessageAnalysisCache.created_at >= cutoff
+        )
+        return {
+            row.message_id: row.analysis
+            for row in rows
+            if row.fingerprint == fingerprints[row.message_id]
+        }
+
+    def save(self, entries: Iterable[tuple]):
+        """Store (message_id, fingerprint, analysis) tuples and commit"""
+        now = datetime.utcnow()
+        count = 0
+        for message_id, fingerprint, analysis in entries:
+            self.db.merge(MessageAnalysisCache(
+                user_email=self.user_email,
+                message_id=message_id,
+                prompt_version=self.prompt_version,
+                context_hash=self.context_hash,
+                fingerprint=fingerprint,
+                analysis=analysis,
+                created_at=now
+            ))
+            count += 1
+        if count:
+            self.db.commit()
+            logger.info(f"Cached {count} message analyses for {self.user_email}")
+
+
+def strip_index(analysis: Dict) -> Dict:
+    """Analysis fields worth keeping (the batch index is only valid for one call)"""
+    return {k: v for k, v in analysis.items() if k != 'index'}
+
+
+def merge_analyses(cached: Dict[int, Dict], fresh: List[Dict]) -> List[Dict]:
+    """Combine {index: cached analysis} with fresh analyses, ordered by index"""
+    merged = [{**analysis, 'index': index} for index, analysis in cached.items()]
+    merged.extend(fresh)
+    return sorted(merged, key=lambda a: a.get('index', 0))
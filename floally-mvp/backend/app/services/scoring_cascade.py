@@ -0,0 +1,173 @@
+"""
+Scoring Cascade
+Confidence-gated escalation of message importance scoring, so the
+expensive model only sees the messages cheaper stages couldn't settle.
+
+Stages, cheapest first:
+- rules: the rule-based score (filters, Gmail signals, ContextualScorer),
+  which every message already has
+- fast: a cheap model, only for messages whose rule confidence is below
+  `fast_threshold`
+- reasoning: the reasoning model, only for messages the fast stage left
+  below `reasoning_threshold` (at most `max_reasoning` per run, least
+  confident first)
+
+A message keeps the result of the last stage that answered it; a stage
+that fails or skips a message leaves the previous result in place.
+Thresholds default from the environment and can be overridden per user
+in UserSettings.ai_preferences["scoring_cascade"].
+"""
+
+from dataclasses import dataclass, replace
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+CASCADE_FAST_THRESHOLD = float(os.getenv("SCORING_CASCADE_FAST_THRESHOLD", "0.7"))
+CASCADE_REASONING_THRESHOLD = float(os.getenv("SCORING_CASCADE_REASONING_THRESHOLD", "0.5"))
+CASCADE_MAX_REASONING = int(os.getenv("SCORING_CASCADE_MAX_REASONING", "20"))
+
+STAGES = ("rules", "fast", "reasoning")
+
+# Confidence assumed for a model answer that doesn't state one
+DEFAULT_MODEL_CONFIDENCE = 0.7
+
+# A stage gets the indices of the messages it should score and the current
+# results, and returns {index: {"importance_score", "confidence", "reason",
+# "suggested_action"}} for the messages it could answer
+Stage = Callable[[List[int], List[Dict[str, Any]]], Awaitable[Dict[int, Dict[str, Any]]]]
+
+
+@dataclass(frozen=True)
+class CascadeThresholds:
+    fast_threshold: float = CASCADE_FAST_THRESHOLD
+    reasoning_threshold: float = CASCADE_REASONING_THRESHOLD
+    max_reasoning: int = CASCADE_MAX_REASONING
+
+    @classmethod
+    def for_user(cls, ai_preferences: Optional[Dict[str, Any]]) -> "CascadeThresholds":
+        """Defaults overridden by the user's ai_preferences["scoring_cascade"]; invalid values are ignored"""
+        thresholds = cls()
+        overrides = (ai_preferences or {}).get("scoring_cascade")
+        if not isinstance(overrides, dict):
+            return thresholds
+        for field in ("fast_threshold", "reasoning_threshold"):
+            value = overrides.get(field)
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and 0.0 <= value <= 1.0:
+                thresholds = replace(thresholds, **{field: float(value)})
+        value = overrides.get("max_reasoning")
+        if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+            thresholds = replace(thresholds, max_reasoning=value)
+        return thresholds
+
+
+def stage_counts(results: List[Dict[str, Any]]) -> Dict[str, int]:
+    """How many messages each stage settled"""
+    counts = {stage: 0 for stage in STAGES}
+    for result in results:
+        counts[result["stage"]] += 1
+    return counts
+
+
+class ScoringCascade:
+    """Runs the cascade and keeps per-stage traffic and hit counts across runs"""
+
+    def __init__(self):
+        self.stats = {"runs": 0, "messages": 0, "stage_errors": 0}
+        for stage in STAGES:
+            self.stats[f"{stage}_reached"] = 0
+            self.stats[f"{stage}_resolved"] = 0
+
+    async def run(
+        self,
+        rule_results: List[Dict[str, Any]],
+        thresholds: CascadeThresholds,
+        fast: Optional[Stage] = None,
+        reasoning: Optional[Stage] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Escalate rule results through the model stages.
+
+        Each rule result needs importance_score (0-100) and confidence (0-1).
+        Returns one result per input, in order, with the settling stage
+        recorded under "stage".
+        """
+        results = [{
+            "importance_score": result["importance_score"],
+            "confidence": result.get("confidence", 0.0),
+            "reason": result.get("reasoning", result.get("reason", "")),
+            "suggested_action": result.get("suggested_action", "read_later"),
+            "stage": "rules"
+        } for result in rule_results]
+
+        fast_ids = [i for i, result in enumerate(results) if result["confidence"] < thresholds.fast_threshold]
+        if fast is not None and fast_ids:
+            await self._escalate("fast", fast, fast_ids, results)
+
+            ambiguous = sorted(
+                (i for i in fast_ids if results[i]["confidence"] < thresholds.reasoning_threshold),
+                key=lambda i: results[i]["confidence"]
+            )[:thresholds.max_reasoning]
+            if reasoning is not None and ambiguous:
+                await self._escalate("reasoning", reasoning, sorted(ambiguous), results)
+
+        self.stats["runs"] += 1
+        self.stats["messages"] += len(results)
+        self.stats["rules_reached"] += len(results)
+        for stage, count in stage_counts(results).items():
+            self.stats[f"{stage}_resolved"] += count
+        return results
+
+    async def _escalate(self, stage: str, score: Stage, indices: List[int], results: List[Dict[str, Any]]):
+        self.stats[f"{stage}_reached"] += len(indices)
+        try:
+            answers = await score(indices, results)
+        except Exception as e:
+            self.stats["stage_errors"] += 1
+            logger.warning(f"Scoring cascade stage '{stage}' failed for {len(indices)} messages: {e}")
+            return
+        for i in indices:
+            answer = answers.get(i)
+            if answer is None:
+                continue
+            results[i].update(
+                importance_score=answer["importance_score"],
+                confidence=answer.get("confidence", DEFAULT_MODEL_CONFIDENCE),
+                reason=answer.get("reason") or results[i]["reason"],
+                suggested_action=answer.get("suggested_action") or results[i]["suggested_action"],
+                stage=stage
+            )
+        logger.info(f"Scoring cascade stage '{stage}' answered {len(answers)} of {len(indices)} messages")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per stage: messages reached, messages settled, hit rate (settled / reached) and share of all traffic"""
+        messages = self.stats["messages"]
+        stages = {}
+        for stage in STAGES:
+            reached = self.stats[f"{stage}_reached"]
+            resolved = self.stats[f"{stage}_resolved"]
+            stages[stage] = {
+                "reached": reached,
+                "resolved": resolved,
+                "hit_rate": round(resolved / reached, 3) if reached else 0.0,
+                "traffic_share": round(reached / messages, 3) if messages else 0.0
+            }
+        return {
+            "runs": self.stats["runs"],
+            "messages": messages,
+            "stage_errors": self.stats["stage_errors"],
+            "stages": stages
+        }
+
+
+# Global cascade instance
+_cascade = None
+
+def get_scoring_cascade() -> ScoringCascade:
+    """Get singleton scoring cascade (process-wide stage statistics)"""
+    global _cascade
+    if _cascade is None:
+        _cascade = ScoringCascade()
+    return _cascade
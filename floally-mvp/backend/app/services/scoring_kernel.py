@@ -0,0 +1,230 @@
+"""
+Vectorized Scoring Kernel
+Columnar (NumPy) version of ContextualScorer's composite score, confidence
+and suggested action, plus the compositeScore blend used by curated messages.
+
+The scalar ContextualScorer path is fine for a 60-message inbox; bulk
+re-scoring (backfills, autonomous processing of thousands of messages,
+weight tuning experiments) should pack messages once with `pack_features`
+and run `score_features` over whole arrays instead of branching per message.
+
+Results match the scalar implementation exactly (see test_scoring_kernel.py),
+so any weight change must be made in both places.
+"""
+
+from typing import Dict, Iterable, List
+import numpy as np
+
+# Integer codes - index into these lists
+RELATIONSHIPS = ["unknown", "vip", "important", "occasional", "noise", "informational"]
+TRUST_LEVELS = ["neutral", "trusted", "blocked", "one_time"]
+CATEGORIES = ["other", "promotional", "primary"]
+ACTIONS = ["reply_now", "review_today", "read_later", "archive_if_not_urgent", "auto_archive", "user_decides"]
+
+RELATIONSHIP_CODES = {name: code for code, name in enumerate(RELATIONSHIPS)}
+TRUST_CODES = {name: code for code, name in enumerate(TRUST_LEVELS)}
+CATEGORY_CODES = {name: code for code, name in enumerate(CATEGORIES)}
+ACTION_CODES = {name: code for code, name in enumerate(ACTIONS)}
+
+# Score contribution per code (same weights as ContextualScorer._calculate_composite_score)
+RELATIONSHIP_WEIGHTS = np.array([0.0, 40.0, 30.0, 10.0, -35.0, 5.0])
+TRUST_WEIGHTS = np.array([0.0, 15.0, -50.0, 0.0])
+CATEGORY_WEIGHTS = np.array([0.0, -25.0, 10.0])
+
+URGENT_KEYWORDS = ["urgent", "asap", "deadline", "today", "approval needed", "review needed"]
+
+
+def pack_features(
+    messages: List[Dict],
+    sender_stats: Dict[str, object],
+    trust_levels: Dict[str, str]
+) -> Dict[str, np.ndarray]:
+    """
+    Pack messages and their sender features into columns.
+
+    Args:
+        messages: Dicts with sender_email, subject and gmail_signals
+            (same shape as ContextualScorer.score_batch input)
+        sender_stats: sender_email -> SenderStats row (or any object with its counters)
+        trust_levels: sender_email -> trust level value ("trusted", "blocked", ...)
+
+    Returns:
+        Dict of equal-length arrays, one entry per message
+    """
+    n = len(messages)
+    columns = {
+        "has_stats": np.zeros(n, dtype=bool),
+        "total_emails": np.zeros(n, dtype=np.int64),
+        "historical_importance": np.full(n, 0.5),
+        "marked_important": np.zeros(n, dtype=np.int64),
+        "marked_interesting": np.zeros(n, dtype=np.int64),
+        "marked_unimportant": np.zeros(n, dtype=np.int64),
+        "responded": np.zeros(n, dtype=np.int64),
+        "archived": np.zeros(n, dtype=np.int64),
+        "trashed": np.zeros(n, dtype=np.int64),
+        "trust": np.zeros(n, dtype=np.int8),
+        "category": np.zeros(n, dtype=np.int8),
+        "is_starred": np.zeros(n, dtype=bool),
+        "is_important": np.zeros(n, dtype=bool),
+        "has_unsubscribe": np.zeros(n, dtype=bool),
+        "is_urgent": np.zeros(n, dtype=bool),
+    }
+
+    for i, message in enumerate(messages):
+        sender_email = message.get("sender_email") or ""
+        stats = sender_stats.get(sender_email)
+        if stats is not None:
+            columns["has_stats"][i] = True
+            columns["total_emails"][i] = stats.total_emails or 0
+            # None/0 mean "no historical score" in the scalar path
+            columns["historical_importance"][i] = stats.importance_score or 0.0
+            for field in ("marked_important", "marked_interesting", "marked_unimportant",
+                          "responded", "archived", "trashed"):
+                columns[field][i] = getattr(stats, field) or 0
+
+        columns["trust"][i] = TRUST_CODES.get(trust_levels.get(sender_email, "neutral"), 0)
+
+        signals = message.get("gmail_signals") or {}
+        columns["category"][i] = CATEGORY_CODES.get(signals.get("category"), 0)
+        columns["is_starred"][i] = bool(signals.get("is_starred"))
+        columns["is_important"][i] = bool(signals.get("is_important"))
+        columns["has_unsubscribe"][i] = bool(signals.get("has_unsubscribe_link"))
+
+        subject = (message.get("subject") or "").lower()
+        columns["is_urgent"][i] = any(keyword in subject for keyword in URGENT_KEYWORDS)
+
+    return columns
+
+
+def classify_relationships(
+    has_stats: np.ndarray,
+    response_rate: np.ndarray,
+    archive_rate: np.ndarray,
+    importance_rate: np.ndarray,
+    total_emails: np.ndarray
+) -> np.ndarray:
+    """Vectorized ContextualScorer._classify_relationship (returns RELATIONSHIPS codes)"""
+    codes = np.select(
+        [
+            (response_rate > 0.5) & (total_emails >= 3),
+            (importance_rate > 0.6) & (total_emails >= 3),
+            (archive_rate > 0.7) & (total_emails >= 5),
+            total_emails < 3,
+            response_rate > 0.2,
+        ],
+        [
+            RELATIONSHIP_CODES["vip"],
+            RELATIONSHIP_CODES["important"],
+            RELATIONSHIP_CODES["noise"],
+            RELATIONSHIP_CODES["unknown"],
+            RELATIONSHIP_CODES["occasional"],
+        ],
+        default=RELATIONSHIP_CODES["informational"]
+    )
+    # Senders without stats are "unknown" regardless of counters
+    return np.where(has_stats, codes, RELATIONSHIP_CODES["unknown"]).astype(np.int8)
+
+
+def score_features(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Score packed columns.
+
+    Returns:
+        {
+            "importance_score": float array (0-100),
+            "confidence": float array (0-1),
+            "relationship": RELATIONSHIPS codes,
+            "suggested_action": ACTIONS codes
+        }
+    """
+    has_stats = columns["has_stats"]
+    total_emails = columns["total_emails"]
+
+    total_interactions = (
+        columns["marked_important"] + columns["marked_interesting"] +
+        columns["marked_unimportant"] + columns["responded"] +
+        columns["archived"] + columns["trashed"]
+    )
+    safe_total = np.where(total_interactions == 0, 1, total_interactions)
+    response_rate = np.where(total_interactions == 0, 0.0, columns["responded"] / safe_total)
+    archive_rate = np.where(total_interactions == 0, 0.0, columns["archived"] / safe_total)
+    importance_rate = np.where(total_interactions == 0, 0.0, columns["marked_important"] / safe_total)
+
+    relationship = classify_relationships(has_stats, response_rate, archive_rate, importance_rate, total_emails)
+
+    # Terms are added in the scalar implementation's order so floats match exactly
+    historical = columns["historical_importance"]
+    score = np.full(len(has_stats), 50.0)
+    score = score + RELATIONSHIP_WEIGHTS[relationship]
+    score = score + np.where(historical != 0, (historical - 0.5) * 30, 0.0)
+    score = score + TRUST_WEIGHTS[columns["trust"]]
+    score = score + np.where(columns["is_starred"], 20.0, 0.0)
+    score = score + np.where(columns["is_important"], 15.0, 0.0)
+    score = score + CATEGORY_WEIGHTS[columns["category"]]
+    score = score + np.where(columns["is_urgent"], 15.0, 0.0)
+    score = score - np.where(columns["has_unsubscribe"], 20.0, 0.0)
+    score = np.clip(score, 0.0, 100.0)
+
+    effective_total = np.where(has_stats, total_emails, 0)
+    confidence = np.select(
+        [effective_total == 0, effective_total < 3, effective_total < 10],
+        [0.3, 0.5, 0.7],
+        default=0.9
+    )
+
+    action = np.select(
+        [
+            score >= 75,
+            score >= 60,
+            score >= 40,
+            score >= 25,
+            (relationship == RELATIONSHIP_CODES["noise"]) & (archive_rate > 0.8),
+        ],
+        [
+            ACTION_CODES["reply_now"],
+            ACTION_CODES["review_today"],
+            ACTION_CODES["read_later"],
+            ACTION_CODES["archive_if_not_urgent"],
+            ACTION_CODES["auto_archive"],
+        ],
+        default=ACTION_CODES["user_decides"]
+    ).astype(np.int8)
+
+    return {
+        "importance_score": score,
+        "confidence": confidence,
+        "relationship": relationship,
+        "suggested_action": action,
+    }
+
+
+def composite_blend(
+    ai_scores: Iterable[float],
+    sender_scores: Iterable[float],
+    gmail_marked: Iterable[bool],
+    is_primary: Iterable[bool]
+) -> np.ndarray:
+    """
+    Curated inbox compositeScore for many messages at once.
+
+    Args:
+        ai_scores: AI importance (0-100)
+        sender_scores: Sender importance (0-1)
+        gmail_marked: Message is Gmail-important or starred
+        is_primary: Message is in the primary category
+    """
+    ai = np.asarray(list(ai_scores), dtype=float) / 100.0
+    sender = np.asarray(list(sender_scores), dtype=float)
+    gmail_boost = np.where(np.asarray(list(gmail_marked), dtype=bool), 0.2, 0.0)
+    primary_boost = np.where(np.asarray(list(is_primary), dtype=bool), 0.1, 0.0)
+    return (
+        ai * 0.5 +              # AI analysis: 50%
+        sender * 0.3 +          # Sender history: 30%
+        gmail_boost +           # Gmail markers: 20%
+        primary_boost           # Category boost: 10%
+    )
+
+
+def decode(codes: np.ndarray, names: List[str]) -> List[str]:
+    """Map integer codes back to their names"""
+    return [names[int(code)] for code in codes]
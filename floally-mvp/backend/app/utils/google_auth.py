@@ -1,107 +1,237 @@
 """
 Utility functions for Google API authentication
+
+Credentials and built API service objects are cached per process, keyed by
+connected account + token version, so repeat requests skip the
+ConnectedAccount query and the discovery `build()` (tens of ms each time).
+Entries expire with the access token and are invalidated when new tokens
+are stored by the OAuth callback.
 """
 from fastapi import HTTPException
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest
 from sqlalchemy.orm import Session
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+import google_auth_httplib2
+import hashlib
+import httplib2
 import os
+import threading
 
 from app.models.user import ConnectedAccount
 from app.database import SessionLocal
 
 
+# Upper bound on how long a cache entry lives even if the token lasts longer
+SERVICE_CACHE_TTL_SECONDS = int(os.getenv("GOOGLE_SERVICE_CACHE_TTL_SECONDS", "3000"))
+
+# Treat tokens as expired slightly early so in-flight calls don't race expiry
+TOKEN_EXPIRY_SKEW = timedelta(seconds=60)
+
+
+class _CachedAccount:
+    """Credentials and built services for one account at one token version"""
+
+    def __init__(self, account_id: str, token_version: str, credentials: Credentials, expires_at: datetime):
+        self.account_id = account_id
+        self.token_version = token_version
+        self.credentials = credentials
+        self.expires_at = expires_at
+        self.services: Dict[str, object] = {}
+
+    def is_fresh(self) -> bool:
+        return datetime.utcnow() < self.expires_at
+
+
+_account_cache: Dict[str, _CachedAccount] = {}  # user_email -> entry
+_cache_lock = threading.Lock()
+_refresh_locks: Dict[str, threading.Lock] = {}  # account_id -> single-flight refresh lock
+
+
+def _token_version(access_token: str) -> str:
+    """Short fingerprint of an access token (avoids keeping raw tokens as keys)"""
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()[:16]
+
+
+def _get_refresh_lock(account_id: str) -> threading.Lock:
+    with _cache_lock:
+        lock = _refresh_locks.get(account_id)
+        if lock is None:
+            lock = threading.Lock()
+            _refresh_locks[account_id] = lock
+        return lock
+
+
+def _get_cached_account(user_email: str) -> Optional[_CachedAccount]:
+    with _cache_lock:
+        entry = _account_cache.get(user_email)
+        if entry and entry.is_fresh():
+            return entry
+        if entry:
+            del _account_cache[user_email]
+        return None
+
+
+def _store_cached_account(user_email: str, account: ConnectedAccount, credentials: Credentials) -> _CachedAccount:
+    expires_at = datetime.utcnow() + timedelta(seconds=SERVICE_CACHE_TTL_SECONDS)
+    if account.token_expires_at:
+        expires_at = min(expires_at, account.token_expires_at - TOKEN_EXPIRY_SKEW)
+
+    entry = _CachedAccount(
+        account_id=str(account.id),
+        token_version=_token_version(account.access_token),
+        credentials=credentials,
+        expires_at=expires_at
+    )
+    with _cache_lock:
+        current = _account_cache.get(user_email)
+        # Keep already-built services if another thread cached the same token version
+        if current and (current.account_id, current.token_version) == (entry.account_id, entry.token_version):
+            return current
+        _account_cache[user_email] = entry
+    return entry
+
+
+def invalidate_google_services(user_email: str):
+    """Drop cached credentials/services for a user (call after storing new tokens)"""
+    with _cache_lock:
+        _account_cache.pop(user_email, None)
+
+
 def get_user_credentials(user_email: str, db: Session = None) -> Credentials:
     """
     Get Google OAuth credentials for a user from the database
-    
+
     Args:
         user_email: User's email address
         db: Database session (optional, will create if not provided)
-        
+
     Returns:
         Google Credentials object
-        
+
     Raises:
         HTTPException: If credentials not found or invalid
     """
+    cached = _get_cached_account(user_email)
+    if cached:
+        return cached.credentials
+
+    return _load_account(user_email, db).credentials
+
+
+def _load_account(user_email: str, db: Session = None) -> _CachedAccount:
+    """Load credentials from the database, refreshing at most once per account across threads"""
     close_db = False
     if db is None:
         db = SessionLocal()
         close_db = True
-    
+
     try:
         # Find the user's Google account
         account = db.query(ConnectedAccount).filter(
             ConnectedAccount.email == user_email,
             ConnectedAccount.provider == 'google'
         ).first()
-        
+
         if not account:
             raise HTTPException(
                 status_code=401,
                 detail=f"Google account not connected for {user_email}. Please authenticate via: https://floally-mvp-production.up.railway.app/api/auth/login"
             )
-        
+
         if not account.access_token:
             raise HTTPException(
                 status_code=401,
                 detail="Invalid credentials. Please reconnect your Google account."
             )
-        
-        # Create credentials object
-        credentials = Credentials(
-            token=account.access_token,
-            refresh_token=account.refresh_token,
-            token_uri="https://oauth2.googleapis.com/token",
-            client_id=os.getenv('GOOGLE_CLIENT_ID'),
-            client_secret=os.getenv('GOOGLE_CLIENT_SECRET'),
-            scopes=account.scopes or []
-        )
-        
+
         # Check if token is expired and refresh if needed
-        if account.token_expires_at and account.token_expires_at < datetime.utcnow():
-            if credentials.refresh_token:
-                credentials.refresh(Request())
-                # Update tokens in database
-                account.access_token = credentials.token
-                account.token_expires_at = credentials.expiry
-                db.commit()
-        
-        return credentials
-        
+        if account.token_expires_at and account.token_expires_at < datetime.utcnow() and account.refresh_token:
+            with _get_refresh_lock(str(account.id)):
+                # Another request may have refreshed while we waited - reuse its result
+                cached = _get_cached_account(user_email)
+                if cached and cached.account_id == str(account.id):
+                    return cached
+
+                db.refresh(account)
+                if account.token_expires_at and account.token_expires_at < datetime.utcnow():
+                    credentials = _build_credentials(account)
+                    credentials.refresh(Request())
+                    # Update tokens in database
+                    account.access_token = credentials.token
+                    account.token_expires_at = credentials.expiry
+                    db.commit()
+                return _store_cached_account(user_email, account, _build_credentials(account))
+
+        return _store_cached_account(user_email, account, _build_credentials(account))
+
     finally:
         if close_db:
             db.close()
 
 
+def _build_credentials(account: ConnectedAccount) -> Credentials:
+    return Credentials(
+        token=account.access_token,
+        refresh_token=account.refresh_token,
+        token_uri="https://oauth2.googleapis.com/token",
+        client_id=os.getenv('GOOGLE_CLIENT_ID'),
+        client_secret=os.getenv('GOOGLE_CLIENT_SECRET'),
+        scopes=account.scopes or []
+    )
+
+
+def _get_service(user_email: str, db: Session, api: str, version: str):
+    """Get a cached API service for the user's current token, building it once"""
+    entry = _get_cached_account(user_email) or _load_account(user_email, db)
+
+    service_key = f"{api}:{version}"
+    service = entry.services.get(service_key)
+    if service is None:
+        credentials = entry.credentials
+
+        # httplib2 isn't thread-safe: give every request its own Http so the
+        # cached service can be shared across threadpool workers
+        def build_request(http, *args, **kwargs):
+            new_http = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http())
+            return HttpRequest(new_http, *args, **kwargs)
+
+        service = build(
+            api,
+            version,
+            http=google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http()),
+            requestBuilder=build_request
+        )
+        entry.services[service_key] = service
+    return service
+
+
 def get_gmail_service(user_email: str, db: Session = None):
     """
     Get authenticated Gmail service for a user
-    
+
     Args:
         user_email: User's email address
         db: Database session (optional)
-        
+
     Returns:
         Gmail service object
     """
-    credentials = get_user_credentials(user_email, db)
-    return build('gmail', 'v1', credentials=credentials)
+    return _get_service(user_email, db, 'gmail', 'v1')
 
 
 def get_calendar_service(user_email: str, db: Session = None):
     """
     Get authenticated Calendar service for a user
-    
+
     Args:
         user_email: User's email address
         db: Database session (optional)
-        
+
     Returns:
         Calendar service object
     """
-    credentials = get_user_credentials(user_email, db)
-    return build('calendar', 'v3', credentials=credentials)
+    return _get_service(user_email, db, 'calendar', 'v3')
@@ -0,0 +1,39 @@
+"""
+Server-sent events helpers for streaming AI endpoints
+
+Streaming endpoints emit `chunk` events ({"text": ...}) as the model
+generates, then one `done` event with the same payload the matching JSON
+endpoint returns. A failure after the stream has started is reported as an
+`error` event, because the 200 status has already been sent.
+"""
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict
+import json
+import traceback
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one SSE message"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _with_error_event(events: AsyncIterator[str]) -> AsyncIterator[str]:
+    try:
+        async for event in events:
+            yield event
+    except Exception as e:
+        print(f"❌ Stream failed: {e}")
+        print(traceback.format_exc())
+        yield sse_event("error", {"detail": str(e) or type(e).__name__})
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """StreamingResponse for SSE, with proxy buffering disabled"""
+    return StreamingResponse(
+        _with_error_event(events),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
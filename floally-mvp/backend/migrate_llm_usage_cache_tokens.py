@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Add prompt-cache token columns to the llm_usage_ledger table.
+
+This migration adds cache_read_tokens and cache_write_tokens, which record how
+much of each completion's input was served from / written to the provider's
+prompt cache. New databases get them from init_database().
+
+Usage:
+  On Railway: railway run python migrate_llm_usage_cache_tokens.py
+  Locally with DATABASE_URL: python migrate_llm_usage_cache_tokens.py
+"""
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+NEW_COLUMNS = ["cache_read_tokens", "cache_write_tokens"]
+
+def run_migration():
+    """Run the migration to add the prompt-cache token columns"""
+    from sqlalchemy import inspect, text
+    from app.database import engine
+    from app.services.llm_usage_ledger import LLMUsageRecord
+
+    if not engine:
+        print("❌ Database engine not initialized.")
+        print("Make sure DATABASE_URL is set in your environment.")
+        print("\nFor Railway deployment:")
+        print("  railway run python migrate_llm_usage_cache_tokens.py")
+        return False
+
+    print("🔨 Adding prompt-cache columns to llm_usage_ledger...")
+    print(f"Database: {engine.url}")
+
+    try:
+        inspector = inspect(engine)
+        if not inspector.has_table(LLMUsageRecord.__tablename__):
+            # Table not created yet - create it with every column
+            LLMUsageRecord.__table__.create(engine, checkfirst=True)
+            print("\n✅ Created table llm_usage_ledger")
+            return True
+
+        existing = {col["name"] for col in inspector.get_columns(LLMUsageRecord.__tablename__)}
+        with engine.begin() as conn:
+            for column in NEW_COLUMNS:
+                if column in existing:
+                    print(f"  - {column}: already present")
+                    continue
+                conn.execute(text(
+                    f"ALTER TABLE {LLMUsageRecord.__tablename__} ADD COLUMN {column} INTEGER DEFAULT 0"
+                ))
+                print(f"  - {column}: added")
+
+        print("\n✅ Migration successful!")
+        return True
+
+    except Exception as e:
+        print(f"\n❌ Migration failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = run_migration()
+    sys.exit(0 if success else 1)
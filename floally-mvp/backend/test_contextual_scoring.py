@@ -0,0 +1,86 @@
+"""
+Tests for batched contextual scoring
+Run: python -m pytest test_contextual_scoring.py -v
+"""
+import sys
+import os
+import uuid
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _seeded_session():
+    """Session factory with a profile, sender history and trust rows for one user"""
+    from testing_utils import sqlite_session_factory
+    from app.models.user import UserProfile, SenderStats
+    from app.models.trusted_sender import TrustedSender, TrustLevel
+
+    session_factory = sqlite_session_factory(UserProfile, SenderStats, TrustedSender)
+    user_id = uuid.uuid4()
+    db = session_factory()
+    db.add(UserProfile(user_id=user_id, role="Founder", priorities=["fundraising"], onboarding_completed=True))
+    db.add_all([
+        SenderStats(user_id=user_id, sender_email="vip@fund.com", sender_domain="fund.com",
+                    total_emails=10, responded=8, marked_important=2, importance_score=0.9),
+        SenderStats(user_id=user_id, sender_email="news@promo.com", sender_domain="promo.com",
+                    total_emails=20, archived=18, importance_score=0.1),
+        TrustedSender(user_id=user_id, sender_email="vip@fund.com", trust_level=TrustLevel.TRUSTED),
+        TrustedSender(user_id=user_id, sender_email="spam@bad.com", trust_level=TrustLevel.BLOCKED),
+    ])
+    db.commit()
+    db.close()
+    return session_factory, user_id
+
+
+MESSAGES = [
+    {"sender_email": "vip@fund.com", "sender_name": "VIP", "subject": "Term sheet",
+     "snippet": "Can we talk today?", "gmail_signals": {"is_important": True}},
+    {"sender_email": "news@promo.com", "subject": "50% off", "snippet": "Sale ends soon",
+     "gmail_signals": {"category": "promotions"}},
+    {"sender_email": "spam@bad.com", "subject": "Invoice", "snippet": "Open the attachment"},
+    {"sender_email": "new@person.com", "subject": "Intro", "snippet": "Hi there"},
+    {"sender_email": "vip@fund.com", "subject": "Follow up", "snippet": "Any update?"},
+]
+
+
+def test_score_batch_matches_per_message_scoring_with_fewer_queries():
+    """score_batch returns what calculate_contextual_importance would, using a fixed number of queries"""
+    from testing_utils import record_statements
+    from app.services.contextual_scoring import ContextualScorer
+
+    session_factory, user_id = _seeded_session()
+    statements = record_statements(session_factory)
+
+    single_db = session_factory()
+    expected = [
+        ContextualScorer(single_db).calculate_contextual_importance(
+            user_id=user_id,
+            sender_email=m["sender_email"],
+            sender_name=m.get("sender_name"),
+            subject=m["subject"],
+            snippet=m["snippet"],
+            gmail_signals=m.get("gmail_signals") or {}
+        )
+        for m in MESSAGES
+    ]
+    single_queries = len(statements)
+
+    statements.clear()
+    batch_db = session_factory()
+    scorer = ContextualScorer(batch_db)
+    assert scorer.score_batch(user_id, MESSAGES) == expected
+    assert len(statements) == 3
+    assert single_queries == 3 * len(MESSAGES)
+
+    # Everything is cached on the scorer: scoring the same senders again costs nothing
+    statements.clear()
+    scorer.score_batch(user_id, MESSAGES[:2])
+    assert statements == []
+
+    assert {r["sender_relationship"] for r in expected} >= {"vip", "noise", "unknown"}
+    print("✅ score_batch equivalent to per-message scoring")
+
+
+if __name__ == "__main__":
+    test_score_batch_matches_per_message_scoring_with_fewer_queries()
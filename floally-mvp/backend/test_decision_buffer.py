@@ -0,0 +1,78 @@
+"""
+Tests for the write-behind decision buffer
+Run: python -m pytest test_decision_buffer.py -v
+"""
+import sys
+import os
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _decision(buffer, i, confidence=0.95):
+    from app.services.decision_transparency import DecisionType
+
+    buffer.record_decision(
+        user_email="a@example.com",
+        message_id=f"m{i}",
+        decision_type=DecisionType.IMPORTANCE_SCORING,
+        decision_data={"importance_score": 80},
+        reasoning="Known sender",
+        confidence=confidence
+    )
+
+
+def test_flush_writes_all_decisions_in_one_insert():
+    """Buffered decisions reach the table with a single INSERT and keep their derived status"""
+    from testing_utils import sqlite_session_factory, record_statements
+    from app.services.decision_transparency import DecisionBuffer, AimiDecision, DecisionStatus
+
+    session_factory = sqlite_session_factory(AimiDecision)
+    statements = record_statements(session_factory)
+    db = session_factory()
+    buffer = DecisionBuffer(db)
+
+    for i in range(50):
+        _decision(buffer, i, confidence=0.95 if i % 2 else 0.3)
+    assert len(buffer) == 50 and statements == []
+
+    assert buffer.flush() == 50
+    assert len([s for s in statements if s.lstrip().upper().startswith("INSERT")]) == 1
+    assert len(buffer) == 0 and buffer.flush() == 0
+
+    rows = db.query(AimiDecision).order_by(AimiDecision.id).all()
+    assert [r.message_id for r in rows] == [f"m{i}" for i in range(50)]
+    assert {r.status for r in rows} == {DecisionStatus.HANDLED, DecisionStatus.YOUR_CALL}
+    print("✅ 50 decisions in one INSERT")
+
+
+def test_buffer_flushes_itself_when_full_or_old():
+    """The buffer writes on its own at DECISION_BUFFER_MAX_SIZE rows or DECISION_BUFFER_MAX_AGE_SECONDS"""
+    from testing_utils import sqlite_session_factory
+    from app.services import decision_transparency
+    from app.services.decision_transparency import DecisionBuffer, AimiDecision
+
+    db = sqlite_session_factory(AimiDecision)()
+    max_size, max_age = decision_transparency.DECISION_BUFFER_MAX_SIZE, decision_transparency.DECISION_BUFFER_MAX_AGE_SECONDS
+    try:
+        decision_transparency.DECISION_BUFFER_MAX_SIZE = 3
+        decision_transparency.DECISION_BUFFER_MAX_AGE_SECONDS = 3600
+        buffer = DecisionBuffer(db)
+        for i in range(4):
+            _decision(buffer, i)
+        assert db.query(AimiDecision).count() == 3 and len(buffer) == 1
+
+        decision_transparency.DECISION_BUFFER_MAX_AGE_SECONDS = 0.05
+        time.sleep(0.06)
+        _decision(buffer, 4)
+        assert db.query(AimiDecision).count() == 5 and len(buffer) == 0
+    finally:
+        decision_transparency.DECISION_BUFFER_MAX_SIZE = max_size
+        decision_transparency.DECISION_BUFFER_MAX_AGE_SECONDS = max_age
+    print("✅ Size and age flushes")
+
+
+if __name__ == "__main__":
+    test_flush_writes_all_decisions_in_one_insert()
+    test_buffer_flushes_itself_when_full_or_old()
@@ -0,0 +1,91 @@
+"""
+Tests for the compiled Gmail filter matcher
+Run: python -m pytest test_filter_intelligence.py -v
+"""
+import sys
+import os
+import asyncio
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_domain_trie_matches_subdomains_only():
+    """A rule matches its domain and subdomains, case-insensitively, but not look-alike domains"""
+    from app.services.filter_intelligence import _DomainSuffixTrie
+
+    trie = _DomainSuffixTrie(["@Example.com", "news.other.org", ""])
+    assert trie.match("example.com") == "@Example.com"
+    assert trie.match("Mail.EXAMPLE.com") == "@Example.com"
+    assert trie.match("@deep.mail.example.com") == "@Example.com"
+    assert trie.match("notexample.com") is None
+    assert trie.match("example.com.evil.net") is None
+    assert trie.match("other.org") is None
+    assert trie.match("a.news.other.org") == "news.other.org"
+    assert trie.match("") is None
+    print("✅ Domain suffix trie")
+
+
+def test_matcher_precedence():
+    """Archive rules win over star/important; domain boosts apply only without a sender rule"""
+    from app.services.filter_intelligence import FilterMatcher
+
+    matcher = FilterMatcher({
+        "auto_archive_senders": ["deals@shop.com"],
+        "auto_star_senders": ["Boss@Company.com", "deals@shop.com"],
+        "auto_important_senders": ["client@partner.com"],
+        "low_priority_domains": ["shop.com"],
+        "high_priority_domains": ["company.com"],
+    })
+
+    assert matcher.check("DEALS@shop.com", "shop.com")["importance_score"] == 0.1
+    assert matcher.check("promo@mail.shop.com", "mail.shop.com")["importance_score"] == 0.15
+    assert matcher.check("boss@company.com", "company.com")["importance_score"] == 0.95
+    assert matcher.check("client@partner.com", "partner.com")["importance_score"] == 0.90
+
+    colleague = matcher.check("peer@eng.company.com", "eng.company.com")
+    assert colleague["explicit_priority"] == "high" and not colleague["skip_llm"]
+    assert colleague["importance_boost"] == 0.2
+
+    assert matcher.check("someone@elsewhere.com", "elsewhere.com") == {
+        "explicit_priority": None, "reasoning": None, "skip_llm": False
+    }
+    assert FilterMatcher(None).check("a@b.com", "b.com")["explicit_priority"] is None
+    print("✅ Filter precedence")
+
+
+def test_filters_fetched_once_then_cached():
+    """Gmail filters are analysed once and served from FilterIntelligenceCache afterwards"""
+    from testing_utils import sqlite_session_factory
+    from app.services.filter_intelligence import UserFilterIntelligence, FilterIntelligenceCache, FilterMatcher
+
+    class FakeClient:
+        calls = 0
+
+        async def list_filters(self):
+            FakeClient.calls += 1
+            return {"filter": [
+                {"criteria": {"from": "News@Letters.com"}, "action": {"removeLabelIds": ["INBOX"]}},
+                {"criteria": {"from": "ceo@corp.com"}, "action": {"addLabelIds": ["IMPORTANT"]}},
+            ]}
+
+    db = sqlite_session_factory(FilterIntelligenceCache)()
+    service = UserFilterIntelligence(db)
+
+    async def run():
+        first = await service.get_filter_intelligence_async(FakeClient(), "a@example.com")
+        second = await service.get_filter_intelligence_async(FakeClient(), "a@example.com")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert FakeClient.calls == 1 and first == second
+    assert first["auto_archive_senders"] == ["news@letters.com"]
+    assert first["high_priority_domains"] == ["corp.com"]
+    assert FilterMatcher(second).check("x@sub.letters.com", "sub.letters.com")["explicit_priority"] == "low"
+    print("✅ Filter intelligence cached")
+
+
+if __name__ == "__main__":
+    test_domain_trie_matches_subdomains_only()
+    test_matcher_precedence()
+    test_filters_fetched_once_then_cached()
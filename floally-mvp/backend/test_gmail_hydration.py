@@ -0,0 +1,75 @@
+"""
+Tests for batched Gmail message hydration
+Run: python -m pytest test_gmail_hydration.py -v
+"""
+import sys
+import os
+import asyncio
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from testing_utils import FakeGmailClient, gmail_message
+
+
+def test_messages_fetched_in_batches_and_returned_in_order():
+    """Duplicates are fetched once, batches respect the size, order follows the caller"""
+    from app.services.gmail_hydration import hydrate_messages_async
+
+    client = FakeGmailClient([gmail_message(f"m{i}") for i in range(5)])
+    ids = ["m4", "m0", "m3", "m0", "m1", "m2", ""]
+    result = asyncio.run(hydrate_messages_async(client, ids, profile="metadata", batch_size=2))
+
+    assert sorted(len(batch) for batch in client.batches) == [1, 2, 2]
+    assert result.batch_calls == 3
+    assert [m["id"] for m in result.ordered(["m4", "m0", "m3", "m1", "m2"])] == ["m4", "m0", "m3", "m1", "m2"]
+    assert result.failures == {}
+    print("✅ 5 messages hydrated in 3 batch calls")
+
+
+def test_transient_failures_retried_once_and_missing_messages_reported():
+    """429/5xx items are re-batched once; a 404 fails only its own message"""
+    from app.services.gmail_hydration import hydrate_messages_async
+
+    client = FakeGmailClient([gmail_message("ok"), gmail_message("flaky"), gmail_message("down")])
+    client.fail = {"flaky": [429], "down": [503, 503]}
+    result = asyncio.run(hydrate_messages_async(client, ["ok", "flaky", "down", "gone"]))
+
+    assert client.batches[1] == ["flaky", "down"]  # Only retryable failures go again
+    assert set(result.messages) == {"ok", "flaky"}
+    assert set(result.failures) == {"down", "gone"}
+    assert result.batch_calls == 2
+    print("✅ Transient failures retried, permanent ones isolated")
+
+
+def test_fetch_profiles_control_what_is_requested():
+    """Each profile maps to a Gmail format/fields mask; unknown names are rejected"""
+    from app.services.gmail_hydration import hydrate_messages_async, get_fetch_profile, FETCH_PROFILES, METADATA_HEADERS
+    from app.services.google_api_client import _message_params
+
+    client = FakeGmailClient([gmail_message("m1")])
+    for name in ("minimal", "metadata", "full"):
+        asyncio.run(hydrate_messages_async(client, ["m1"], profile=name))
+    assert client.fetches == [
+        ("minimal", None, "id,threadId,labelIds,internalDate"),
+        ("metadata", METADATA_HEADERS, "id,threadId,labelIds,snippet,internalDate,payload/headers"),
+        ("full", None, None),
+    ]
+
+    assert get_fetch_profile(FETCH_PROFILES["full"]) is FETCH_PROFILES["full"]
+    try:
+        get_fetch_profile("everything")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+    # metadataHeaders is only sent with format=metadata
+    assert _message_params("full", ["From"], None) == {"format": "full"}
+    assert _message_params("metadata", ["From"], "id") == {"format": "metadata", "metadataHeaders": ["From"], "fields": "id"}
+    print("✅ Fetch profiles")
+
+
+if __name__ == "__main__":
+    test_messages_fetched_in_batches_and_returned_in_order()
+    test_transient_failures_retried_once_and_missing_messages_reported()
+    test_fetch_profiles_control_what_is_requested()
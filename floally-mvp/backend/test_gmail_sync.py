@@ -0,0 +1,142 @@
+"""
+Tests for the incremental Gmail store sync
+Run: python -m pytest test_gmail_sync.py -v
+"""
+import sys
+import os
+import asyncio
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from testing_utils import FakeGmailClient, gmail_message, sqlite_session_factory
+
+
+def _engine():
+    from app.services.gmail_sync import GmailSyncEngine, GmailMessageStore, GmailSyncState
+
+    db = sqlite_session_factory(GmailMessageStore, GmailSyncState)()
+    return GmailSyncEngine(db), db
+
+
+def _stored_ids(engine, user_email):
+    return [m["id"] for m in engine.read_messages(user_email, "in:inbox", 50)]
+
+
+def test_full_seed_then_incremental_replay():
+    """The first sync seeds the store; the next one applies adds, label changes and deletes from history"""
+    client = FakeGmailClient([
+        gmail_message("m1", internal_date=1),
+        gmail_message("m2", internal_date=2),
+        gmail_message("m3", internal_date=3, labels=("INBOX", "CATEGORY_PROMOTIONS")),
+    ])
+    engine, db = _engine()
+
+    async def run():
+        seed = await engine.sync(client, "seed@example.com")
+        assert seed["mode"] == "full" and seed["stored"] == 3
+        assert _stored_ids(engine, "seed@example.com") == ["m3", "m2", "m1"]
+        stored = engine.read_messages("seed@example.com", "in:inbox", 1)[0]
+        assert [h["name"] for h in stored["payload"]["headers"]] == ["From", "Subject"]
+
+        client.messages["m4"] = gmail_message("m4", internal_date=4)
+        client.history = [
+            {"messagesAdded": [{"message": {"id": "m4", "labelIds": ["INBOX"]}}]},
+            {"messagesAdded": [{"message": {"id": "sent", "labelIds": ["SENT"]}}]},
+            {"labelsRemoved": [{"message": {"id": "m3"}, "labelIds": ["CATEGORY_PROMOTIONS"]}]},
+            {"labelsRemoved": [{"message": {"id": "m2"}, "labelIds": ["INBOX"]}]},
+            {"messagesDeleted": [{"message": {"id": "m1"}}]},
+        ]
+        client.history_id = "200"
+        client.batches.clear()
+        update = await _replay(engine, client)
+        assert update["mode"] == "incremental"
+        assert update["added"] == 1 and update["deleted"] == 1
+        assert client.batches == [["m4"]]
+
+        assert _stored_ids(engine, "seed@example.com") == ["m4", "m3"]
+        primary = engine.read_messages("seed@example.com", "category:primary", 50)
+        assert [m["id"] for m in primary] == ["m4", "m3"]
+
+    asyncio.run(run())
+    print("✅ Seed + incremental replay")
+
+
+async def _replay(engine, client, user_email="seed@example.com"):
+    """Run an incremental sync now, as if MIN_SYNC_INTERVAL had already passed"""
+    from app.services.gmail_sync import GmailSyncState, MIN_SYNC_INTERVAL
+
+    state = engine.db.query(GmailSyncState).filter(GmailSyncState.user_email == user_email).first()
+    state.last_synced -= MIN_SYNC_INTERVAL
+    engine.db.commit()
+    return await engine.sync(client, user_email)
+
+
+def test_sync_skipped_inside_interval():
+    """A second sync inside MIN_SYNC_INTERVAL makes no Gmail calls"""
+    client = FakeGmailClient([gmail_message("m1")])
+    engine, db = _engine()
+
+    async def run():
+        await engine.sync(client, "skip@example.com")
+        calls = len(client.calls)
+        assert (await engine.sync(client, "skip@example.com")) == {"mode": "skipped"}
+        assert len(client.calls) == calls
+
+    asyncio.run(run())
+    print("✅ Sync skipped inside the interval")
+
+
+def test_expired_history_reseeds():
+    """A 404 from history.list (historyId too old) falls back to a full sync"""
+    client = FakeGmailClient([gmail_message("m1", internal_date=1)])
+    engine, db = _engine()
+
+    async def run():
+        await engine.sync(client, "expired@example.com")
+        del client.messages["m1"]
+        client.messages["m2"] = gmail_message("m2", internal_date=2)
+        client.history_expired = True
+        client.history_id = "300"
+
+        result = await _replay(engine, client, "expired@example.com")
+        assert result["mode"] == "full"
+        assert _stored_ids(engine, "expired@example.com") == ["m2"]
+
+    asyncio.run(run())
+    print("✅ Expired history reseeds the store")
+
+
+def test_seen_threads_keep_one_message_per_thread():
+    """A shared seen_threads set drops repeat threads from store reads and from live listings before hydration"""
+    client = FakeGmailClient([
+        gmail_message("a1", thread_id="t1", internal_date=3),
+        gmail_message("a2", thread_id="t1", internal_date=2),
+        gmail_message("b1", thread_id="t2", internal_date=1),
+    ])
+    engine, db = _engine()
+
+    async def run():
+        seen = set()
+        stored = await engine.get_messages(client, "threads@example.com", "in:inbox", 10, seen_threads=seen)
+        assert [m["id"] for m in stored] == ["a1", "b1"]
+
+        # Live path ('full' profile isn't served from the store)
+        client.batches.clear()
+        client.messages["c1"] = gmail_message("c1", thread_id="t3", internal_date=4)
+        live = await engine.get_messages(client, "threads@example.com", "in:inbox", 10, seen_threads=seen, profile="full")
+        assert [m["id"] for m in live] == ["c1"]
+        assert client.batches == [["c1"]]
+
+        assert seen == {"t1", "t2", "t3"}
+        assert engine.duplicate_threads_skipped == 1 + 3
+
+    asyncio.run(run())
+    print("✅ One message per thread")
+
+
+if __name__ == "__main__":
+    test_full_seed_then_incremental_replay()
+    test_sync_skipped_inside_interval()
+    test_expired_history_reseeds()
+    test_seen_threads_keep_one_message_per_thread()
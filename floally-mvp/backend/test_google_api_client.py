@@ -0,0 +1,143 @@
+"""
+Tests for the async Google API client (batch transport, per-user concurrency)
+Run: python -m pytest test_google_api_client.py -v
+"""
+import sys
+import os
+import asyncio
+import json
+from types import SimpleNamespace
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+
+def _run_with_transport(handler, coroutine_factory):
+    """Run coroutine_factory(client) with the pooled HTTP client served by `handler`"""
+    from app.services import google_api_client
+    from app.services.google_api_client import AsyncGoogleClient
+
+    async def run():
+        google_api_client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            client = AsyncGoogleClient("a@example.com", SimpleNamespace(token="token-a"))
+            return await coroutine_factory(client)
+        finally:
+            await google_api_client.close_http_client()
+
+    return asyncio.run(run())
+
+
+def _batch_response(boundary, parts):
+    body = ""
+    for request_id, status, payload in parts:
+        body += (
+            f"--{boundary}\r\n"
+            f"Content-Type: application/http\r\n"
+            f"Content-ID: <response-{request_id}>\r\n\r\n"
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+            f"Content-Type: application/json; charset=UTF-8\r\n\r\n"
+            f"{json.dumps(payload)}\r\n"
+        )
+    return body + f"--{boundary}--\r\n"
+
+
+def test_batch_request_is_one_multipart_call_split_per_message():
+    """batch_get_messages sends one multipart/mixed POST and maps each part back by Content-ID"""
+    sent = []
+
+    def handler(request):
+        sent.append(request)
+        return httpx.Response(
+            200,
+            headers={"Content-Type": 'multipart/mixed; boundary="batch_resp"'},
+            text=_batch_response("batch_resp", [
+                ("m1", 200, {"id": "m1", "snippet": "Hi"}),
+                ("m2", 404, {"error": {"message": "Not Found"}}),
+            ])
+        )
+
+    results = _run_with_transport(handler, lambda client: client.batch_get_messages(
+        ["m1", "m2"], format="metadata", metadata_headers=["From", "Subject"], fields="id,snippet"
+    ))
+
+    assert len(sent) == 1 and sent[0].method == "POST"
+    assert sent[0].headers["Authorization"] == "Bearer token-a"
+    assert sent[0].headers["Content-Type"].startswith("multipart/mixed; boundary=")
+    body = sent[0].content.decode()
+    assert "Content-ID: <m1>" in body and "Content-ID: <m2>" in body
+    assert "GET /gmail/v1/users/me/messages/m1?format=metadata&metadataHeaders=From&metadataHeaders=Subject&fields=id%2Csnippet" in body
+    assert results == {"m1": (200, {"id": "m1", "snippet": "Hi"}), "m2": (404, {"error": {"message": "Not Found"}})}
+    print("✅ One multipart request, per-message results")
+
+
+def test_parse_batch_response_tolerates_odd_parts():
+    """Missing boundary is an error; parts without an ID are skipped, non-JSON bodies kept as text"""
+    from app.services.google_api_client import parse_batch_response, GoogleAPIError
+
+    text = (
+        "--b\nContent-Type: application/http\n\nHTTP/1.1 200 OK\n\n{}\n"
+        "--b\nContent-ID: <response-x>\n\nHTTP/1.1 500 Internal\n\nbackend error\n"
+        "--b--\n"
+    )
+    assert parse_batch_response("multipart/mixed; boundary=b", text) == {"x": (500, "backend error")}
+    try:
+        parse_batch_response("application/json", "{}")
+        assert False, "expected GoogleAPIError"
+    except GoogleAPIError as e:
+        assert e.status_code == 502
+    print("✅ Batch response parsing is tolerant")
+
+
+def test_user_calls_capped_and_errors_raised():
+    """One user never has more than USER_CONCURRENCY calls in flight; 4xx bodies become GoogleAPIError"""
+    from app.services.google_api_client import USER_CONCURRENCY, GoogleAPIError
+
+    in_flight = {"now": 0, "max": 0}
+
+    async def handler(request):
+        if request.url.path.endswith("/missing"):
+            return httpx.Response(404, json={"error": {"message": "Requested entity was not found."}})
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return httpx.Response(200, json={"messages": []})
+
+    async def calls(client):
+        await asyncio.gather(*(client.list_messages(q="in:inbox") for _ in range(USER_CONCURRENCY * 3)))
+        try:
+            await client.get_message("missing")
+            assert False, "expected GoogleAPIError"
+        except GoogleAPIError as e:
+            assert e.status_code == 404 and "not found" in str(e)
+
+    _run_with_transport(handler, calls)
+    assert in_flight["max"] == USER_CONCURRENCY
+    print("✅ Per-user concurrency capped")
+
+
+def test_attachment_downloaded_without_blocking():
+    """download_attachment goes through the async client and decodes the base64url body"""
+    import base64
+    from app.services.attachment_service import download_attachment
+
+    sent = []
+
+    def handler(request):
+        sent.append(request.url.path)
+        return httpx.Response(200, json={"size": 5, "data": base64.urlsafe_b64encode(b"%PDF-").decode()})
+
+    data = _run_with_transport(handler, lambda client: download_attachment(client, "m1", "att-1"))
+    assert data == b"%PDF-"
+    assert sent == ["/gmail/v1/users/me/messages/m1/attachments/att-1"]
+    print("✅ Attachment fetched through the async client")
+
+
+if __name__ == "__main__":
+    test_batch_request_is_one_multipart_call_split_per_message()
+    test_parse_batch_response_tolerates_odd_parts()
+    test_user_calls_capped_and_errors_raised()
+    test_attachment_downloaded_without_blocking()
@@ -0,0 +1,129 @@
+"""
+Tests for the cached Google credentials (expiry, invalidation, single-flight refresh)
+Run: python -m pytest test_google_auth.py -v
+"""
+import sys
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeSession:
+    """Session stand-in whose ConnectedAccount query always finds `account`"""
+
+    def __init__(self, account):
+        self.account = account
+        self.queries = 0
+        self.commits = 0
+
+    def query(self, model):
+        self.queries += 1
+        return self
+
+    def filter(self, *criteria):
+        return self
+
+    def first(self):
+        return self.account
+
+    def refresh(self, obj):
+        pass
+
+    def commit(self):
+        self.commits += 1
+
+
+def _account(expires_in):
+    return SimpleNamespace(
+        id="acct-1", email="a@example.com", access_token="token-0", refresh_token="refresh",
+        token_expires_at=datetime.utcnow() + timedelta(seconds=expires_in), scopes=[]
+    )
+
+
+@contextmanager
+def fake_credentials():
+    """Patch _build_credentials with credentials whose refresh() is counted and slow"""
+    from app.utils import google_auth
+
+    refreshes = []
+
+    class FakeCredentials:
+        def __init__(self, account):
+            self.token = account.access_token
+
+        def refresh(self, request):
+            time.sleep(0.05)
+            refreshes.append(self.token)
+            self.token = f"token-{len(refreshes)}"
+            self.expiry = datetime.utcnow() + timedelta(hours=1)
+
+    original = google_auth._build_credentials
+    google_auth._build_credentials = FakeCredentials
+    google_auth._account_cache.clear()
+    try:
+        yield refreshes
+    finally:
+        google_auth._build_credentials = original
+        google_auth._account_cache.clear()
+
+
+def test_credentials_cached_until_invalidated():
+    """A valid token is loaded once; invalidation forces the next call back to the database"""
+    from app.utils.google_auth import get_user_credentials, invalidate_google_services
+
+    with fake_credentials() as refreshes:
+        db = FakeSession(_account(expires_in=3600))
+        first = get_user_credentials("a@example.com", db)
+        assert get_user_credentials("a@example.com", db) is first
+        assert db.queries == 1
+
+        invalidate_google_services("a@example.com")
+        assert get_user_credentials("a@example.com", db) is not first
+        assert db.queries == 2 and refreshes == []
+    print("✅ Credentials cached until invalidated")
+
+
+def test_token_inside_expiry_skew_is_not_reused():
+    """A token expiring within TOKEN_EXPIRY_SKEW is loaded again on every call"""
+    from app.utils.google_auth import get_user_credentials, TOKEN_EXPIRY_SKEW
+
+    with fake_credentials():
+        db = FakeSession(_account(expires_in=TOKEN_EXPIRY_SKEW.total_seconds() / 2))
+        get_user_credentials("a@example.com", db)
+        get_user_credentials("a@example.com", db)
+        assert db.queries == 2
+    print("✅ Nearly expired tokens are not cached")
+
+
+def test_expired_token_refreshed_once_across_threads():
+    """Concurrent requests for an expired token share a single refresh"""
+    from app.utils.google_auth import get_user_credentials
+
+    with fake_credentials() as refreshes:
+        db = FakeSession(_account(expires_in=-60))
+        tokens = []
+        threads = [
+            threading.Thread(target=lambda: tokens.append(get_user_credentials("a@example.com", db).token))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert refreshes == ["token-0"]
+        assert db.commits == 1
+        assert tokens == ["token-1"] * 8
+    print("✅ Single-flight refresh")
+
+
+if __name__ == "__main__":
+    test_credentials_cached_until_invalidated()
+    test_token_inside_expiry_skew_is_not_reused()
+    test_expired_token_refreshed_once_across_threads()
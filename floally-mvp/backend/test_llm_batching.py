@@ -0,0 +1,141 @@
+"""
+Tests for cross-user micro-batching of LLM scoring calls
+Run: python -m pytest test_llm_batching.py -v
+"""
+import sys
+import os
+import asyncio
+import json
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from testing_utils import stub_router
+
+
+def _scoring_prompt(user: str, count: int) -> str:
+    messages = [{"index": i, "subject": f"{user} message {i}"} for i in range(count)]
+    return f"""Score these messages for {user}.
+{messages}
+Respond in JSON format: {{"analyses": [{{"index": 0, "importance_score": 85}}]}}"""
+
+
+def test_concurrent_calls_share_one_provider_call():
+    """Callers in the same window get their own answers from one combined request"""
+    from app.services.llm_stub import respond
+
+    router = stub_router()
+    calls = []
+    stub_complete = router.stub.complete
+
+    async def counting_complete(provider, prompt, **kwargs):
+        calls.append(prompt)
+        return await stub_complete(provider, prompt, **kwargs)
+
+    router.stub.complete = counting_complete
+    users = [f"user{i}@example.com" for i in range(5)]
+    prompts = [_scoring_prompt(user, i + 1) for i, user in enumerate(users)]
+
+    async def run():
+        return await asyncio.gather(*(
+            router.complete(prompt, task_type="light", max_tokens=400, user_id=user, batch=True)
+            for prompt, user in zip(prompts, users)
+        ))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    for prompt, result in zip(prompts, results):
+        assert json.loads(result["text"]) == json.loads(respond(prompt))
+        assert result["batch_size"] == 5 and result["cost_estimate"] > 0
+    assert router.usage_stats["batches"] == 1 and router.usage_stats["batched_requests"] == 5
+    print("✅ 5 concurrent calls served by 1 provider request")
+
+
+def test_unusable_answers_fall_back_to_individual_calls():
+    """A request missing from the combined reply is re-sent on its own"""
+    router = stub_router()
+    prompts = []
+
+    async def partial_complete(provider, prompt, model, **kwargs):
+        prompts.append(prompt)
+        if prompt.startswith("You are answering"):
+            text = '{"responses": [{"request": 0, "response": {"analyses": []}}]}'
+        else:
+            text = '{"analyses": [{"index": 0}]}'
+        return {"text": text, "provider": provider, "model": model,
+                "tokens_used": 30, "input_tokens": 20, "output_tokens": 10, "cost_estimate": 0.001}
+
+    router.stub.complete = partial_complete
+
+    async def run():
+        return await asyncio.gather(
+            router.complete(_scoring_prompt("a", 1), task_type="light", max_tokens=400, batch=True),
+            router.complete(_scoring_prompt("b", 1), task_type="light", max_tokens=400, batch=True)
+        )
+
+    first, second = asyncio.run(run())
+    assert json.loads(first["text"]) == {"analyses": []}
+    assert json.loads(second["text"]) == {"analyses": [{"index": 0}]}
+    assert len(prompts) == 2 and prompts[1] == _scoring_prompt("b", 1)
+    assert router.usage_stats["batch_retries"] == 1
+    print("✅ Missing batched answer retried individually")
+
+
+def test_batches_respect_model_output_limit():
+    """Requests that would overflow the model's max output start a new batch"""
+    from app.services.llm_router import TASK_CONFIGS
+    from app.services.llm_tokens import model_spec
+
+    router = stub_router()
+    sizes = []
+    stub_complete = router.stub.complete
+
+    async def sizing_complete(provider, prompt, max_tokens, **kwargs):
+        sizes.append(max_tokens)
+        return await stub_complete(provider, prompt, max_tokens=max_tokens, **kwargs)
+
+    router.stub.complete = sizing_complete
+    limit = model_spec(TASK_CONFIGS["light"]["primary"]["model"])["max_output"]
+    per_call = limit // 2
+
+    async def run():
+        await asyncio.gather(*(
+            router.complete(_scoring_prompt(f"u{i}", 1), task_type="light", max_tokens=per_call, batch=True)
+            for i in range(4)
+        ))
+
+    asyncio.run(run())
+    assert len(sizes) == 2 and all(size <= limit for size in sizes)
+    print("✅ Batches closed at the model's output limit")
+
+
+def test_reasoning_calls_are_never_combined():
+    """batch=True is ignored outside fast/light: each reasoning call goes out alone with its own prompt"""
+    router = stub_router()
+    prompts = []
+    stub_complete = router.stub.complete
+
+    async def recording_complete(provider, prompt, **kwargs):
+        prompts.append(prompt)
+        return await stub_complete(provider, prompt, **kwargs)
+
+    router.stub.complete = recording_complete
+    sent = [_scoring_prompt(f"u{i}", 2) for i in range(3)]
+
+    async def run():
+        return await asyncio.gather(*(
+            router.complete(prompt, task_type="reasoning", max_tokens=4000, batch=True) for prompt in sent
+        ))
+
+    results = asyncio.run(run())
+    assert sorted(prompts) == sorted(sent)
+    assert all("batch_size" not in result for result in results)
+    assert router.usage_stats["batches"] == 0 and router.usage_stats["batched_requests"] == 0
+    print("✅ Reasoning calls sent individually")
+
+
+if __name__ == "__main__":
+    test_concurrent_calls_share_one_provider_call()
+    test_unusable_answers_fall_back_to_individual_calls()
+    test_batches_respect_model_output_limit()
+    test_reasoning_calls_are_never_combined()
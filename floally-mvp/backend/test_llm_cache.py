@@ -0,0 +1,99 @@
+"""
+Tests for the LLM completion cache
+Run: python -m pytest test_llm_cache.py -v
+"""
+import sys
+import os
+import asyncio
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _router_with_fake_provider(cache):
+    """LLMRouter whose Anthropic call is replaced by a counter"""
+    from app.services.llm_router import LLMRouter
+
+    router = LLMRouter()
+    router.anthropic_client = object()  # Mark Anthropic as available
+    router.cache = cache
+    calls = []
+
+    async def fake_complete(prompt, model, system_prompt, max_tokens, temperature):
+        calls.append(prompt)
+        return {"text": f"answer {len(calls)}", "provider": "anthropic", "model": model,
+                "tokens_used": 10, "input_tokens": 6, "output_tokens": 4, "cost_estimate": 0.001}
+
+    router._anthropic_complete = fake_complete
+    return router, calls
+
+
+def test_identical_prompts_hit_cache():
+    """Same request is served once; whitespace differences don't matter; opt-out bypasses"""
+    from app.services.llm_cache import CompletionCache, MemoryCacheTier
+
+    async def run():
+        router, calls = _router_with_fake_provider(CompletionCache([MemoryCacheTier()]))
+        first = await router.complete("Summarize this  \n", task_type="reasoning")
+        second = await router.complete("Summarize this", task_type="reasoning")
+        third = await router.complete("Summarize this", task_type="reasoning", cache=False)
+        other = await router.complete("Summarize this", task_type="reasoning", max_tokens=10)
+
+        assert len(calls) == 3
+        assert first["cached"] is False and second["cached"] is True
+        assert second["text"] == first["text"]
+        assert third["cached"] is False and other["cached"] is False
+        stats = router.get_usage_stats()["cache"]
+        assert stats["hits"] == 1 and stats["misses"] == 2
+
+    asyncio.run(run())
+    print("✅ Identical prompts served from cache")
+
+
+def test_sql_tier_backfills_memory():
+    """A fresh worker (empty memory tier) reuses completions stored in SQL"""
+    from app.services.llm_cache import CompletionCache, MemoryCacheTier, SQLCacheTier, LLMCompletionCache
+    from testing_utils import sqlite_session_factory
+
+    async def run():
+        session_factory = sqlite_session_factory(LLMCompletionCache)
+        router, calls = _router_with_fake_provider(
+            CompletionCache([MemoryCacheTier(), SQLCacheTier(session_factory)])
+        )
+        await router.complete("Plan my week", task_type="strategic")
+
+        memory = MemoryCacheTier()
+        worker2 = CompletionCache([memory, SQLCacheTier(session_factory)])
+        router.cache = worker2
+        result = await router.complete("Plan my week", task_type="strategic")
+
+        assert len(calls) == 1
+        assert result["cached"] is True
+        assert worker2.get_stats()["sql_hits"] == 1 and len(memory) == 1
+
+    asyncio.run(run())
+    print("✅ SQL tier shared across workers")
+
+
+def test_zero_ttl_task_not_cached():
+    """simple_generation has a TTL of 0, so it is never stored"""
+    from app.services.llm_cache import CompletionCache, MemoryCacheTier
+
+    async def run():
+        router, calls = _router_with_fake_provider(CompletionCache([MemoryCacheTier()]))
+        # simple_generation resolves to OpenAI when Gemini is off; answer with the fake
+        router.gemini_available = False
+        router.openai_client = object()
+        router._openai_complete = router._anthropic_complete
+        await router.complete("Write a haiku", task_type="simple_generation")
+        await router.complete("Write a haiku", task_type="simple_generation")
+        assert len(calls) == 2
+
+    asyncio.run(run())
+    print("✅ Zero-TTL task types bypass the cache")
+
+
+if __name__ == "__main__":
+    test_identical_prompts_hit_cache()
+    test_sql_tier_backfills_memory()
+    test_zero_ttl_task_not_cached()
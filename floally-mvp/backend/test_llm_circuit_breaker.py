@@ -0,0 +1,75 @@
+"""
+Tests for LLM circuit breakers and breaker-aware routing
+Run: python -m pytest test_llm_circuit_breaker.py -v
+"""
+import sys
+import os
+import asyncio
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_breaker_opens_and_recovers():
+    """Opens after MIN_CALLS failures, half-opens after OPEN_SECONDS, closes on a good probe"""
+    from app.services import llm_circuit_breaker as cb
+
+    breaker = cb.CircuitBreaker("anthropic/test")
+    for _ in range(cb.MIN_CALLS):
+        assert breaker.allow_request()
+        breaker.record_failure(0.1)
+    assert breaker.state == cb.OPEN
+    assert not breaker.allow_request()
+
+    # Pretend the open period has passed
+    breaker.opened_at -= cb.OPEN_SECONDS
+    assert breaker.is_available()
+    assert breaker.allow_request()          # The single probe
+    assert not breaker.allow_request()      # No second probe while it's in flight
+    breaker.record_success(0.2)
+    assert breaker.state == cb.CLOSED
+    print("✅ Breaker opens, probes and closes")
+
+
+def test_router_skips_open_circuit():
+    """With the primary's circuit open, routing goes straight to the fallback"""
+    from app.services.llm_router import LLMRouter, TASK_CONFIGS
+    from app.services import llm_circuit_breaker as cb
+
+    router = LLMRouter()
+    router.cache = None
+    router.anthropic_client = object()
+    router.openai_client = object()
+    calls = []
+
+    async def failing(**kwargs):
+        calls.append("anthropic")
+        raise RuntimeError("overloaded")
+
+    async def working(**kwargs):
+        calls.append("openai")
+        return {"text": "ok", "provider": "openai", "model": kwargs["model"],
+                "tokens_used": 2, "input_tokens": 1, "output_tokens": 1, "cost_estimate": 0.0}
+
+    router._anthropic_complete = failing
+    router._openai_complete = working
+
+    async def run():
+        for _ in range(cb.MIN_CALLS):
+            await router.complete("hi", task_type="reasoning")
+        primary = TASK_CONFIGS["reasoning"]["primary"]
+        assert router.breakers.get(primary["provider"], primary["model"]).state == cb.OPEN
+
+        calls.clear()
+        result = await router.complete("hi again", task_type="reasoning")
+        assert calls == ["openai"] and result["provider"] == "openai"
+        stats = router.get_usage_stats()["circuit_breakers"]
+        assert stats[f"anthropic/{primary['model']}"]["state"] == cb.OPEN
+
+    asyncio.run(run())
+    print("✅ Open circuits are skipped without a call")
+
+
+if __name__ == "__main__":
+    test_breaker_opens_and_recovers()
+    test_router_skips_open_circuit()
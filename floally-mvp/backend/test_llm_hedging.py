@@ -0,0 +1,97 @@
+"""
+Tests for hedged LLM requests
+Run: python -m pytest test_llm_hedging.py -v
+"""
+import sys
+import os
+import asyncio
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _router(primary_delay: float):
+    """Router with a slow fake Anthropic (primary) and a fast fake OpenAI (fallback)"""
+    from app.services.llm_router import LLMRouter
+
+    router = LLMRouter()
+    router.cache = None
+    router.anthropic_client = object()
+    router.openai_client = object()
+    events = []
+
+    def fake(provider, delay):
+        async def complete(**kwargs):
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                events.append(f"{provider} cancelled")
+                raise
+            events.append(f"{provider} answered")
+            return {"text": provider, "provider": provider, "model": kwargs["model"],
+                    "tokens_used": 2, "input_tokens": 1, "output_tokens": 1, "cost_estimate": 0.0}
+        return complete
+
+    router._anthropic_complete = fake("anthropic", primary_delay)
+    router._openai_complete = fake("openai", 0.01)
+    return router, events
+
+
+def test_slow_primary_is_hedged():
+    """The backup answers first and the slow primary is cancelled"""
+    from app.services import llm_hedging
+
+    llm_hedging.HEDGE_DEFAULT_DELAY_SECONDS = 0.05
+
+    async def run():
+        router, events = _router(primary_delay=2.0)
+        result = await router.complete("hi", task_type="light", hedge=True)
+        await asyncio.sleep(0)
+        assert result["provider"] == "openai"
+        assert events == ["openai answered", "anthropic cancelled"]
+        assert router.usage_stats["hedged_requests"] == 1
+        assert router.usage_stats["hedge_wins"] == 1
+
+    asyncio.run(run())
+    print("✅ Slow primary hedged")
+
+
+def test_budget_limits_hedging():
+    """Once the task's budget is spent, the router waits for the primary"""
+    from app.services import llm_hedging
+
+    llm_hedging.HEDGE_DEFAULT_DELAY_SECONDS = 0.05
+
+    async def run():
+        router, events = _router(primary_delay=0.2)
+        router.hedge_budget.budgets = {"light": 0.0001}
+        first = await router.complete("one", task_type="light", hedge=True)
+        second = await router.complete("two", task_type="light", hedge=True)
+        assert first["provider"] == "openai"    # The one free hedge
+        assert second["provider"] == "anthropic"
+        assert router.usage_stats["hedged_requests"] == 1
+
+    asyncio.run(run())
+    print("✅ Hedging stays within budget")
+
+
+def test_fast_primary_not_hedged():
+    """A primary answering inside the delay never triggers a second call"""
+    from app.services import llm_hedging
+
+    llm_hedging.HEDGE_DEFAULT_DELAY_SECONDS = 1.0
+
+    async def run():
+        router, events = _router(primary_delay=0.01)
+        result = await router.complete("hi", task_type="light", hedge=True)
+        assert result["provider"] == "anthropic"
+        assert events == ["anthropic answered"]
+
+    asyncio.run(run())
+    print("✅ Fast primary answered alone")
+
+
+if __name__ == "__main__":
+    test_slow_primary_is_hedged()
+    test_budget_limits_hedging()
+    test_fast_primary_not_hedged()
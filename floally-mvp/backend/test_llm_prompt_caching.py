@@ -0,0 +1,127 @@
+"""
+Tests for provider prompt caching of structured prompts
+Run: python -m pytest test_llm_prompt_caching.py -v
+"""
+import sys
+import os
+import asyncio
+from types import SimpleNamespace
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _segments():
+    from app.services.llm_prompts import PromptSegments
+    return PromptSegments(
+        instructions="You are Aimi. Return JSON with the top priorities.",
+        user_context="User Profile:\n- Role: Designer",
+        data="Today's messages: ..."
+    )
+
+
+def test_anthropic_gets_cache_breakpoints_and_cached_tokens_are_cheaper():
+    """Instructions and user context are cache breakpoints; cache reads are billed at the read rate"""
+    from app.services.llm_router import LLMRouter
+    from app.services.llm_tokens import estimate_cost
+
+    router = LLMRouter()
+    router.cache = None
+    router.ledger = None
+    router.openai_client = None
+    sent = {}
+
+    async def create(**kwargs):
+        sent.update(kwargs)
+        return SimpleNamespace(
+            content=[SimpleNamespace(text="ok")],
+            usage=SimpleNamespace(input_tokens=100, output_tokens=50,
+                                  cache_read_input_tokens=2000, cache_creation_input_tokens=0)
+        )
+
+    router.anthropic_client = SimpleNamespace(messages=SimpleNamespace(create=create))
+    result = asyncio.run(router.complete(_segments(), task_type="reasoning"))
+
+    blocks = sent["messages"][0]["content"]
+    assert [block.get("cache_control") is not None for block in blocks] == [True, True, False]
+    assert blocks[2]["text"] == "Today's messages: ..."
+    assert result["input_tokens"] == 2100 and result["cache_read_tokens"] == 2000
+    uncached_cost = estimate_cost(result["model"], 2100, 50)
+    assert result["cost_estimate"] < uncached_cost
+    assert abs(result["cost_estimate"] - estimate_cost(result["model"], 2100, 50, cache_read_tokens=2000)) < 1e-12
+    print("✅ Anthropic prompt-cache breakpoints and pricing")
+
+
+def test_openai_gets_prefix_key_and_ledger_records_cache_reads():
+    """Same instructions + user context -> same prompt_cache_key; cached tokens reach the ledger"""
+    from app.services.llm_router import LLMRouter
+    from app.services.llm_prompts import PromptSegments
+    from testing_utils import sqlite_session_factory
+    from app.services.llm_usage_ledger import UsageLedger, LLMUsageRecord, usage_summary
+    from datetime import datetime, timedelta
+
+    session_factory = sqlite_session_factory(LLMUsageRecord)
+    router = LLMRouter()
+    router.cache = None
+    router.ledger = UsageLedger(session_factory)
+    router.anthropic_client = None
+    keys = []
+
+    async def create(**kwargs):
+        keys.append(kwargs.get("prompt_cache_key"))
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))],
+            usage=SimpleNamespace(prompt_tokens=1500, completion_tokens=20, total_tokens=1520,
+                                  prompt_tokens_details=SimpleNamespace(cached_tokens=1024))
+        )
+
+    router.openai_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    other_day = PromptSegments(_segments().instructions, _segments().user_context, "Tomorrow's messages")
+
+    async def run():
+        await router.complete(_segments(), task_type="reasoning", user_id="a@example.com")
+        await router.complete(other_day, task_type="reasoning", user_id="a@example.com")
+        await router.complete("plain prompt", task_type="reasoning", user_id="a@example.com")
+
+    asyncio.run(run())
+    assert keys[0] is not None and keys[0] == keys[1] and keys[2] is None
+
+    router.ledger.flush()
+    db = session_factory()
+    summary = usage_summary(db, datetime.utcnow() - timedelta(days=1))
+    db.close()
+    assert summary["by_user"][0]["cache_read_tokens"] == 3 * 1024
+    print("✅ OpenAI cache key routing and cached tokens in the ledger")
+
+
+def test_batched_prompt_sent_alone_keeps_cache_breakpoints():
+    """A batch=True call that ends up alone in its batch is sent as the original segments"""
+    from app.services.llm_router import LLMRouter
+
+    router = LLMRouter()
+    router.cache = None
+    router.ledger = None
+    router.openai_client = None
+    sent = []
+
+    async def create(**kwargs):
+        sent.append(kwargs["messages"][0]["content"])
+        return SimpleNamespace(
+            content=[SimpleNamespace(text='{"analyses": []}')],
+            usage=SimpleNamespace(input_tokens=100, output_tokens=5,
+                                  cache_read_input_tokens=0, cache_creation_input_tokens=0)
+        )
+
+    router.anthropic_client = SimpleNamespace(messages=SimpleNamespace(create=create))
+    assert router.batcher is not None
+    asyncio.run(router.complete(_segments(), task_type="reasoning", user_id="a@example.com", batch=True))
+
+    assert len(sent) == 1 and isinstance(sent[0], list)
+    assert [block.get("cache_control") is not None for block in sent[0]] == [True, True, False]
+    print("✅ Lone batched request keeps its cache breakpoints")
+
+
+if __name__ == "__main__":
+    test_anthropic_gets_cache_breakpoints_and_cached_tokens_are_cheaper()
+    test_openai_gets_prefix_key_and_ledger_records_cache_reads()
+    test_batched_prompt_sent_alone_keeps_cache_breakpoints()
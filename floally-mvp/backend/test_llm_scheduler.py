@@ -0,0 +1,96 @@
+"""
+Tests for the LLM request scheduler
+Run: python -m pytest test_llm_scheduler.py -v
+"""
+import sys
+import os
+import asyncio
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+LIMITS = {"anthropic": {"rpm": 6000, "tpm": 6_000_000}}
+
+
+def test_priority_and_user_fairness():
+    """With one slot, queued work runs fast-first and alternates between users"""
+    from app.services.llm_scheduler import LLMScheduler
+
+    async def run():
+        scheduler = LLMScheduler(max_concurrency=1, user_concurrency=1, limits=LIMITS)
+        order = []
+
+        async def job(name, user, task_type):
+            slot = await scheduler.acquire("anthropic", task_type, user, 10)
+            async with slot:
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        blocker = await scheduler.acquire("anthropic", "fast", "carol", 10)
+        tasks = [
+            asyncio.create_task(job("heavy-1", "heavy", "strategic")),
+            asyncio.create_task(job("heavy-2", "heavy", "strategic")),
+            asyncio.create_task(job("heavy-3", "heavy", "strategic")),
+            asyncio.create_task(job("light-1", "light", "strategic")),
+            asyncio.create_task(job("urgent", "light", "fast")),
+        ]
+        await asyncio.sleep(0.01)
+        async with blocker:
+            pass
+        await asyncio.gather(*tasks)
+        assert order == ["urgent", "heavy-1", "light-1", "heavy-2", "heavy-3"], order
+
+    asyncio.run(run())
+    print("✅ Priority first, then users interleaved")
+
+
+def test_token_budget_and_refund():
+    """A TPM bucket blocks oversubscription; settling actual usage refunds the rest"""
+    from app.services.llm_scheduler import LLMScheduler, SchedulerTimeoutError
+
+    async def run():
+        scheduler = LLMScheduler(limits={"anthropic": {"rpm": 6000, "tpm": 1000}})
+        slot = await scheduler.acquire("anthropic", "light", "a", 900)
+        try:
+            await scheduler.acquire("anthropic", "light", "b", 900, timeout=0.05)
+            assert False, "second request should not fit"
+        except SchedulerTimeoutError:
+            pass
+
+        async with slot:
+            slot.settle(100)  # Only 100 tokens were really used
+        second = await scheduler.acquire("anthropic", "light", "b", 800, timeout=0.05)
+        async with second:
+            pass
+        assert scheduler.snapshot()["timeouts"] == 1
+
+    asyncio.run(run())
+    print("✅ TPM bucket enforced and refunded")
+
+
+def test_shared_lane_has_its_own_concurrency_limit():
+    """The batch lane isn't held to the per-user cap, only to its own limit"""
+    from app.services.llm_scheduler import LLMScheduler, SchedulerTimeoutError
+    from app.services.llm_batching import BATCH_USER_ID
+
+    async def run():
+        scheduler = LLMScheduler(user_concurrency=1, limits=LIMITS, lane_concurrency={BATCH_USER_ID: 3})
+        slots = [await scheduler.acquire("anthropic", "light", BATCH_USER_ID, 10, timeout=0.05) for _ in range(3)]
+        try:
+            await scheduler.acquire("anthropic", "light", BATCH_USER_ID, 10, timeout=0.05)
+            assert False, "fourth batch call should wait for the lane"
+        except SchedulerTimeoutError:
+            pass
+        user_slot = await scheduler.acquire("anthropic", "light", "a", 10, timeout=0.05)
+        for slot in slots + [user_slot]:
+            async with slot:
+                pass
+
+    asyncio.run(run())
+    print("✅ Batch lane limited separately from users")
+
+
+if __name__ == "__main__":
+    test_priority_and_user_fairness()
+    test_token_budget_and_refund()
+    test_shared_lane_has_its_own_concurrency_limit()
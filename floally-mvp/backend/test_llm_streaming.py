@@ -0,0 +1,103 @@
+"""
+Tests for LLMRouter.stream() and the SSE helpers
+Run: python -m pytest test_llm_streaming.py -v
+"""
+import sys
+import os
+import asyncio
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _fake_stream(provider, chunks, fail_after=None, calls=None):
+    async def stream(usage, **kwargs):
+        if calls is not None:
+            calls.append(provider)
+        for i, chunk in enumerate(chunks):
+            if fail_after is not None and i == fail_after:
+                raise RuntimeError(f"{provider} dropped the connection")
+            yield chunk
+        usage.update({"provider": provider, "model": kwargs["model"], "tokens_used": 3,
+                      "input_tokens": 1, "output_tokens": 2, "cost_estimate": 0.0})
+    return stream
+
+
+def test_stream_falls_back_before_first_chunk_and_caches():
+    """A provider failing before any text falls back; the finished stream is cached"""
+    from app.services.llm_router import LLMRouter
+    from app.services.llm_cache import CompletionCache, MemoryCacheTier
+
+    router = LLMRouter()
+    router.cache = CompletionCache([MemoryCacheTier()])
+    router.anthropic_client = object()
+    router.openai_client = object()
+    calls = []
+    router._anthropic_stream = _fake_stream("anthropic", ["never"], fail_after=0, calls=calls)
+    router._openai_stream = _fake_stream("openai", ["Hel", "lo"], calls=calls)
+
+    async def run():
+        chunks = [c async for c in router.stream("hi", task_type="reasoning")]
+        assert chunks == ["Hel", "lo"]
+        assert calls == ["anthropic", "openai"]
+
+        # Same request again is served from the cache without a provider call
+        calls.clear()
+        result = await router.complete("hi", task_type="reasoning")
+        assert result["cached"] and result["text"] == "Hello" and calls == []
+
+    asyncio.run(run())
+    print("✅ Stream falls back and caches the assembled text")
+
+
+def test_stream_error_after_first_chunk_is_raised():
+    """Once text has been yielded the error surfaces instead of mixing providers"""
+    from app.services.llm_router import LLMRouter
+
+    router = LLMRouter()
+    router.cache = None
+    router.anthropic_client = object()
+    router.openai_client = object()
+    calls = []
+    router._anthropic_stream = _fake_stream("anthropic", ["Par", "tial"], fail_after=1, calls=calls)
+    router._openai_stream = _fake_stream("openai", ["other"], calls=calls)
+
+    async def run():
+        received = []
+        try:
+            async for chunk in router.stream("hi", task_type="reasoning"):
+                received.append(chunk)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("expected the mid-stream error")
+        assert received == ["Par"] and calls == ["anthropic"]
+        assert router.scheduler.in_flight == 0
+
+    asyncio.run(run())
+    print("✅ Mid-stream failures are raised and release their slot")
+
+
+def test_sse_response_reports_errors_as_event():
+    """Exceptions inside the event generator become an `error` event"""
+    from app.utils.sse import sse_event, sse_response
+
+    async def events():
+        yield sse_event("chunk", {"text": "a"})
+        raise RuntimeError("boom")
+
+    async def run():
+        response = sse_response(events())
+        body = [chunk async for chunk in response.body_iterator]
+        assert body[0] == 'event: chunk\ndata: {"text": "a"}\n\n'
+        assert body[1].startswith("event: error\n") and "boom" in body[1]
+        assert response.media_type == "text/event-stream"
+
+    asyncio.run(run())
+    print("✅ SSE errors are reported in-stream")
+
+
+if __name__ == "__main__":
+    test_stream_falls_back_before_first_chunk_and_caches()
+    test_stream_error_after_first_chunk_is_raised()
+    test_sse_response_reports_errors_as_event()
@@ -0,0 +1,84 @@
+"""
+Tests for the stub LLM provider (offline routing, caching and benchmarks)
+Run: python -m pytest test_llm_stub.py -v
+"""
+import sys
+import os
+import asyncio
+import json
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from testing_utils import stub_router
+
+
+def test_stub_answers_each_prompt_family_with_valid_json():
+    """Real prompt builders get output their parsers accept"""
+    from app.services import llm_router
+    from app.routers.ai import _project_plan_prompt, _parse_project_plan
+    from app.routers.messages import ai_analyze_messages
+
+    router = stub_router()
+    previous, llm_router._router = llm_router._router, router
+    try:
+        async def run():
+            plan = await router.complete(_project_plan_prompt("Launch a podcast"), task_type="strategic")
+            assert len(_parse_project_plan(plan["text"]).goals) >= 3
+
+            messages = [{"id": f"m{i}", "subject": f"Subject {i}", "snippet": "hi"} for i in range(4)]
+            analyses = await ai_analyze_messages(messages, {"role": "Designer"})
+            assert [a["index"] for a in analyses] == [0, 1, 2, 3]
+            assert all(0 <= a["importance_score"] <= 100 for a in analyses)
+
+            text = await router.complete("Summarize this email in 2-3 sentences.", task_type="light")
+            assert text["text"] and not text["text"].startswith("{")
+            assert text["provider"] == "anthropic" and text["cost_estimate"] > 0
+
+        asyncio.run(run())
+    finally:
+        llm_router._router = previous
+    print("✅ Stub output is schema-valid per prompt family")
+
+
+def test_stub_is_deterministic_and_streams_same_text():
+    """Same prompt, same answer - whether completed or streamed"""
+    router = stub_router()
+    prompt = 'Return JSON: {"top_priorities": [...], "can_wait": [], "reassurance": ""}'
+
+    async def run():
+        first = await router.complete(prompt, task_type="reasoning")
+        second = await router.complete(prompt, task_type="reasoning")
+        streamed = "".join([chunk async for chunk in router.stream(prompt, task_type="reasoning")])
+        assert first["text"] == second["text"] == streamed
+        assert len(json.loads(first["text"])["top_priorities"]) == 3
+
+    asyncio.run(run())
+    print("✅ Stub responses are deterministic")
+
+
+def test_injected_errors_exercise_fallback_and_breakers():
+    """A provider configured to always fail trips its breaker and routes to the fallback"""
+    from app.services.llm_router import TASK_CONFIGS
+    from app.services import llm_circuit_breaker as cb
+
+    router = stub_router({
+        "anthropic": {"median_ms": 1, "error_rate": 1.0},
+        "openai": {"median_ms": 1, "error_rate": 0.0}
+    })
+
+    async def run():
+        for _ in range(cb.MIN_CALLS):
+            result = await router.complete("Summarize", task_type="reasoning")
+            assert result["provider"] == "openai"
+        primary = TASK_CONFIGS["reasoning"]["primary"]
+        assert router.breakers.get(primary["provider"], primary["model"]).state == cb.OPEN
+
+    asyncio.run(run())
+    print("✅ Injected errors drive real fallback/breaker logic")
+
+
+if __name__ == "__main__":
+    test_stub_answers_each_prompt_family_with_valid_json()
+    test_stub_is_deterministic_and_streams_same_text()
+    test_injected_errors_exercise_fallback_and_breakers()
@@ -0,0 +1,66 @@
+"""
+Tests for LLM token counting, pricing and pre-flight sizing
+Run: python -m pytest test_llm_tokens.py -v
+"""
+import sys
+import os
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_every_routed_model_is_priced():
+    """Each model TASK_CONFIGS can select has its own pricing and limits"""
+    from app.services.llm_router import TASK_CONFIGS
+    from app.services.llm_tokens import MODEL_SPECS, estimate_cost
+
+    for task_type, configs in TASK_CONFIGS.items():
+        for config in configs.values():
+            spec = MODEL_SPECS.get(config["model"])
+            assert spec is not None, f"{config['model']} ({task_type}) has no pricing"
+            assert spec["provider"] == config["provider"]
+
+    # 1M in + 1M out is just the sum of the two prices
+    assert abs(estimate_cost("gemini-2.5-flash", 1_000_000, 1_000_000) - 2.80) < 1e-9
+    print("✅ All routed models priced")
+
+
+def test_count_tokens_is_sane():
+    """Token counts grow with text and are never zero for non-empty text"""
+    from app.services.llm_tokens import count_tokens
+
+    short = count_tokens("Hello there, how are you?", "gpt-4o-mini")
+    long = count_tokens("Hello there, how are you? " * 50, "gpt-4o-mini")
+    assert short > 0 and long > short * 40
+    assert count_tokens("", "gpt-4o") == 0
+    # Claude counts are scaled up from the OpenAI encoding
+    assert count_tokens("word " * 100, "claude-3-haiku-20240307") >= count_tokens("word " * 100, "gpt-4o-mini")
+    print("✅ Token counting")
+
+
+def test_fit_request_clamps_and_trims():
+    """max_tokens is clamped to the model and oversize prompts are trimmed in the middle"""
+    from app.services import llm_tokens
+
+    prompt, max_tokens, input_tokens = llm_tokens.fit_request(
+        "Summarize this", None, "claude-3-haiku-20240307", 10_000
+    )
+    assert prompt == "Summarize this" and max_tokens == 4_096 and input_tokens > 0
+
+    original = llm_tokens.MAX_INPUT_TOKENS
+    llm_tokens.MAX_INPUT_TOKENS = 500
+    try:
+        big = "TASK: summarize.\n" + ("filler sentence here. " * 2000) + "\nAnswer now:"
+        prompt, max_tokens, input_tokens = llm_tokens.fit_request(big, "Be brief.", "gpt-4o-mini", 200)
+        assert prompt.startswith("TASK: summarize.") and prompt.endswith("Answer now:")
+        assert "tokens trimmed" in prompt
+        assert input_tokens <= 500 and max_tokens == 200
+    finally:
+        llm_tokens.MAX_INPUT_TOKENS = original
+    print("✅ Pre-flight sizing")
+
+
+if __name__ == "__main__":
+    test_every_routed_model_is_priced()
+    test_count_tokens_is_sane()
+    test_fit_request_clamps_and_trims()
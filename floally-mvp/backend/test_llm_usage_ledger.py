@@ -0,0 +1,85 @@
+"""
+Tests for the LLM usage ledger and its aggregates
+Run: python -m pytest test_llm_usage_ledger.py -v
+"""
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_router_records_completions_and_cache_hits():
+    """Every served completion becomes a ledger row; cache hits are free and flagged"""
+    from app.services.llm_router import LLMRouter
+    from app.services.llm_cache import CompletionCache, MemoryCacheTier
+    from app.services.llm_usage_ledger import UsageLedger, LLMUsageRecord
+    from testing_utils import sqlite_session_factory
+
+    session_factory = sqlite_session_factory(LLMUsageRecord)
+    router = LLMRouter()
+    router.anthropic_client = object()
+    router.cache = CompletionCache([MemoryCacheTier()])
+    router.ledger = UsageLedger(session_factory)
+
+    async def fake_complete(prompt, model, system_prompt, max_tokens, temperature):
+        return {"text": "ok", "provider": "anthropic", "model": model,
+                "tokens_used": 10, "input_tokens": 6, "output_tokens": 4, "cost_estimate": 0.002}
+
+    router._anthropic_complete = fake_complete
+
+    async def run():
+        await router.complete("Summarize", task_type="light", user_id="a@example.com")
+        await router.complete("Summarize", task_type="light", user_id="a@example.com")
+
+    asyncio.run(run())
+    assert router.ledger.flush() == 2
+
+    db = session_factory()
+    rows = db.query(LLMUsageRecord).order_by(LLMUsageRecord.id).all()
+    assert [row.cache_hit for row in rows] == [False, True]
+    assert rows[0].cost_usd == 0.002 and rows[1].cost_usd == 0.0
+    assert rows[0].user_id == "a@example.com" and rows[0].input_tokens == 6
+    assert rows[0].endpoint is None  # Not called from a request
+    db.close()
+    print("✅ Completions recorded in the ledger")
+
+
+def test_usage_summary_aggregates_in_sql():
+    """Per-user / endpoint / day totals come back from one grouped query each"""
+    from app.services.llm_usage_ledger import UsageLedger, LLMUsageRecord, usage_summary
+    from testing_utils import sqlite_session_factory
+
+    session_factory = sqlite_session_factory(LLMUsageRecord)
+    ledger = UsageLedger(session_factory)
+    today = datetime.utcnow()
+    for user, endpoint, cost, latency, hit, created in [
+        ("a", "POST /api/summarize-message", 0.01, 100, False, today),
+        ("a", "POST /api/summarize-message", 0.0, 5, True, today),
+        ("b", "POST /api/ai/save-my-day", 0.05, 900, False, today),
+        ("b", "POST /api/ai/save-my-day", 0.05, 700, False, today - timedelta(days=1)),
+        ("b", "POST /api/ai/save-my-day", 9.99, 700, False, today - timedelta(days=30)),
+    ]:
+        ledger.record(user_id=user, endpoint=endpoint, task_type="light", provider="anthropic",
+                      model="claude-3-haiku-20240307", input_tokens=10, output_tokens=5,
+                      latency_ms=latency, cost_usd=cost, cache_hit=hit, fallback=False,
+                      created_at=created)
+    ledger.flush()
+
+    db = session_factory()
+    summary = usage_summary(db, today - timedelta(days=7))
+    db.close()
+
+    by_user = {row["key"]: row for row in summary["by_user"]}
+    assert by_user["b"]["calls"] == 2 and abs(by_user["b"]["cost_usd"] - 0.10) < 1e-9
+    assert by_user["a"]["cache_hit_rate"] == 0.5
+    assert summary["by_endpoint"][0]["key"] == "POST /api/ai/save-my-day"  # Most expensive first
+    assert len(summary["by_day"]) == 2
+    print("✅ Usage aggregated per user, endpoint and day")
+
+
+if __name__ == "__main__":
+    test_router_records_completions_and_cache_hits()
+    test_usage_summary_aggregates_in_sql()
@@ -0,0 +1,63 @@
+"""
+Tests for the per-message AI analysis cache
+Run: python -m pytest test_message_analysis_cache.py -v
+"""
+import sys
+import os
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+CONTEXT = {"role": "Founder", "priorities": ["Fundraising"], "projects": ["Seed round"]}
+ANALYSIS = {"importance_score": 85, "reason": "Investor follow-up", "suggested_action": "read_now", "confidence": 0.9}
+
+
+def _summary(index, subject="Term sheet", snippet="Can we talk?"):
+    return {"index": index, "category": "primary", "is_important": True, "subject": subject, "snippet": snippet}
+
+
+def test_cached_analysis_reused_until_message_changes():
+    """A saved analysis is a hit for the same fields (any batch position) and a miss once they change"""
+    from testing_utils import sqlite_session_factory
+    from app.services.message_analysis_cache import MessageAnalysisStore, MessageAnalysisCache, message_fingerprint, strip_index
+
+    db = sqlite_session_factory(MessageAnalysisCache)()
+    store = MessageAnalysisStore(db, "a@example.com", CONTEXT)
+    assert store.lookup({"m1": message_fingerprint(_summary(0))}) == {}
+
+    store.save([("m1", message_fingerprint(_summary(0)), strip_index({**ANALYSIS, "index": 0}))])
+    assert store.lookup({"m1": message_fingerprint(_summary(7))}) == {"m1": ANALYSIS}
+    assert store.lookup({"m1": message_fingerprint(_summary(0, snippet="Actually, never mind"))}) == {}
+    assert store.lookup({"m2": message_fingerprint(_summary(0))}) == {}
+    assert MessageAnalysisStore(db, "b@example.com", CONTEXT).lookup({"m1": message_fingerprint(_summary(0))}) == {}
+    print("✅ Hit on same fields, miss on changed message")
+
+
+def test_context_and_task_type_are_part_of_the_key():
+    """A different user context or model tier never reuses another's analysis"""
+    from testing_utils import sqlite_session_factory
+    from app.services.message_analysis_cache import MessageAnalysisStore, MessageAnalysisCache, message_fingerprint
+
+    db = sqlite_session_factory(MessageAnalysisCache)()
+    fingerprints = {"m1": message_fingerprint(_summary(0))}
+    MessageAnalysisStore(db, "a@example.com", CONTEXT).save([("m1", fingerprints["m1"], ANALYSIS)])
+
+    assert MessageAnalysisStore(db, "a@example.com", dict(CONTEXT)).lookup(fingerprints) == {"m1": ANALYSIS}
+    assert MessageAnalysisStore(db, "a@example.com", {**CONTEXT, "role": "Engineer"}).lookup(fingerprints) == {}
+    assert MessageAnalysisStore(db, "a@example.com", CONTEXT, task_type="strategic").lookup(fingerprints) == {}
+    print("✅ Context and task type separate cache entries")
+
+
+def test_merge_analyses_orders_cached_and_fresh_by_index():
+    """Cached hits get their current batch index back and interleave with fresh results"""
+    from app.services.message_analysis_cache import merge_analyses
+
+    merged = merge_analyses({0: {"importance_score": 10}, 2: {"importance_score": 30}}, [{"index": 1, "importance_score": 20}])
+    assert [(a["index"], a["importance_score"]) for a in merged] == [(0, 10), (1, 20), (2, 30)]
+    print("✅ Cached and fresh analyses merged in order")
+
+
+if __name__ == "__main__":
+    test_cached_analysis_reused_until_message_changes()
+    test_context_and_task_type_are_part_of_the_key()
+    test_merge_analyses_orders_cached_and_fresh_by_index()
@@ -0,0 +1,108 @@
+"""
+Tests for the confidence-gated message scoring cascade
+Run: python -m pytest test_scoring_cascade.py -v
+"""
+import sys
+import os
+import asyncio
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _rule_results(confidences):
+    return [
+        {"importance_score": 40, "confidence": confidence, "reasoning": f"rule {i}", "suggested_action": "read_later"}
+        for i, confidence in enumerate(confidences)
+    ]
+
+
+def test_each_stage_only_sees_messages_the_previous_one_could_not_settle():
+    """Confident rule scores stop at rules; only still-ambiguous fast answers reach reasoning"""
+    from app.services.scoring_cascade import ScoringCascade, CascadeThresholds, stage_counts
+
+    calls = {}
+
+    async def fast(indices, results):
+        calls["fast"] = list(indices)
+        # Index 1 is settled by the fast model, 2 stays ambiguous, 3 is not answered
+        return {
+            1: {"importance_score": 90, "confidence": 0.9, "reason": "Client request", "suggested_action": "read_now"},
+            2: {"importance_score": 55, "confidence": 0.3, "reason": "Unclear"}
+        }
+
+    async def reasoning(indices, results):
+        calls["reasoning"] = list(indices)
+        calls["reasoning_seen"] = [results[i]["importance_score"] for i in indices]
+        return {2: {"importance_score": 20, "confidence": 0.85, "reason": "Cold outreach", "suggested_action": "archive"}}
+
+    cascade = ScoringCascade()
+    results = asyncio.run(cascade.run(
+        _rule_results([0.9, 0.5, 0.3, 0.3]),
+        CascadeThresholds(fast_threshold=0.7, reasoning_threshold=0.5, max_reasoning=20),
+        fast=fast,
+        reasoning=reasoning
+    ))
+
+    assert calls["fast"] == [1, 2, 3]
+    assert calls["reasoning"] == [2, 3] and calls["reasoning_seen"] == [55, 40]
+    assert [r["stage"] for r in results] == ["rules", "fast", "reasoning", "rules"]
+    assert results[0]["reason"] == "rule 0"
+    assert results[2]["importance_score"] == 20 and results[2]["suggested_action"] == "archive"
+    assert stage_counts(results) == {"rules": 2, "fast": 1, "reasoning": 1}
+
+    stats = cascade.get_stats()["stages"]
+    assert stats["fast"]["reached"] == 3 and stats["fast"]["traffic_share"] == 0.75
+    assert stats["reasoning"]["reached"] == 2 and stats["reasoning"]["hit_rate"] == 0.5
+    print("✅ Cascade escalates only unsettled messages, per-stage hit rates recorded")
+
+
+def test_per_user_thresholds_and_failed_stages():
+    """User overrides replace defaults (bad values ignored); a failing stage keeps earlier results"""
+    from app.services.scoring_cascade import ScoringCascade, CascadeThresholds
+
+    defaults = CascadeThresholds()
+    thresholds = CascadeThresholds.for_user({
+        "tone": "warm_friendly",
+        "scoring_cascade": {"fast_threshold": 0.4, "reasoning_threshold": 7, "max_reasoning": 1}
+    })
+    assert thresholds.fast_threshold == 0.4
+    assert thresholds.reasoning_threshold == defaults.reasoning_threshold
+    assert thresholds.max_reasoning == 1
+    assert CascadeThresholds.for_user(None) == defaults
+
+    reasoning_calls = []
+
+    async def failing_fast(indices, results):
+        raise RuntimeError("provider down")
+
+    async def reasoning(indices, results):
+        reasoning_calls.append(list(indices))
+        return {}
+
+    cascade = ScoringCascade()
+    results = asyncio.run(cascade.run(
+        _rule_results([0.5, 0.1, 0.2]), thresholds, fast=failing_fast, reasoning=reasoning
+    ))
+    assert [r["stage"] for r in results] == ["rules", "rules", "rules"]
+    assert reasoning_calls == [[1]]  # Least confident first, capped at max_reasoning
+    assert cascade.get_stats()["stage_errors"] == 1
+    print("✅ Per-user thresholds applied, failed stages fall back")
+
+
+def test_stage_actions_mapped_to_curated_set():
+    """Contextual scoring actions are shown with the curated inbox's vocabulary"""
+    from app.routers.messages import curated_action
+
+    assert curated_action("reply_now") == "read_now"
+    assert curated_action("review_today") == "read_now"
+    assert curated_action("auto_archive") == "archive"
+    assert curated_action("unsubscribe") == "unsubscribe"
+    assert curated_action(None) == "read_later"
+    print("✅ Suggested actions mapped to read_now/read_later/archive/unsubscribe")
+
+
+if __name__ == "__main__":
+    test_each_stage_only_sees_messages_the_previous_one_could_not_settle()
+    test_per_user_thresholds_and_failed_stages()
+    test_stage_actions_mapped_to_curated_set()
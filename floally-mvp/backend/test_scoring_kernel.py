@@ -0,0 +1,125 @@
+"""
+Parity test for the vectorized scoring kernel
+Checks scoring_kernel against the scalar ContextualScorer on randomized inboxes
+"""
+import sys
+import os
+import random
+from types import SimpleNamespace
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SUBJECTS = ["Quick question", "URGENT: contract", "Deadline today", "Newsletter #42", "Approval needed for PO", ""]
+CATEGORIES = ["primary", "promotional", "social", "updates", None]
+TRUST = ["trusted", "blocked", "one_time"]
+
+
+def _random_inbox(seed: int, size: int):
+    """Messages plus SenderStats/TrustedSender-like rows for a mix of senders"""
+    rng = random.Random(seed)
+    senders = [f"sender{i}@example.com" for i in range(size // 3 + 1)]
+
+    sender_stats = {}
+    for email in senders:
+        if rng.random() < 0.7:
+            sender_stats[email] = SimpleNamespace(
+                sender_email=email,
+                total_emails=rng.choice([0, 1, 2, 3, 5, 9, 10, 40]),
+                importance_score=rng.choice([None, 0.0, 0.1, 0.5, 0.73, 1.0]),
+                marked_important=rng.randint(0, 6),
+                marked_interesting=rng.randint(0, 3),
+                marked_unimportant=rng.randint(0, 3),
+                responded=rng.randint(0, 8),
+                archived=rng.choice([0, 1, 10, 30]),
+                trashed=rng.randint(0, 2),
+                last_interaction=None
+            )
+
+    trust = {email: rng.choice(TRUST) for email in senders if rng.random() < 0.3}
+
+    messages = []
+    for _ in range(size):
+        messages.append({
+            "sender_email": rng.choice(senders),
+            "subject": rng.choice(SUBJECTS),
+            "snippet": "",
+            "gmail_signals": {
+                "is_starred": rng.random() < 0.2,
+                "is_important": rng.random() < 0.3,
+                "category": rng.choice(CATEGORIES),
+                "has_unsubscribe_link": rng.random() < 0.3
+            }
+        })
+    return messages, sender_stats, trust
+
+
+def _scalar_scorer(user_id, messages, sender_stats, trust):
+    """ContextualScorer with its per-scorer caches pre-filled (no DB needed)"""
+    from app.services.contextual_scoring import ContextualScorer
+
+    scorer = ContextualScorer(db=None)
+    for email in {m["sender_email"] for m in messages}:
+        scorer._sender_stats_cache[(user_id, email)] = sender_stats.get(email)
+        level = trust.get(email)
+        scorer._trust_cache[(user_id, email)] = (
+            SimpleNamespace(trust_level=SimpleNamespace(value=level), attachment_count=0, last_used=None)
+            if level else None
+        )
+    scorer._user_context_cache[user_id] = {"role": "Professional", "priorities": [], "has_context": False}
+    return scorer
+
+
+def test_kernel_matches_scalar_scoring():
+    """Score, confidence, relationship and action match the scalar path exactly"""
+    from app.services.scoring_kernel import (
+        pack_features, score_features, decode, RELATIONSHIPS, ACTIONS
+    )
+
+    for seed in range(5):
+        messages, sender_stats, trust = _random_inbox(seed, 600)
+        scalar = _scalar_scorer("user-1", messages, sender_stats, trust).score_batch("user-1", messages)
+        columns = score_features(pack_features(messages, sender_stats, trust))
+
+        relationships = decode(columns["relationship"], RELATIONSHIPS)
+        actions = decode(columns["suggested_action"], ACTIONS)
+        for i, expected in enumerate(scalar):
+            assert columns["importance_score"][i] == expected["importance_score"], (seed, i)
+            assert columns["confidence"][i] == expected["confidence"], (seed, i)
+            assert relationships[i] == expected["sender_relationship"], (seed, i)
+            assert actions[i] == expected["suggested_action"], (seed, i)
+
+    print("✅ Vectorized kernel matches scalar scoring on 3000 messages")
+
+
+def test_composite_blend_matches_curated_formula():
+    """composite_blend reproduces the curated inbox compositeScore"""
+    from app.services.scoring_kernel import composite_blend
+
+    rng = random.Random(7)
+    rows = [
+        (rng.randint(0, 100), rng.random(), rng.random() < 0.3, rng.random() < 0.5)
+        for _ in range(500)
+    ]
+    blended = composite_blend(*zip(*rows))
+
+    for (ai, sender, marked, primary), value in zip(rows, blended):
+        expected = (ai / 100.0) * 0.5 + sender * 0.3 + (0.2 if marked else 0) + (0.1 if primary else 0)
+        assert abs(value - expected) < 1e-12
+
+    print("✅ composite_blend matches the curated compositeScore formula")
+
+
+def test_empty_batch():
+    """An empty batch produces empty columns"""
+    from app.services.scoring_kernel import pack_features, score_features
+
+    columns = score_features(pack_features([], {}, {}))
+    assert all(len(values) == 0 for values in columns.values())
+    print("✅ Empty batch handled")
+
+
+if __name__ == "__main__":
+    test_kernel_matches_scalar_scoring()
+    test_composite_blend_matches_curated_formula()
+    test_empty_batch()
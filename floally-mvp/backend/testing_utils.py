@@ -0,0 +1,123 @@
+"""
+Shared helpers for the backend tests (SQLite sessions, stubbed LLM router)
+"""
+import sys
+import os
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _render_postgres_types_on_sqlite():
+    """Let models using Postgres UUID/JSONB columns create their tables on SQLite"""
+    from sqlalchemy.dialects.postgresql import JSONB, UUID
+    from sqlalchemy.ext.compiler import compiles
+
+    compiles(JSONB, "sqlite")(lambda type_, compiler, **kw: "JSON")
+    compiles(UUID, "sqlite")(lambda type_, compiler, **kw: "CHAR(36)")
+
+
+def sqlite_session_factory(*models):
+    """sessionmaker over one shared in-memory SQLite database with the models' tables"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    # Register every mapped class so relationship("TrustedSender") etc. resolve on first query
+    import app.models  # noqa: F401
+    import app.models.trusted_sender  # noqa: F401
+
+    _render_postgres_types_on_sqlite()
+
+    # One shared in-memory database across the threadpool
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    for model in models:
+        model.__table__.create(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def record_statements(session_factory):
+    """List that collects every SQL statement run through the factory's engine"""
+    from sqlalchemy import event
+
+    statements = []
+    event.listen(
+        session_factory.kw["bind"], "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement)
+    )
+    return statements
+
+
+def stub_router(profiles=None):
+    """LLMRouter answered only by a zero-latency StubProvider (no cache, ledger or real clients)"""
+    from app.services.llm_router import LLMRouter
+    from app.services.llm_stub import StubProvider
+
+    router = LLMRouter()
+    router.cache = None
+    router.ledger = None
+    router.anthropic_client = router.openai_client = None
+    router.gemini_available = False
+    router.stub = StubProvider(profiles=profiles, latency_scale=0)
+    return router
+
+
+def gmail_message(message_id, thread_id=None, labels=("INBOX",), sender="someone@example.com", subject="Hello", internal_date=0):
+    """Gmail message resource in metadata format"""
+    return {
+        "id": message_id,
+        "threadId": thread_id or message_id,
+        "labelIds": list(labels),
+        "snippet": f"{subject} snippet",
+        "internalDate": str(internal_date),
+        "payload": {"headers": [
+            {"name": "From", "value": sender},
+            {"name": "Subject", "value": subject},
+            {"name": "X-Unused", "value": "dropped by the store"},
+        ]},
+    }
+
+
+class FakeGmailClient:
+    """In-memory stand-in for AsyncGoogleClient's Gmail methods"""
+
+    def __init__(self, messages=(), history_id="100"):
+        self.messages = {m["id"]: m for m in messages}
+        self.history_id = history_id
+        self.history = []  # Records returned by list_history
+        self.history_expired = False  # list_history raises 404, as Gmail does for old historyIds
+        self.fail = {}  # message_id -> statuses returned (one per batch) before it succeeds
+        self.batches = []  # Message IDs of each batch_get_messages call
+        self.fetches = []  # (format, metadata_headers, fields) of each batch_get_messages call
+        self.calls = []
+
+    async def get_profile(self):
+        self.calls.append("get_profile")
+        return {"historyId": self.history_id}
+
+    async def list_messages(self, q=None, max_results=10, **kwargs):
+        self.calls.append("list_messages")
+        inbox = [m for m in self.messages.values() if "INBOX" in m["labelIds"]]
+        inbox.sort(key=lambda m: int(m["internalDate"]), reverse=True)
+        return {"messages": [{"id": m["id"], "threadId": m["threadId"]} for m in inbox[:max_results]]}
+
+    async def list_history(self, start_history_id, history_types=None, page_token=None, max_results=500):
+        from app.services.google_api_client import GoogleAPIError
+
+        self.calls.append("list_history")
+        if self.history_expired:
+            raise GoogleAPIError(404, "Requested entity was not found.")
+        return {"history": self.history, "historyId": self.history_id}
+
+    async def batch_get_messages(self, message_ids, format="full", metadata_headers=None, fields=None):
+        ids = list(message_ids)
+        self.batches.append(ids)
+        self.fetches.append((format, metadata_headers, fields))
+        results = {}
+        for mid in ids:
+            if self.fail.get(mid):
+                results[mid] = (self.fail[mid].pop(0), {"error": {"message": "Backend error"}})
+            elif mid in self.messages:
+                results[mid] = (200, self.messages[mid])
+            else:
+                results[mid] = (404, {"error": {"message": "Not Found"}})
+        return results